@@ -1,12 +1,60 @@
 from django.contrib import admin
-from apps.accounts.models import Usuario, UsuarioLoja
+from apps.accounts.models import EmailPendente, Usuario, UsuarioLoja
+from apps.lojas.busca import filtrar_lojas
+from apps.lojas.models import Loja
+from core.paginacao import PaginadorEstimado
+
+
+def _buscar_por_usuario(queryset, termo, prefixo=''):
+    """
+    Busca pelo e-mail exato (índice em LOWER(email)) quando o termo contém
+    "@", ou pelo início do nome nos demais casos (índice criado pela migração
+    `0006_indice_nome_usuario`).
+    """
+    if '@' in termo:
+        return queryset.filter(**{f'{prefixo}email__lower': termo.lower()})
+    return queryset.filter(**{f'{prefixo}nome__istartswith': termo})
+
 
 @admin.register(Usuario)
 class UsuarioAdmin(admin.ModelAdmin):
     list_display = ['nome', 'email']
     search_fields = ['nome', 'email']
-    
+    search_help_text = "E-mail completo ou início do nome."
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if not termo:
+            return queryset, False
+        return _buscar_por_usuario(queryset, termo), False
+
+
 @admin.register(UsuarioLoja)
 class UsuarioLojaAdmin(admin.ModelAdmin):
     list_display = ['usuario', 'loja', 'data_vinculo']
-    search_fields = ['usuario__nome', 'data_vinculo']  # Usando __ para buscar o campo 'nome' no modelo Usuario
+    list_select_related = ['usuario', 'loja']  # Evita duas consultas extras por linha no __str__
+    search_fields = ['usuario__nome', 'usuario__email', 'loja__cnpj']
+    search_help_text = "E-mail completo, CNPJ ou início do nome do usuário."
+    raw_id_fields = ['usuario', 'loja']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if not termo:
+            return queryset, False
+        if not termo.strip('0123456789./- '):
+            lojas = filtrar_lojas(Loja.objects.all(), termo)
+            return queryset.filter(loja__in=lojas), False
+        return _buscar_por_usuario(queryset, termo, prefixo='usuario__'), False
+
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = ['assunto', 'status', 'tentativas', 'criado_em', 'enviado_em']
+    list_filter = ['status']
+    readonly_fields = ['criado_em', 'enviado_em', 'ultimo_erro']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
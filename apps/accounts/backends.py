@@ -1,17 +1,146 @@
-from django.contrib.auth.backends import ModelBackend
-from django.contrib.auth import get_user_model
-
-Usuario = get_user_model()
-
-class EmailBackend(ModelBackend):
-    def authenticate(self, request, email=None, password=None, **kwargs):
-        if email is None or password is None:
-            return None
-
-        usuario = Usuario.objects.filter(email=email).first()
-        if usuario and usuario.check_password(password):
-            return usuario
-        return None
-
-    def get_user(self, user_id):
-        return Usuario.objects.filter(pk=user_id).first()
+import copy
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.core.cache import caches
+
+from core.cache import CacheLRU
+
+from .hashers import em_thread_de_hash
+
+Usuario = get_user_model()
+
+# Cache de usuários do `get_user`, consultado pelo AuthenticationMiddleware em
+# toda requisição autenticada. Invalidado pelos sinais em `apps.accounts.signals`.
+#
+# Com um cache compartilhado (USUARIO_CACHE_ALIAS), cada usuário tem nele um
+# carimbo de versão, trocado a cada invalidação. As entradas do LRU local e do
+# cache compartilhado são associadas à versão com que foram lidas, então uma
+# invalidação feita em qualquer processo vale imediatamente para todos.
+_usuarios = CacheLRU(settings.USUARIO_CACHE_TAMANHO, settings.USUARIO_CACHE_TTL)
+
+
+def _chave_usuario(user_id):
+    return f"usuario:{user_id}"
+
+
+def _chave_versao(user_id):
+    return f"usuario_versao:{user_id}"
+
+
+def _cache_compartilhado():
+    if settings.USUARIO_CACHE_ALIAS:
+        return caches[settings.USUARIO_CACHE_ALIAS]
+    return None
+
+
+def _versao(compartilhado, user_id):
+    """
+    Retorna o carimbo de versão atual do usuário, criando-o se não existir
+    (primeiro acesso ou carimbo descartado pelo cache).
+    """
+    chave = _chave_versao(user_id)
+    versao = compartilhado.get(chave)
+    if versao is None:
+        compartilhado.add(chave, uuid.uuid4().hex, None)
+        versao = compartilhado.get(chave)
+    return versao
+
+
+def invalidar_usuario(user_id):
+    """
+    Remove o usuário do cache local e troca o seu carimbo de versão no cache
+    compartilhado (se configurado), descartando as cópias dos demais processos.
+    """
+    _usuarios.delete(_chave_usuario(user_id))
+    compartilhado = _cache_compartilhado()
+    if compartilhado is not None:
+        compartilhado.set(_chave_versao(user_id), uuid.uuid4().hex, None)
+
+
+class EmailBackend(ModelBackend):
+    """
+    Backend único de autenticação por e-mail.
+
+    Aceita o e-mail tanto em `email=` quanto em `username=` (como faz o admin
+    e o `authenticate` da view de login), sem diferenciar maiúsculas de
+    minúsculas, com uma única consulta ao banco.
+    """
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        email = email or username or kwargs.get(Usuario.USERNAME_FIELD)
+        if email is None or password is None:
+            return None
+
+        usuario = Usuario.objects.filter(email__lower=email.lower()).first()
+        if usuario is None:
+            # Calcula um hash mesmo sem usuário, para que o tempo de resposta
+            # não revele quais e-mails estão cadastrados
+            Usuario().set_password(password)
+            return None
+
+        if usuario.check_password(password) and self.user_can_authenticate(usuario):
+            return usuario
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, email=None, **kwargs):
+        """
+        Versão assíncrona de `authenticate`: consulta com o ORM assíncrono e
+        calcula o hash no pool de `em_thread_de_hash`, sem bloquear o event loop.
+        """
+        email = email or username or kwargs.get(Usuario.USERNAME_FIELD)
+        if email is None or password is None:
+            return None
+
+        usuario = await Usuario.objects.filter(email__lower=email.lower()).afirst()
+        if usuario is None:
+            await em_thread_de_hash(Usuario().set_password, password)
+            return None
+
+        rehash = []
+        valida = await em_thread_de_hash(check_password, password, usuario.password, rehash.append)
+        if not valida or not self.user_can_authenticate(usuario):
+            return None
+        if rehash:
+            # Hash em algoritmo ou parâmetros antigos: recalcula no perfil atual
+            await em_thread_de_hash(usuario.set_password, password)
+            await usuario.asave(update_fields=['password'])
+        return usuario
+
+    def get_user(self, user_id):
+        """
+        Busca o usuário da sessão no cache local, depois no compartilhado e,
+        por último, no banco.
+
+        Com cache compartilhado, o LRU local só é usado se a versão do usuário
+        não mudou desde a leitura (uma consulta ao cache, sem desserializar o
+        usuário). Devolve sempre uma cópia, para que alterações feitas durante
+        uma requisição não vazem para as demais.
+        """
+        chave = _chave_usuario(user_id)
+        compartilhado = _cache_compartilhado()
+        versao = _versao(compartilhado, user_id) if compartilhado is not None else None
+
+        usuario = None
+        local = _usuarios.get(chave)
+        if local is not None and local[0] == versao:
+            usuario = local[1]
+
+        if usuario is None:
+            chave_versionada = f"{chave}:{versao}"
+            if compartilhado is not None:
+                usuario = compartilhado.get(chave_versionada)
+            if usuario is None:
+                usuario = Usuario.objects.filter(pk=user_id).first()
+                if usuario is None:
+                    return None
+                if compartilhado is not None:
+                    compartilhado.set(chave_versionada, usuario, settings.USUARIO_CACHE_TTL)
+            _usuarios.set(chave, (versao, usuario))
+
+        if not self.user_can_authenticate(usuario):
+            return None
+        return copy.copy(usuario)
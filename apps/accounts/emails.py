@@ -0,0 +1,417 @@
+"""
+Fila de envio de e-mails
+------------------------
+As views não falam mais com o servidor SMTP: `enfileirar_email` grava a
+mensagem em `EmailPendente` e retorna imediatamente. O worker
+(`manage.py processar_fila_email` ou a task do Celery) consome a fila em lotes,
+reaproveitando uma única conexão SMTP por lote e reagendando as falhas com
+backoff exponencial.
+
+Para reenvios em massa, `enviar_em_lotes` envia direto pelo backend, abrindo
+uma conexão por lote em vez de uma por mensagem.
+
+Os templates dos e-mails são pré-compilados por `TemplateEmail`: a parte
+estática é renderizada uma única vez e cada envio apenas substitui as
+variáveis, gerando a versão HTML e a versão em texto puro.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Avg, F, Min, Q
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import conditional_escape
+
+from .models import EmailPendente
+from .tokens import CONFIRMACAO, REDEFINICAO, gerar_token
+
+logger = logging.getLogger('usuarios')
+
+ASSUNTO_CONFIRMACAO = 'Confirmação de E-mail'
+ASSUNTO_REDEFINICAO = 'Redefinição de Senha'
+
+ERRO_RESERVA_VENCIDA = 'Reserva vencida: o worker foi interrompido durante o envio.'
+
+
+class TemplateEmail:
+    """
+    Template de e-mail pré-compilado.
+
+    O template é renderizado uma única vez com marcadores no lugar das
+    variáveis e o resultado é quebrado em trechos estáticos. Cada envio apenas
+    intercala esses trechos com os valores (escapados quando `escapar=True`),
+    produzindo exatamente a mesma saída do `render_to_string`.
+
+    Só serve para templates em que as variáveis são apenas exibidas (sem
+    `{% if %}`/`{% for %}` sobre elas), que é o caso dos e-mails transacionais.
+    """
+    MARCADOR = '__zap_email_var_{}__'
+
+    def __init__(self, nome_template, variaveis, escapar=True):
+        self.variaveis = tuple(variaveis)
+        self.escapar = escapar
+
+        marcadores = {nome: self.MARCADOR.format(nome) for nome in self.variaveis}
+        saida = get_template(nome_template).render(marcadores)
+
+        # Quebra a saída em estáticos[0], var[0], estáticos[1], var[1], ..., estáticos[n]
+        self.estaticos = [saida]
+        self.nomes = []
+        for nome, marcador in marcadores.items():
+            estaticos, nomes = [], []
+            for indice, parte in enumerate(self.estaticos):
+                pedacos = parte.split(marcador)
+                estaticos.extend(pedacos)
+                nomes.extend([nome] * (len(pedacos) - 1))
+                if indice < len(self.nomes):
+                    nomes.append(self.nomes[indice])
+            self.estaticos, self.nomes = estaticos, nomes
+
+    def renderizar(self, contexto):
+        escapar = conditional_escape if self.escapar else str
+        partes = [self.estaticos[0]]
+        for nome, estatico in zip(self.nomes, self.estaticos[1:]):
+            partes.append(escapar(contexto[nome]))
+            partes.append(estatico)
+        return ''.join(partes)
+
+
+@lru_cache(maxsize=None)
+def _compilar(nome_template, variaveis, escapar):
+    return TemplateEmail(nome_template, variaveis, escapar)
+
+
+def obter_template_email(nome_template, variaveis, escapar=True):
+    """
+    Retorna o `TemplateEmail` do template informado.
+
+    Em produção a compilação é feita uma vez por processo; com `DEBUG` ligado
+    o template é recompilado a cada chamada para refletir as edições.
+    """
+    if settings.DEBUG:
+        return TemplateEmail(nome_template, variaveis, escapar)
+    return _compilar(nome_template, tuple(variaveis), escapar)
+
+
+def renderizar_email(nome_base, contexto):
+    """
+    Renderiza `<nome_base>.html` e `<nome_base>.txt` e retorna `(html, texto)`.
+
+    O ano do rodapé (`year`) é preenchido automaticamente.
+    """
+    contexto = {'year': timezone.localdate().year, **contexto}
+    variaveis = tuple(sorted(contexto))
+    html = obter_template_email(f'{nome_base}.html', variaveis).renderizar(contexto)
+    texto = obter_template_email(f'{nome_base}.txt', variaveis, escapar=False).renderizar(contexto)
+    return html, texto
+
+
+def renderizar_confirmacao(usuario, dominio):
+    """
+    Gera o link de confirmação do usuário e renderiza o e-mail (`(html, texto)`).
+    """
+    uidb64, token = gerar_token(usuario, CONFIRMACAO)
+    confirm_url = f"http://{dominio}/confirmar-email/{uidb64}/{token}/"
+
+    return renderizar_email('accounts/confirmacao_email', {
+        'confirm_url': confirm_url,
+        'client_name': usuario.nome,  # Nome do usuário
+    })
+
+
+def enfileirar_confirmacao(usuario, dominio):
+    """
+    Renderiza e enfileira o e-mail de confirmação de um novo usuário.
+    """
+    html, texto = renderizar_confirmacao(usuario, dominio)
+    enfileirar_email(ASSUNTO_CONFIRMACAO, html, [usuario.email], corpo_texto=texto)
+    logger.info("E-mail de confirmação enfileirado para %s.", usuario.email)
+
+
+def url_redefinicao(usuario, dominio):
+    """
+    Gera o link de redefinição de senha do usuário.
+    """
+    uidb64, token = gerar_token(usuario, REDEFINICAO)
+    return f"http://{dominio}/resetar-senha/{uidb64}/{token}/"
+
+
+def renderizar_redefinicao(usuario, reset_url):
+    """
+    Renderiza o e-mail de redefinição de senha (`(html, texto)`).
+    """
+    return renderizar_email('accounts/redefinir_senha_email', {
+        'reset_url': reset_url,
+        'client_name': usuario.nome,  # Nome do usuário
+    })
+
+
+def criar_mensagem(assunto, corpo_html, destinatarios, remetente=None, corpo_texto='', connection=None):
+    """
+    Monta a mensagem com o texto puro como corpo e o HTML como alternativa.
+
+    Sem `corpo_texto`, envia apenas o HTML (mensagens antigas da fila).
+    """
+    mensagem = EmailMultiAlternatives(
+        assunto,
+        corpo_texto or corpo_html,
+        remetente or settings.DEFAULT_FROM_EMAIL,
+        list(destinatarios),
+        connection=connection,
+    )
+    if corpo_texto:
+        mensagem.attach_alternative(corpo_html, "text/html")
+    else:
+        mensagem.content_subtype = "html"
+    return mensagem
+
+
+def enfileirar_email(assunto, corpo_html, destinatarios, remetente=None, corpo_texto=''):
+    """
+    Grava uma mensagem na fila de envio e devolve o registro criado.
+
+    Quando o transporte configurado é o Celery, dispara a task de envio após o
+    commit da transação corrente.
+    """
+    email = EmailPendente.objects.create(
+        assunto=assunto,
+        corpo_html=corpo_html,
+        corpo_texto=corpo_texto,
+        remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+    if settings.EMAIL_FILA_TRANSPORTE == 'celery':
+        from .tasks import processar_fila_email
+        transaction.on_commit(lambda: processar_fila_email.delay())
+
+    return email
+
+
+def _montar_mensagem(email, connection):
+    """
+    Converte um registro da fila em uma mensagem pronta para envio.
+    """
+    return criar_mensagem(
+        email.assunto,
+        email.corpo_html,
+        email.destinatarios,
+        remetente=email.remetente,
+        corpo_texto=email.corpo_texto,
+        connection=connection,
+    )
+
+
+def _reagendar(email, erro):
+    """
+    Registra a falha e agenda a próxima tentativa com backoff exponencial.
+    """
+    email.tentativas += 1
+    email.ultimo_erro = str(erro)
+    if email.tentativas >= settings.EMAIL_FILA_MAX_TENTATIVAS:
+        email.status = EmailPendente.FALHOU
+        logger.error("E-mail %s descartado após %s tentativas: %s", email.pk, email.tentativas, erro)
+    else:
+        atraso = settings.EMAIL_FILA_BACKOFF_BASE * (2 ** (email.tentativas - 1))
+        email.status = EmailPendente.PENDENTE
+        email.proxima_tentativa = timezone.now() + timedelta(seconds=atraso)
+        logger.warning("Falha ao enviar e-mail %s, nova tentativa em %ss: %s", email.pk, atraso, erro)
+    email.save(update_fields=['tentativas', 'ultimo_erro', 'status', 'proxima_tentativa'])
+
+
+def _reservar_lote(lote):
+    """
+    Reserva até `lote` mensagens prontas para envio e as retorna.
+
+    A transação dura apenas o SELECT e o UPDATE: as linhas são travadas com
+    `select_for_update(skip_locked=True)` (vários workers em paralelo no
+    PostgreSQL) e marcadas como `ENVIANDO` até `EMAIL_FILA_RESERVA` segundos
+    à frente. Reservas vencidas (worker interrompido no meio do lote) voltam
+    a ser elegíveis, contando como uma tentativa: uma mensagem que sempre
+    derruba o worker vai para `FALHOU` ao atingir `EMAIL_FILA_MAX_TENTATIVAS`,
+    em vez de ser reservada para sempre.
+    """
+    agora = timezone.now()
+    prontas = Q(status=EmailPendente.PENDENTE) | Q(status=EmailPendente.ENVIANDO)
+    with transaction.atomic():
+        linhas = list(
+            EmailPendente.objects
+            .select_for_update(skip_locked=True)
+            .filter(prontas, proxima_tentativa__lte=agora)
+            .order_by('proxima_tentativa')
+            .values_list('pk', 'status', 'tentativas')[:lote]
+        )
+        if not linhas:
+            return []
+
+        vencidas = {pk: tentativas + 1 for pk, status, tentativas in linhas if status == EmailPendente.ENVIANDO}
+        esgotadas = [pk for pk, tentativas in vencidas.items() if tentativas >= settings.EMAIL_FILA_MAX_TENTATIVAS]
+        ids = [pk for pk, _status, _tentativas in linhas if pk not in esgotadas]
+        if esgotadas:
+            EmailPendente.objects.filter(pk__in=esgotadas).update(
+                status=EmailPendente.FALHOU,
+                tentativas=F('tentativas') + 1,
+                ultimo_erro=ERRO_RESERVA_VENCIDA,
+            )
+            logger.error("E-mails %s descartados: reserva vencida na última tentativa.", esgotadas)
+        if vencidas:
+            EmailPendente.objects.filter(pk__in=set(vencidas) - set(esgotadas)).update(
+                tentativas=F('tentativas') + 1,
+                ultimo_erro=ERRO_RESERVA_VENCIDA,
+            )
+        EmailPendente.objects.filter(pk__in=ids).update(
+            status=EmailPendente.ENVIANDO,
+            proxima_tentativa=agora + timedelta(seconds=settings.EMAIL_FILA_RESERVA),
+        )
+    return list(EmailPendente.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def processar_fila(lote=None, connection=None):
+    """
+    Envia um lote de mensagens pendentes e retorna a quantidade enviada.
+
+    O lote é reservado em uma transação curta (`_reservar_lote`); o envio
+    acontece fora dela, com uma única conexão SMTP para todo o lote, e cada
+    mensagem é marcada como enviada (ou reagendada) logo após o seu envio.
+    Uma falha no meio do lote não desfaz as mensagens já enviadas.
+    """
+    lote = lote or settings.EMAIL_FILA_LOTE
+    pendentes = _reservar_lote(lote)
+    if not pendentes:
+        return 0
+
+    enviados = 0
+    connection = connection or get_connection()
+    try:
+        try:
+            connection.open()
+        except Exception as erro:
+            for email in pendentes:
+                _reagendar(email, erro)
+            return 0
+
+        for email in pendentes:
+            try:
+                connection.send_messages([_montar_mensagem(email, connection)])
+            except Exception as erro:
+                _reagendar(email, erro)
+                continue
+            email.status = EmailPendente.ENVIADO
+            email.enviado_em = timezone.now()
+            email.save(update_fields=['status', 'enviado_em'])
+            enviados += 1
+    finally:
+        connection.close()
+
+    logger.info("Fila de e-mail: %s de %s mensagens enviadas.", enviados, len(pendentes))
+    return enviados
+
+
+def metricas_fila():
+    """
+    Retorna profundidade e latência da fila de e-mails.
+
+    - `pendentes` / `falhas`: quantidade de mensagens em cada estado (as
+      reservadas por um worker contam como pendentes);
+    - `idade_mais_antiga`: segundos desde a criação do pendente mais antigo;
+    - `latencia_media`: média, em segundos, entre criação e envio das
+      mensagens enviadas na última hora.
+    """
+    agora = timezone.now()
+    pendentes = EmailPendente.objects.filter(status__in=[EmailPendente.PENDENTE, EmailPendente.ENVIANDO])
+    mais_antigo = pendentes.aggregate(criado=Min('criado_em'))['criado']
+    latencia = (
+        EmailPendente.objects
+        .filter(status=EmailPendente.ENVIADO, enviado_em__gte=agora - timedelta(hours=1))
+        .aggregate(media=Avg(F('enviado_em') - F('criado_em')))['media']
+    )
+
+    return {
+        'pendentes': pendentes.count(),
+        'falhas': EmailPendente.objects.filter(status=EmailPendente.FALHOU).count(),
+        'idade_mais_antiga': (agora - mais_antigo).total_seconds() if mais_antigo else 0.0,
+        'latencia_media': latencia.total_seconds() if latencia else 0.0,
+    }
+
+
+def enviar_em_lotes(mensagens, tamanho_lote=None, taxa_maxima=None, backend=None):
+    """
+    Envia um iterável de `EmailMessage` reaproveitando uma conexão por lote.
+
+    `mensagens` pode ser um gerador: apenas um lote fica em memória por vez.
+    `taxa_maxima` limita o envio a N mensagens por segundo (0/None = sem
+    limite). Retorna um dicionário com `enviados`, `falhas`, `segundos` e
+    `por_segundo`.
+    """
+    tamanho_lote = tamanho_lote or settings.EMAIL_FILA_LOTE
+    taxa_maxima = settings.EMAIL_TAXA_MAXIMA if taxa_maxima is None else taxa_maxima
+    intervalo = 1.0 / taxa_maxima if taxa_maxima else 0.0
+
+    mensagens = iter(mensagens)
+    enviados = falhas = 0
+    inicio = time.monotonic()
+
+    while lote := list(islice(mensagens, tamanho_lote)):
+        connection = get_connection(backend)
+        try:
+            try:
+                connection.open()
+            except Exception as erro:
+                # Servidor indisponível: o lote inteiro falha e o envio segue com o próximo
+                falhas += len(lote)
+                logger.warning("Falha ao abrir a conexão para um lote de %s mensagens: %s", len(lote), erro)
+                continue
+
+            for mensagem in lote:
+                mensagem.connection = connection
+                try:
+                    enviados += connection.send_messages([mensagem])
+                except Exception as erro:
+                    falhas += 1
+                    logger.warning("Falha no envio em massa para %s: %s", mensagem.to, erro)
+
+                # Respeita o limite de taxa em relação ao início do envio
+                if intervalo:
+                    atraso = inicio + (enviados + falhas) * intervalo - time.monotonic()
+                    if atraso > 0:
+                        time.sleep(atraso)
+        finally:
+            connection.close()
+
+    segundos = time.monotonic() - inicio
+    return {
+        'enviados': enviados,
+        'falhas': falhas,
+        'segundos': segundos,
+        'por_segundo': enviados / segundos if segundos else 0.0,
+    }
+
+
+def enviar_confirmacoes_em_massa(usuarios, dominio=None, **opcoes):
+    """
+    Reenvia o e-mail de confirmação para vários usuários de uma só vez.
+
+    Aceita qualquer iterável de `Usuario` (de preferência um
+    `QuerySet.iterator()`); as opções extras são repassadas para
+    `enviar_em_lotes`.
+    """
+    dominio = dominio or settings.SITE_DOMAIN
+
+    def gerar_mensagens():
+        for usuario in usuarios:
+            html, texto = renderizar_confirmacao(usuario, dominio)
+            yield criar_mensagem(ASSUNTO_CONFIRMACAO, html, [usuario.email], corpo_texto=texto)
+
+    resultado = enviar_em_lotes(gerar_mensagens(), **opcoes)
+    logger.info(
+        "Confirmações reenviadas: %s enviadas, %s falhas (%.1f msg/s).",
+        resultado['enviados'], resultado['falhas'], resultado['por_segundo'],
+    )
+    return resultado
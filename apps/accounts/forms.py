@@ -58,7 +58,7 @@ class RegistroUsuarioForm(UserCreationForm):
         Garante que os campos email e nome sejam devidamente atribuídos.
         """
         usuario = super().save(commit=False)
-        usuario.email = self.cleaned_data["email"]
+        usuario.email = Usuario.objects.normalize_email(self.cleaned_data["email"])
         usuario.nome = self.cleaned_data["nome"]
         if commit:
             usuario.save()
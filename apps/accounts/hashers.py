@@ -0,0 +1,74 @@
+"""
+Hashers de senha com custo configurável
+---------------------------------------
+Os parâmetros de custo vêm das configurações `PASSWORD_PBKDF2_*`,
+`PASSWORD_ARGON2_*` e `PASSWORD_SCRYPT_*` (calibradas com o comando
+`calibrar_hash`). O perfil ativo é o primeiro de `PASSWORD_HASHERS`; quando um
+hash armazenado usa outro algoritmo ou outros parâmetros, o Django o recalcula
+de forma transparente no próximo login bem-sucedido.
+
+`em_thread_de_hash` executa o cálculo de hashes das views assíncronas em um
+pool de threads dedicado e limitado (`PASSWORD_HASH_THREADS`): os algoritmos
+liberam o GIL, então os hashes rodam em paralelo sem ocupar o event loop nem
+a thread única usada pelo `sync_to_async`.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class PBKDF2Hasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERACOES
+
+
+class Argon2Hasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class ScryptHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    @property
+    def maxmem(self):
+        # O padrão do OpenSSL (32 MB) não comporta fatores de trabalho maiores
+        return 2 * 128 * self.work_factor * self.block_size * self.parallelism
+
+
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_THREADS, thread_name_prefix='hash-senha')
+
+
+async def em_thread_de_hash(funcao, *args, **kwargs):
+    """
+    Executa `funcao` (sem acesso ao banco) no pool de hashing.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(funcao, *args, **kwargs))
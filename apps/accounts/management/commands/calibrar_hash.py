@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.crypto import get_random_string
+
+from apps.accounts.hashers import Argon2Hasher, PBKDF2Hasher, ScryptHasher
+
+SENHA = 'senha-de-calibracao'
+
+
+def _medir(funcao, repeticoes=3):
+    """
+    Retorna o menor tempo, em milissegundos, entre as repetições.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return min(tempos)
+
+
+class Command(BaseCommand):
+    help = "Mede o custo do hash de senha nesta máquina e recomenda parâmetros para o tempo alvo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alvo-ms', type=float, default=250.0,
+                            help="Tempo alvo, em milissegundos, de um hash de senha.")
+
+    def handle(self, *args, **options):
+        alvo = options['alvo_ms']
+        salt = get_random_string(22)
+        self.stdout.write(f"Tempo alvo por hash: {alvo:.0f} ms\n")
+
+        # PBKDF2: o custo é linear no número de iterações
+        pbkdf2 = PBKDF2Hasher()
+        base = 100_000
+        tempo = _medir(lambda: pbkdf2.encode(SENHA, salt, base))
+        iteracoes = max(int(base * alvo / tempo) // 1000 * 1000, 1000)
+        tempo_final = _medir(lambda: pbkdf2.encode(SENHA, salt, iteracoes))
+        self._recomendar('pbkdf2', tempo_final, PASSWORD_PBKDF2_ITERACOES=iteracoes)
+
+        # scrypt: o fator de trabalho precisa ser potência de 2
+        scrypt = ScryptHasher()
+        fator = 2**10
+        while True:
+            tempo = _medir(lambda: self._scrypt(scrypt, salt, fator))
+            if tempo * 2 > alvo:
+                break
+            fator *= 2
+        self._recomendar('scrypt', tempo, PASSWORD_SCRYPT_WORK_FACTOR=fator)
+
+        # Argon2: mantém a memória e ajusta o número de passadas
+        argon2 = Argon2Hasher()
+        try:
+            argon2._load_library()
+        except ValueError:
+            self.stdout.write(self.style.WARNING("argon2: argon2-cffi não instalado, perfil ignorado."))
+            return
+        time_cost = 1
+        while True:
+            tempo = _medir(lambda: self._argon2(argon2, salt, time_cost))
+            if tempo * (time_cost + 1) / time_cost > alvo:
+                break
+            time_cost += 1
+        self._recomendar('argon2', tempo, PASSWORD_ARGON2_TIME_COST=time_cost)
+
+    def _scrypt(self, hasher, salt, fator):
+        return hashlib.scrypt(
+            SENHA.encode(), salt=salt.encode(), n=fator, r=hasher.block_size, p=hasher.parallelism,
+            maxmem=2 * 128 * fator * hasher.block_size * hasher.parallelism, dklen=64,
+        )
+
+    def _argon2(self, hasher, salt, time_cost):
+        argon2 = hasher._load_library()
+        return argon2.low_level.hash_secret(
+            SENHA.encode(), salt.encode(), time_cost=time_cost, memory_cost=hasher.memory_cost,
+            parallelism=hasher.parallelism, hash_len=argon2.DEFAULT_HASH_LENGTH, type=argon2.low_level.Type.ID,
+        )
+
+    def _recomendar(self, perfil, tempo, **parametros):
+        self.stdout.write(self.style.SUCCESS(f"{perfil}: {tempo:.0f} ms por hash"))
+        for nome, valor in parametros.items():
+            self.stdout.write(f"  {nome}={valor}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.tokens import limpar_tokens_consumidos
+
+
+class Command(BaseCommand):
+    help = ("Remove os registros de tokens de confirmação/redefinição já utilizados "
+            "e expirados (TokenConsumido), em lotes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000,
+                            help="Quantidade máxima de registros removidos por DELETE.")
+
+    def handle(self, *args, **options):
+        removidos = limpar_tokens_consumidos(options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"{removidos} token(s) expirado(s) removido(s)."))
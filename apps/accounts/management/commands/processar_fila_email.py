@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.accounts.emails import metricas_fila, processar_fila
+
+
+class Command(BaseCommand):
+    help = "Envia os e-mails pendentes da fila, reaproveitando uma conexão SMTP por lote."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=settings.EMAIL_FILA_LOTE,
+                            help="Quantidade máxima de mensagens por conexão SMTP.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Mantém o worker rodando, consultando a fila periodicamente.")
+        parser.add_argument('--intervalo', type=float, default=5.0,
+                            help="Segundos de espera entre consultas quando a fila está vazia.")
+        parser.add_argument('--metricas', action='store_true',
+                            help="Apenas exibe profundidade e latência da fila.")
+
+    def handle(self, *args, **options):
+        if options['metricas']:
+            for chave, valor in metricas_fila().items():
+                self.stdout.write(f"{chave}: {valor}")
+            return
+
+        while True:
+            enviados = processar_fila(lote=options['lote'])
+            if enviados:
+                self.stdout.write(self.style.SUCCESS(f"{enviados} e-mail(s) enviado(s)."))
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['intervalo'])
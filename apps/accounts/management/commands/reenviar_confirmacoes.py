@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.accounts.emails import enviar_confirmacoes_em_massa
+from apps.accounts.models import Usuario
+
+
+class Command(BaseCommand):
+    help = "Reenvia o e-mail de confirmação para os usuários ativos que ainda não confirmaram o e-mail."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=settings.EMAIL_FILA_LOTE,
+                            help="Quantidade de mensagens enviadas por conexão.")
+        parser.add_argument('--taxa', type=float, default=settings.EMAIL_TAXA_MAXIMA,
+                            help="Limite de mensagens por segundo (0 = sem limite).")
+        parser.add_argument('--dominio', default=settings.SITE_DOMAIN,
+                            help="Domínio usado no link de confirmação.")
+        parser.add_argument('--backend', default=None,
+                            help="Backend de e-mail a usar (padrão: EMAIL_BACKEND).")
+
+    def handle(self, *args, **options):
+        usuarios = (
+            Usuario.objects
+            .filter(email_confirmado_em__isnull=True, is_active=True)
+            .order_by('pk')
+            .iterator(chunk_size=options['lote'])
+        )
+
+        resultado = enviar_confirmacoes_em_massa(
+            usuarios,
+            dominio=options['dominio'],
+            tamanho_lote=options['lote'],
+            taxa_maxima=options['taxa'],
+            backend=options['backend'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['enviados']} enviados, {resultado['falhas']} falhas em "
+            f"{resultado['segundos']:.2f}s ({resultado['por_segundo']:.1f} msg/s)."
+        ))
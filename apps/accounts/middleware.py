@@ -0,0 +1,27 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .vinculos import lojas_do_usuario
+
+
+class LojasDoUsuarioMiddleware:
+    """
+    Disponibiliza `request.lojas`: os ids das lojas do usuário autenticado.
+
+    O valor só é calculado no primeiro acesso e fica memorizado até o fim da
+    requisição. Deve vir depois do `AuthenticationMiddleware`. Funciona nos
+    modos síncrono e assíncrono (nas views assíncronas, `request.lojas` deve
+    ser lido via `sync_to_async`).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.lojas = SimpleLazyObject(lambda: lojas_do_usuario(request.user))
+        return self.get_response(request)
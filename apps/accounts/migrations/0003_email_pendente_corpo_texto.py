@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_email_pendente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailpendente',
+            name='corpo_texto',
+            field=models.TextField(blank=True, verbose_name='Corpo em texto'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:03
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def normalizar_emails(apps, schema_editor):
+    """
+    Converte os e-mails existentes para minúsculas antes de criar o índice.
+
+    Se houver contas que diferem apenas em maiúsculas/minúsculas, aborta a
+    migração: elas precisam ser unificadas manualmente.
+    """
+    Usuario = apps.get_model('accounts', 'Usuario')
+    duplicados = list(
+        Usuario.objects
+        .values(email_lower=Lower('email'))
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('email_lower', flat=True)
+    )
+    if duplicados:
+        raise RuntimeError(
+            "E-mails duplicados (ignorando maiúsculas/minúsculas) precisam ser resolvidos "
+            f"antes desta migração: {', '.join(duplicados)}"
+        )
+    Usuario.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_email_pendente_corpo_texto'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usuario',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='usuario_email_lower_unique', violation_error_message='Já existe um usuário com este e-mail.'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_email_lower_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenConsumido',
+            fields=[
+                ('jti', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Identificador')),
+                ('finalidade', models.CharField(max_length=20, verbose_name='Finalidade')),
+                ('consumido_em', models.DateTimeField(auto_now_add=True, verbose_name='Consumido em')),
+                ('expira_em', models.DateTimeField(db_index=True, verbose_name='Expira em')),
+            ],
+            options={
+                'verbose_name': 'Token consumido',
+                'verbose_name_plural': 'Tokens consumidos',
+            },
+        ),
+    ]
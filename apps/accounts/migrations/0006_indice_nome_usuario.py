@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Índice para a busca pelo início do nome no admin (`nome__istartswith`):
+# - PostgreSQL: UPPER(nome::text) LIKE UPPER('termo%') usa text_pattern_ops;
+# - SQLite: LIKE 'termo%' (sem diferenciar maiúsculas) usa um índice NOCASE.
+POSTGRESQL = [
+    "CREATE INDEX IF NOT EXISTS accounts_usuario_nome_upper_idx "
+    "ON accounts_usuario (UPPER(nome::text) text_pattern_ops)",
+]
+SQLITE = [
+    "CREATE INDEX IF NOT EXISTS accounts_usuario_nome_nocase_idx ON accounts_usuario (nome COLLATE NOCASE)",
+]
+POSTGRESQL_REVERSO = ["DROP INDEX IF EXISTS accounts_usuario_nome_upper_idx"]
+SQLITE_REVERSO = ["DROP INDEX IF EXISTS accounts_usuario_nome_nocase_idx"]
+
+
+def _executar(comandos_por_banco):
+    def executar(apps, schema_editor):
+        for comando in comandos_por_banco.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(comando)
+    return executar
+
+
+class Migration(migrations.Migration):
+    """
+    Índice de busca pelo nome do usuário, específico de cada banco (ver
+    `apps.accounts.admin`).
+    """
+
+    dependencies = [
+        ('accounts', '0005_token_consumido'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _executar({'postgresql': POSTGRESQL, 'sqlite': SQLITE}),
+            _executar({'postgresql': POSTGRESQL_REVERSO, 'sqlite': SQLITE_REVERSO}),
+        ),
+    ]
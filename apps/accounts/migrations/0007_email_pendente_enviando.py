@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_indice_nome_usuario'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailpendente',
+            name='status',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=10, verbose_name='Status'),
+        ),
+    ]
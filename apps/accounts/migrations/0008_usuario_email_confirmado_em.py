@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:58
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def marcar_existentes_como_confirmados(apps, schema_editor):
+    # Até aqui a confirmação não era registrada (is_active já nascia True):
+    # os usuários existentes são tratados como confirmados, para que
+    # `reenviar_confirmacoes` não envie o e-mail para toda a base
+    Usuario = apps.get_model('accounts', 'Usuario')
+    Usuario.objects.update(email_confirmado_em=F('data_criacao'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_email_pendente_enviando'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='email_confirmado_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='E-mail confirmado em'),
+        ),
+        migrations.RunPython(marcar_existentes_como_confirmados, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,24 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from apps.lojas.models import Loja
+from apps.lojas.contexto import PorLojaManager
+
+# Permite `email__lower=...`, que usa o índice único em LOWER(email)
+models.EmailField.register_lookup(Lower)
 
 class UsuarioManager(BaseUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        Normaliza o e-mail inteiro para minúsculas (o Django só normaliza o domínio).
+        """
+        return super().normalize_email(email).lower()
+
+    def get_by_natural_key(self, username):
+        return self.get(email__lower=username.lower())
+
     def create_user(self, email, nome, password=None, **extra_fields):
         if not email:
             raise ValueError('O endereço de e-mail deve ser fornecido')
@@ -16,6 +32,7 @@ class UsuarioManager(BaseUserManager):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
         extra_fields.setdefault('is_active', True)
+        extra_fields.setdefault('email_confirmado_em', timezone.now())
         return self.create_user(email, nome, password, **extra_fields)
     
 class Usuario(AbstractBaseUser, PermissionsMixin):
@@ -26,22 +43,104 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
+    # Preenchido por `confirmar_email`; vazio = cadastro ainda não confirmado
+    email_confirmado_em = models.DateTimeField("E-mail confirmado em", blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['nome']
 
     objects = UsuarioManager()
 
+    class Meta:
+        constraints = [
+            # E-mails que diferem só em maiúsculas/minúsculas são o mesmo usuário
+            models.UniqueConstraint(
+                Lower('email'),
+                name='usuario_email_lower_unique',
+                violation_error_message='Já existe um usuário com este e-mail.',
+            ),
+        ]
+
     def __str__(self):
         return self.nome
 
+    def clean(self):
+        super().clean()
+        self.email = self.__class__.objects.normalize_email(self.email)
+
 class UsuarioLoja(models.Model):
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name="lojas")
     loja = models.ForeignKey(Loja, on_delete=models.CASCADE, related_name="usuarios")
     data_vinculo = models.DateTimeField(auto_now_add=True)
 
+    objects = models.Manager()
+    da_loja = PorLojaManager()  # Apenas os vínculos da loja ativa
+
     class Meta:
         unique_together = ("usuario", "loja")  # Garante que um usuário não se vincule mais de uma vez à mesma loja
 
     def __str__(self):
         return f"{self.usuario.nome} - {self.loja.nome_loja}"
+
+
+class EmailPendente(models.Model):
+    """
+    Mensagem de e-mail na fila de envio.
+
+    As views apenas gravam a mensagem aqui; o envio real é feito pelo worker
+    (`processar_fila_email`) fora do ciclo da requisição. Enquanto a mensagem
+    está reservada por um worker (`ENVIANDO`), `proxima_tentativa` guarda o
+    fim da reserva.
+    """
+    PENDENTE = 'pendente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    FALHOU = 'falhou'
+    STATUS_CHOICES = [
+        (PENDENTE, 'Pendente'),
+        (ENVIANDO, 'Enviando'),
+        (ENVIADO, 'Enviado'),
+        (FALHOU, 'Falhou'),
+    ]
+
+    assunto = models.CharField("Assunto", max_length=255)
+    corpo_html = models.TextField("Corpo HTML")
+    corpo_texto = models.TextField("Corpo em texto", blank=True)
+    remetente = models.CharField("Remetente", max_length=255)
+    destinatarios = models.JSONField("Destinatários", default=list)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default=PENDENTE)
+    tentativas = models.PositiveSmallIntegerField("Tentativas", default=0)
+    proxima_tentativa = models.DateTimeField("Próxima tentativa", default=timezone.now)
+    ultimo_erro = models.TextField("Último erro", blank=True)
+    criado_em = models.DateTimeField("Criado em", auto_now_add=True)
+    enviado_em = models.DateTimeField("Enviado em", blank=True, null=True)
+
+    class Meta:
+        verbose_name = "E-mail pendente"
+        verbose_name_plural = "E-mails pendentes"
+        indexes = [
+            # O worker sempre busca por status + horário da próxima tentativa
+            models.Index(fields=["status", "proxima_tentativa"], name="email_fila_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.assunto} -> {', '.join(self.destinatarios)}"
+
+
+class TokenConsumido(models.Model):
+    """
+    Token de confirmação de e-mail ou de redefinição de senha já utilizado
+    (apps.accounts.tokens). A chave primária impede o reuso do link; os
+    registros expirados são removidos por `limpar_tokens`.
+    """
+    jti = models.CharField("Identificador", max_length=32, primary_key=True)
+    finalidade = models.CharField("Finalidade", max_length=20)
+    consumido_em = models.DateTimeField("Consumido em", auto_now_add=True)
+    expira_em = models.DateTimeField("Expira em", db_index=True)
+
+    class Meta:
+        verbose_name = "Token consumido"
+        verbose_name_plural = "Tokens consumidos"
+
+    def __str__(self):
+        return f"{self.finalidade}: {self.jti}"
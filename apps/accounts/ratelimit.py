@@ -0,0 +1,157 @@
+"""
+Limite de tentativas de login
+-----------------------------
+Contadores de janela deslizante por e-mail e por IP, verificados antes de
+qualquer cálculo de hash de senha. Cada chave usa apenas dois contadores (a
+janela atual e a anterior), então verificar e registrar uma tentativa custa
+sempre o mesmo, independentemente do volume do ataque.
+
+O armazenamento é plugável via `LOGIN_RATELIMIT_BACKEND`; o padrão usa o cache
+do Django (`LOGIN_RATELIMIT_CACHE`).
+"""
+
+import hashlib
+import ipaddress
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class CacheRateLimitBackend:
+    """
+    Armazena os contadores de cada janela no cache do Django.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.LOGIN_RATELIMIT_CACHE]
+
+    def contadores(self, chaves):
+        """
+        Retorna `{chave: valor}` para as chaves informadas (ausentes = 0).
+        """
+        valores = self.cache.get_many(chaves)
+        return {chave: valores.get(chave, 0) for chave in chaves}
+
+    def incrementar(self, chave, timeout):
+        if not self.cache.add(chave, 1, timeout):
+            try:
+                self.cache.incr(chave)
+            except ValueError:
+                # A chave expirou entre o add e o incr
+                self.cache.add(chave, 1, timeout)
+
+    def limpar(self, chaves):
+        self.cache.delete_many(chaves)
+
+
+class JanelaDeslizante:
+    """
+    Contador de janela deslizante aproximado ("sliding window counter").
+
+    A contagem estimada é `anterior * (fração restante da janela anterior) +
+    atual`, o que suaviza a virada de janela sem guardar um registro por
+    tentativa.
+    """
+
+    def __init__(self, backend, limite, janela):
+        self.backend = backend
+        self.limite = limite
+        self.janela = janela
+
+    def _chaves(self, identificador, agora):
+        indice = int(agora // self.janela)
+        base = f"ratelimit:{identificador}"
+        return f"{base}:{indice}", f"{base}:{indice - 1}", (agora % self.janela) / self.janela
+
+    def excedido(self, identificador, agora=None):
+        agora = time.time() if agora is None else agora
+        atual, anterior, decorrido = self._chaves(identificador, agora)
+        valores = self.backend.contadores([atual, anterior])
+        estimado = valores[anterior] * (1 - decorrido) + valores[atual]
+        return estimado >= self.limite
+
+    def registrar(self, identificador, agora=None):
+        agora = time.time() if agora is None else agora
+        atual, _, _ = self._chaves(identificador, agora)
+        # Mantém a chave viva durante a janela seguinte, em que ainda é usada como "anterior"
+        self.backend.incrementar(atual, self.janela * 2)
+
+    def limpar(self, identificador, agora=None):
+        agora = time.time() if agora is None else agora
+        atual, anterior, _ = self._chaves(identificador, agora)
+        self.backend.limpar([atual, anterior])
+
+
+def _backend():
+    return import_string(settings.LOGIN_RATELIMIT_BACKEND)()
+
+
+def _id_email(email):
+    # Hash para manter a chave curta e sem caracteres inválidos para o cache
+    return "email:" + hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+@lru_cache(maxsize=8)
+def _redes_confiaveis(proxies):
+    return tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies if proxy.strip())
+
+
+def _confiavel(endereco, redes):
+    try:
+        ip = ipaddress.ip_address(endereco)
+    except ValueError:
+        return False
+    return any(ip in rede for rede in redes)
+
+
+def ip_do_cliente(request):
+    """
+    IP do cliente. Atrás de um proxy confiável (`RATELIMIT_PROXIES`), é o
+    endereço mais à direita de `RATELIMIT_CABECALHO_IP` que não pertence a
+    um proxy confiável: os anteriores podem ter sido forjados pelo cliente.
+    """
+    remoto = request.META.get('REMOTE_ADDR', '')
+    redes = _redes_confiaveis(tuple(settings.RATELIMIT_PROXIES))
+    if not redes or not _confiavel(remoto, redes):
+        return remoto
+
+    cabecalho = request.headers.get(settings.RATELIMIT_CABECALHO_IP, '')
+    for endereco in reversed([parte.strip() for parte in cabecalho.split(',') if parte.strip()]):
+        if not _confiavel(endereco, redes):
+            return endereco
+    return remoto
+
+
+def _id_ip(request):
+    return "ip:" + ip_do_cliente(request)
+
+
+def login_bloqueado(request, email):
+    """
+    Verifica se o e-mail ou o IP da requisição ultrapassaram o limite de
+    tentativas. Se não ultrapassaram, a tentativa é registrada.
+    """
+    backend = _backend()
+    janela = settings.LOGIN_RATELIMIT_JANELA
+    por_email = JanelaDeslizante(backend, settings.LOGIN_RATELIMIT_POR_EMAIL, janela)
+    por_ip = JanelaDeslizante(backend, settings.LOGIN_RATELIMIT_POR_IP, janela)
+
+    id_email, id_ip = _id_email(email), _id_ip(request)
+    if por_email.excedido(id_email) or por_ip.excedido(id_ip):
+        return True
+
+    por_email.registrar(id_email)
+    por_ip.registrar(id_ip)
+    return False
+
+
+def limpar_tentativas(email):
+    """
+    Zera o contador do e-mail após um login bem-sucedido.
+    """
+    JanelaDeslizante(_backend(), settings.LOGIN_RATELIMIT_POR_EMAIL, settings.LOGIN_RATELIMIT_JANELA).limpar(
+        _id_email(email)
+    )
@@ -0,0 +1,51 @@
+"""
+Serviços de cadastro
+--------------------
+Regras de negócio que envolvem mais de um modelo e precisam ser gravadas de
+forma atômica, fora das views.
+"""
+
+import logging
+
+from django.db import transaction
+
+from .emails import enfileirar_confirmacao
+from .models import UsuarioLoja
+from .vinculos import invalidar_lojas_dos_usuarios
+
+logger = logging.getLogger('usuarios')
+
+
+def vincular_usuario_a_loja(usuario, loja):
+    """
+    Vincula um usuário a uma loja com um único INSERT.
+
+    Usa `ON CONFLICT DO NOTHING` (via `ignore_conflicts`): se o vínculo já
+    existir, nada é gravado e não há corrida com outra requisição simultânea.
+    """
+    UsuarioLoja.objects.bulk_create([UsuarioLoja(usuario=usuario, loja=loja)], ignore_conflicts=True)
+    # bulk_create não dispara post_save. A invalidação espera o commit: feita
+    # antes, outra requisição poderia guardar de novo as lojas sem o vínculo
+    usuario_id = usuario.pk
+    transaction.on_commit(lambda: invalidar_lojas_dos_usuarios([usuario_id]))
+    logger.info("Usuário %s vinculado à loja %s.", usuario.email, loja.nome_loja)
+
+
+def registrar_usuario_e_loja(usuario, loja, dominio):
+    """
+    Grava o usuário e a loja, cria o vínculo entre eles e enfileira o e-mail
+    de confirmação em uma única transação.
+
+    Recebe as instâncias ainda não salvas (`form.save(commit=False)`), com a
+    senha já convertida em hash: assim o cálculo do hash fica fora da
+    transação (e, nas views assíncronas, fora da thread do ORM). São quatro
+    INSERTs (usuário, loja, vínculo e e-mail); se qualquer um falhar, nada é
+    gravado. Retorna `(usuario, loja)`.
+    """
+    with transaction.atomic():
+        usuario.save()
+        loja.save()
+        vincular_usuario_a_loja(usuario, loja)
+        enfileirar_confirmacao(usuario, dominio)
+
+    return usuario, loja
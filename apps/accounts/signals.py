@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidar_usuario
+from .models import Usuario, UsuarioLoja
+from .vinculos import invalidar_lojas_dos_usuarios
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_cache_usuario(sender, instance, using, **kwargs):
+    """
+    Descarta o usuário em cache sempre que ele é salvo (troca de senha,
+    desativação, `last_login` etc.) ou removido.
+
+    A invalidação espera o commit: feita antes, outra requisição poderia ler
+    a versão antiga do banco e colocá-la de volta no cache.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidar_usuario(user_id), using=using)
+
+
+@receiver([post_save, post_delete], sender=UsuarioLoja)
+def invalidar_cache_vinculos(sender, instance, using, **kwargs):
+    """
+    Descarta as lojas em cache do usuário quando um vínculo é criado,
+    alterado ou removido (inclusive em cascata, ao excluir a loja), após o
+    commit da transação.
+    """
+    usuario_id = instance.usuario_id
+    transaction.on_commit(lambda: invalidar_lojas_dos_usuarios([usuario_id]), using=using)
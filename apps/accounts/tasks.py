@@ -0,0 +1,19 @@
+"""
+Tasks assíncronas do app de contas.
+
+O Celery é opcional: só é necessário quando `EMAIL_FILA_TRANSPORTE = 'celery'`.
+No modo padrão (`'db'`) a fila é consumida pelo comando `processar_fila_email`.
+"""
+
+from celery import shared_task
+
+from .emails import processar_fila
+
+
+@shared_task(ignore_result=True)
+def processar_fila_email():
+    """
+    Consome a fila de e-mails até esvaziar os pendentes já vencidos.
+    """
+    while processar_fila():
+        pass
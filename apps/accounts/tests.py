@@ -1,3 +1,586 @@
-from django.test import TestCase
+import io
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, hashers
+from django.core.management import call_command
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as BackendLocmem
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from apps.lojas.models import Loja
+
+from . import urls as urls_contas
+from . import views_async
+from .backends import EmailBackend, _usuarios, invalidar_usuario
+from .emails import enfileirar_email, enviar_em_lotes, processar_fila
+from .models import EmailPendente, Usuario, UsuarioLoja
+from .ratelimit import ip_do_cliente
+from .services import registrar_usuario_e_loja, vincular_usuario_a_loja
+from .tokens import CONFIRMACAO, REDEFINICAO, consumir_token, gerar_token, ler_token, token_confere
+from .vinculos import lojas_do_usuario
+
+# URLs de `accounts` com as views assíncronas (CONTAS_VIEWS_ASYNC=True), para
+# os testes que usam `override_settings(ROOT_URLCONF=__name__)`
+_VIEWS_ASYNC = {'login', 'registrar', 'recuperar_senha'}
+urlpatterns = [
+    path('', include(([
+        path(str(rota.pattern), getattr(views_async, rota.callback.__name__), name=rota.name)
+        if rota.name in _VIEWS_ASYNC else rota
+        for rota in urls_contas.urlpatterns
+    ], 'accounts'))),
+]
+
+DADOS_REGISTRO = {
+    'nome': 'Maria', 'email': 'maria@exemplo.com', 'password1': 'Xy!12345abc', 'password2': 'Xy!12345abc',
+    'nome_loja': 'Padaria Central', 'cnpj': '11.222.333/0001-81', 'endereco': 'Rua A, 10', 'telefone': '3133334444',
+}
+
+# Hash rápido nos testes que não medem o custo do hash
+HASH_RAPIDO = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO)
+class RegistroServicoTests(TestCase):
+    def test_registro_em_uma_transacao_com_numero_fixo_de_consultas(self):
+        usuario = Usuario(email='maria@exemplo.com', nome='Maria')
+        usuario.set_password('Xy!12345abc')
+        loja = Loja(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua A, 10')
+
+        # SAVEPOINT, INSERT usuário, SELECT slug, INSERT loja, INSERT vínculo,
+        # INSERT e-mail, RELEASE SAVEPOINT
+        with self.assertNumQueries(7):
+            registrar_usuario_e_loja(usuario, loja, 'testserver')
+
+        self.assertTrue(UsuarioLoja.objects.filter(usuario=usuario, loja=loja).exists())
+        self.assertEqual(EmailPendente.objects.count(), 1)
+
+    def test_cache_de_vinculos_e_invalidado_apos_o_commit(self):
+        cache.clear()
+        usuario = Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+        loja = Loja.objects.create(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua A, 10')
+        self.assertEqual(lojas_do_usuario(usuario), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vincular_usuario_a_loja(usuario, loja)
+            with self.assertNumQueries(0):
+                self.assertEqual(lojas_do_usuario(usuario), frozenset())
+        self.assertEqual(lojas_do_usuario(usuario), {loja.pk})
+
+
+def _enfileirar(*destinatarios):
+    return [enfileirar_email('Assunto', '<p>Olá</p>', [destino]) for destino in destinatarios]
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_FILA_TRANSPORTE='db', EMAIL_FILA_MAX_TENTATIVAS=3, EMAIL_FILA_BACKOFF_BASE=30,
+)
+class FilaEmailTests(TestCase):
+    def test_envia_o_lote_e_marca_cada_mensagem(self):
+        _enfileirar('a@exemplo.com', 'b@exemplo.com')
+        self.assertEqual(processar_fila(), 2)
+        self.assertEqual([mensagem.to for mensagem in mail.outbox], [['a@exemplo.com'], ['b@exemplo.com']])
+        self.assertFalse(EmailPendente.objects.exclude(status=EmailPendente.ENVIADO).exists())
+        self.assertEqual(processar_fila(), 0)
+
+    def test_falha_de_uma_mensagem_nao_afeta_as_demais(self):
+        enviar = BackendLocmem.send_messages
+
+        def falhar_para_b(backend, mensagens):
+            if mensagens[0].to == ['b@exemplo.com']:
+                raise OSError('recusado')
+            return enviar(backend, mensagens)
+
+        a, b, c = _enfileirar('a@exemplo.com', 'b@exemplo.com', 'c@exemplo.com')
+        with mock.patch.object(BackendLocmem, 'send_messages', falhar_para_b):
+            self.assertEqual(processar_fila(), 2)
+
+        b.refresh_from_db()
+        self.assertEqual((b.status, b.tentativas, b.ultimo_erro), (EmailPendente.PENDENTE, 1, 'recusado'))
+        self.assertGreater(b.proxima_tentativa, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_falha_ao_abrir_a_conexao_reagenda_o_lote(self):
+        _enfileirar('a@exemplo.com', 'b@exemplo.com')
+        with mock.patch.object(BackendLocmem, 'open', side_effect=OSError('sem conexão')), \
+                mock.patch.object(BackendLocmem, 'close') as fechar:
+            self.assertEqual(processar_fila(), 0)
+        self.assertTrue(fechar.called)
+        self.assertEqual(
+            set(EmailPendente.objects.values_list('status', 'tentativas')), {(EmailPendente.PENDENTE, 1)},
+        )
+        self.assertEqual(mail.outbox, [])
+
+    def test_descarta_apos_o_maximo_de_tentativas(self):
+        email, = _enfileirar('a@exemplo.com')
+        EmailPendente.objects.filter(pk=email.pk).update(tentativas=2)
+        with mock.patch.object(BackendLocmem, 'send_messages', side_effect=OSError('recusado')):
+            processar_fila()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tentativas), (EmailPendente.FALHOU, 3))
+
+    def test_mensagens_reservadas_por_outro_worker_sao_ignoradas(self):
+        reservada, vencida = _enfileirar('a@exemplo.com', 'b@exemplo.com')
+        agora = timezone.now()
+        EmailPendente.objects.filter(pk=reservada.pk).update(
+            status=EmailPendente.ENVIANDO, proxima_tentativa=agora + timedelta(minutes=5),
+        )
+        # Reserva vencida: o worker anterior foi interrompido
+        EmailPendente.objects.filter(pk=vencida.pk).update(
+            status=EmailPendente.ENVIANDO, proxima_tentativa=agora - timedelta(seconds=1),
+        )
+
+        self.assertEqual(processar_fila(), 1)
+        self.assertEqual([mensagem.to for mensagem in mail.outbox], [['b@exemplo.com']])
+        reservada.refresh_from_db()
+        self.assertEqual(reservada.status, EmailPendente.ENVIANDO)
+        vencida.refresh_from_db()
+        self.assertEqual(vencida.tentativas, 1)  # A reserva vencida conta como tentativa
+
+    @override_settings(EMAIL_FILA_MAX_TENTATIVAS=3)
+    def test_reserva_vencida_na_ultima_tentativa_marca_falha(self):
+        penultima, ultima = _enfileirar('a@exemplo.com', 'b@exemplo.com')
+        vencida = timezone.now() - timedelta(seconds=1)
+        EmailPendente.objects.filter(pk=penultima.pk).update(
+            status=EmailPendente.ENVIANDO, proxima_tentativa=vencida, tentativas=1,
+        )
+        EmailPendente.objects.filter(pk=ultima.pk).update(
+            status=EmailPendente.ENVIANDO, proxima_tentativa=vencida, tentativas=2,
+        )
+
+        with self.assertLogs('usuarios', 'ERROR'):
+            self.assertEqual(processar_fila(), 1)
+        self.assertEqual([mensagem.to for mensagem in mail.outbox], [['a@exemplo.com']])
+        ultima.refresh_from_db()
+        self.assertEqual((ultima.status, ultima.tentativas), (EmailPendente.FALHOU, 3))
+        self.assertIn('Reserva vencida', ultima.ultimo_erro)
+        self.assertEqual(processar_fila(), 0)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EnvioEmLotesTests(TestCase):
+    def _mensagens(self, total):
+        return (
+            mail.EmailMessage('Assunto', 'Corpo', 'loja@exemplo.com', [f'usuario{numero}@exemplo.com'])
+            for numero in range(total)
+        )
+
+    def test_falha_ao_abrir_a_conexao_conta_o_lote_e_segue_para_o_proximo(self):
+        abrir = BackendLocmem.open
+        aberturas = []
+
+        def falhar_na_primeira(backend):
+            aberturas.append(backend)
+            if len(aberturas) == 1:
+                raise OSError('sem conexão')
+            return abrir(backend)
+
+        with mock.patch.object(BackendLocmem, 'open', falhar_na_primeira), \
+                mock.patch.object(BackendLocmem, 'close') as fechar:
+            resultado = enviar_em_lotes(self._mensagens(5), tamanho_lote=2, taxa_maxima=0)
+
+        self.assertEqual((resultado['enviados'], resultado['falhas']), (3, 2))
+        self.assertEqual(len(mail.outbox), 3)
+        # A conexão é fechada mesmo quando a abertura falha
+        self.assertEqual(fechar.call_count, 3)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', EMAIL_FILA_TRANSPORTE='db')
+class FilaEmailTransacaoTests(TransactionTestCase):
+    def test_envio_acontece_fora_da_transacao_de_reserva(self):
+        enviar = BackendLocmem.send_messages
+        estados = []
+
+        def registrar_estado(backend, mensagens):
+            # Cada envio vê a reserva e os envios anteriores já gravados
+            estados.append((
+                transaction.get_connection().in_atomic_block,
+                sorted(EmailPendente.objects.values_list('status', flat=True)),
+            ))
+            return enviar(backend, mensagens)
+
+        _enfileirar('a@exemplo.com', 'b@exemplo.com')
+        with mock.patch.object(BackendLocmem, 'send_messages', registrar_estado):
+            self.assertEqual(processar_fila(), 2)
+
+        self.assertEqual(estados, [
+            (False, [EmailPendente.ENVIANDO, EmailPendente.ENVIANDO]),
+            (False, [EmailPendente.ENVIADO, EmailPendente.ENVIANDO]),
+        ])
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO, USUARIO_CACHE_ALIAS='')
+class EmailBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+
+    def setUp(self):
+        _usuarios.clear()
+
+    def test_login_com_uma_consulta_sem_diferenciar_maiusculas(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(username='MARIA@Exemplo.com', password='Xy!12345abc'), self.usuario)
+
+    def test_email_inexistente_com_uma_consulta(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(username='outra@exemplo.com', password='Xy!12345abc'))
+
+    def test_get_user_consulta_o_banco_apenas_uma_vez(self):
+        backend = EmailBackend()
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_user(self.usuario.pk), self.usuario)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.usuario.pk), self.usuario)
+
+    def test_alteracao_invalida_o_cache_apenas_apos_o_commit(self):
+        backend = EmailBackend()
+        backend.get_user(self.usuario.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Usuario.objects.get(pk=self.usuario.pk).save()
+            with self.assertNumQueries(0):
+                backend.get_user(self.usuario.pk)
+        with self.assertNumQueries(1):
+            backend.get_user(self.usuario.pk)
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO, USUARIO_CACHE_ALIAS='default')
+class EmailBackendCacheCompartilhadoTests(TestCase):
+    """
+    Com cache compartilhado, o LRU local de cada processo segue o carimbo de
+    versão gravado nele.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+
+    def setUp(self):
+        _usuarios.clear()
+        cache.clear()
+
+    def test_lru_local_evita_o_banco(self):
+        backend = EmailBackend()
+        with self.assertNumQueries(1):
+            backend.get_user(self.usuario.pk)
+        with self.assertNumQueries(0):
+            backend.get_user(self.usuario.pk)
+
+    def test_invalidacao_de_outro_processo_descarta_a_copia_local(self):
+        backend = EmailBackend()
+        backend.get_user(self.usuario.pk)
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+
+        # Outro processo invalida: o LRU deste processo continua com o usuário
+        with mock.patch.object(_usuarios, 'delete'):
+            invalidar_usuario(self.usuario.pk)
+        self.assertIsNotNone(_usuarios.get(f'usuario:{self.usuario.pk}'))
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(backend.get_user(self.usuario.pk))
+
+    def test_carimbo_descartado_pelo_cache_descarta_a_copia_local(self):
+        backend = EmailBackend()
+        backend.get_user(self.usuario.pk)
+        cache.clear()
+        with self.assertNumQueries(1):
+            backend.get_user(self.usuario.pk)
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO)
+class AdminChangelistTests(TestCase):
+    """
+    O número de consultas de cada changelist não depende da quantidade de
+    linhas exibidas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser('admin@exemplo.com', 'Admin', password='x')
+
+    def setUp(self):
+        _usuarios.clear()
+        self.client.force_login(self.admin)
+
+    def _criar(self, inicio, total):
+        for numero in range(inicio, inicio + total):
+            usuario = Usuario.objects.create(email=f'usuario{numero}@exemplo.com', nome=f'Usuário {numero}')
+            loja = Loja.objects.create(nome_loja=f'Loja {numero}', cnpj=f'{numero:014d}', endereco='Rua A')
+            UsuarioLoja.objects.create(usuario=usuario, loja=loja)
+
+    def _consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(consultas)
+
+    def test_consultas_constantes_por_pagina(self):
+        urls = [
+            '/admin/accounts/usuarioloja/',
+            '/admin/accounts/usuarioloja/?q=Usu',
+            '/admin/accounts/usuarioloja/?q=usuario1@exemplo.com',
+            '/admin/accounts/usuario/?q=Usu',
+            '/admin/lojas/loja/',
+            '/admin/lojas/loja/?q=Loja',
+        ]
+        self._criar(1, 2)
+        self.client.get(urls[0])  # Aquece o cache do usuário (get_user)
+        esperado = {url: self._consultas(url) for url in urls}
+        self._criar(3, 40)
+        for url in urls:
+            with self.subTest(url=url), self.assertNumQueries(esperado[url]):
+                self.client.get(url)
+
+    def test_busca_por_nome_usa_indice(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Plano verificado apenas no SQLite.")
+        sql, parametros = Usuario.objects.filter(nome__istartswith='Usu').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros)
+            plano = ' '.join(str(linha[-1]) for linha in cursor.fetchall())
+        self.assertIn('accounts_usuario_nome_nocase_idx', plano)
+
+
+class IpDoClienteTests(TestCase):
+    def _ip(self, remoto, encaminhado=None):
+        cabecalhos = {'HTTP_X_FORWARDED_FOR': encaminhado} if encaminhado else {}
+        return ip_do_cliente(RequestFactory().get('/', REMOTE_ADDR=remoto, **cabecalhos))
+
+    @override_settings(RATELIMIT_PROXIES=[])
+    def test_sem_proxies_usa_remote_addr(self):
+        self.assertEqual(self._ip('10.0.0.1', '1.1.1.1'), '10.0.0.1')
+
+    @override_settings(RATELIMIT_PROXIES=['10.0.0.0/8'])
+    def test_atras_de_proxy_confiavel_usa_o_cabecalho(self):
+        self.assertEqual(self._ip('10.0.0.1', '1.1.1.1'), '1.1.1.1')
+        # Endereços forjados pelo cliente ficam à esquerda e são ignorados
+        self.assertEqual(self._ip('10.0.0.1', '6.6.6.6, 1.1.1.1, 10.0.0.2'), '1.1.1.1')
+        self.assertEqual(self._ip('10.0.0.1'), '10.0.0.1')
+
+    @override_settings(RATELIMIT_PROXIES=['10.0.0.0/8'])
+    def test_cabecalho_de_origem_nao_confiavel_e_ignorado(self):
+        self.assertEqual(self._ip('8.8.8.8', '1.1.1.1'), '8.8.8.8')
+
+
+class LimiteDeTentativasTests(TestCase):
+    """
+    Com o limite atingido, as tentativas são rejeitadas antes de qualquer
+    cálculo de hash: o custo por tentativa bloqueada é baixo e constante.
+    Usa o hasher configurado (PBKDF2 com o custo de produção).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+
+    def setUp(self):
+        cache.clear()
+
+    def _tentar(self, email='maria@exemplo.com', ip='1.1.1.1'):
+        return self.client.post('/login/', {'email': email, 'senha': 'errada'}, REMOTE_ADDR=ip)
+
+    def _tempo_por_tentativa(self, tentativas, **kwargs):
+        inicio = time.process_time()
+        for _ in range(tentativas):
+            self.assertEqual(self._tentar(**kwargs).status_code, 429)
+        return (time.process_time() - inicio) / tentativas
+
+    @override_settings(LOGIN_RATELIMIT_POR_EMAIL=3, LOGIN_RATELIMIT_POR_IP=1000)
+    def test_tentativas_bloqueadas_nao_calculam_hash(self):
+        for _ in range(3):
+            self.assertEqual(self._tentar().status_code, 200)
+
+        with mock.patch.object(hashers, 'pbkdf2', wraps=hashers.pbkdf2) as pbkdf2:
+            self.assertEqual(self._tentar().status_code, 429)
+            self.assertFalse(pbkdf2.called)
+
+        inicio = time.process_time()
+        hashers.make_password('Xy!12345abc')
+        custo_hash = time.process_time() - inicio
+
+        # Ataque simulado: o custo por tentativa não cresce com o volume
+        custo_inicial = self._tempo_por_tentativa(20)
+        custo_sob_ataque = self._tempo_por_tentativa(200)
+        self.assertLess(custo_sob_ataque, custo_hash / 10)
+        self.assertLess(custo_sob_ataque, custo_inicial * 3)
+
+    @override_settings(LOGIN_RATELIMIT_POR_EMAIL=1000, LOGIN_RATELIMIT_POR_IP=3)
+    def test_limite_por_ip_vale_para_qualquer_email(self):
+        for numero in range(3):
+            self.assertEqual(self._tentar(email=f'outro{numero}@exemplo.com').status_code, 200)
+        self.assertEqual(self._tentar(email='maria@exemplo.com').status_code, 429)
+        self.assertEqual(self._tentar(email='maria@exemplo.com', ip='2.2.2.2').status_code, 200)
+
+    @override_settings(LOGIN_RATELIMIT_POR_EMAIL=1000, LOGIN_RATELIMIT_POR_IP=3, RATELIMIT_PROXIES=['10.0.0.1'])
+    def test_clientes_atras_do_proxy_tem_limites_separados(self):
+        for _ in range(3):
+            self.client.post('/login/', {'email': 'x@exemplo.com', 'senha': 'errada'},
+                             REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1')
+        bloqueado = self.client.post('/login/', {'email': 'x@exemplo.com', 'senha': 'errada'},
+                                     REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1')
+        outro_cliente = self.client.post('/login/', {'email': 'x@exemplo.com', 'senha': 'errada'},
+                                         REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='2.2.2.2')
+        self.assertEqual((bloqueado.status_code, outro_cliente.status_code), (429, 200))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class RegistrarAsyncTests(TestCase):
+    async def test_registro_valido_grava_usuario_e_loja(self):
+        resposta = await self.async_client.post('/registrar/', DADOS_REGISTRO)
+        self.assertEqual(resposta.status_code, 302)
+        self.assertTrue(await Usuario.objects.filter(email='maria@exemplo.com').aexists())
+        self.assertTrue(await Loja.objects.filter(cnpj='11222333000181').aexists())
+
+    async def test_senhas_diferentes_reexibe_formulario(self):
+        resposta = await self.async_client.post('/registrar/', {**DADOS_REGISTRO, 'password2': 'Outra!12345'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(await Loja.objects.aexists())
+
+    async def test_email_duplicado_reexibe_formulario(self):
+        await Usuario.objects.acreate(email='maria@exemplo.com', nome='Maria')
+        resposta = await self.async_client.post('/registrar/', DADOS_REGISTRO)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(await Loja.objects.aexists())
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO, EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class ConfirmacaoEmailTests(TestCase):
+    def _confirmar(self, usuario):
+        return self.client.get(reverse('accounts:confirmar_email', args=gerar_token(usuario, CONFIRMACAO)))
+
+    def test_confirmacao_registra_a_data_sem_reativar_contas(self):
+        pendente = Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+        desativado = Usuario.objects.create_user('joao@exemplo.com', 'João', password='Xy!12345abc', is_active=False)
+
+        self._confirmar(pendente)
+        self._confirmar(desativado)
+
+        pendente.refresh_from_db()
+        desativado.refresh_from_db()
+        self.assertIsNotNone(pendente.email_confirmado_em)
+        self.assertIsNotNone(desativado.email_confirmado_em)
+        self.assertFalse(desativado.is_active)
+
+    def test_reenvio_apenas_para_ativos_nao_confirmados(self):
+        Usuario.objects.create_user('maria@exemplo.com', 'Maria')
+        Usuario.objects.create_user('joao@exemplo.com', 'João', is_active=False)
+        Usuario.objects.create_user('ana@exemplo.com', 'Ana', email_confirmado_em=timezone.now())
+
+        call_command('reenviar_confirmacoes', taxa=0, stdout=io.StringIO())
+
+        self.assertEqual([mensagem.to for mensagem in mail.outbox], [['maria@exemplo.com']])
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO)
+class TokensTests(TestCase):
+    """
+    Tokens inválidos são rejeitados sem consultar o banco; os válidos valem
+    uma única vez e apenas enquanto a senha e o e-mail não mudarem.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+        cls.outro = Usuario.objects.create_user('joao@exemplo.com', 'João', password='Xy!12345abc')
+
+    def setUp(self):
+        cache.clear()
+
+    def _rejeitado_sem_consultas(self, uidb64, token, finalidade=REDEFINICAO):
+        with self.assertNumQueries(0):
+            self.assertIsNone(ler_token(uidb64, token, finalidade))
+
+    def test_token_valido(self):
+        uidb64, token = gerar_token(self.usuario, REDEFINICAO)
+        lido = ler_token(uidb64, token, REDEFINICAO)
+        self.assertEqual(lido.uid, self.usuario.pk)
+        self.assertTrue(token_confere(self.usuario, lido))
+
+    def test_token_malformado(self):
+        uidb64, _ = gerar_token(self.usuario, REDEFINICAO)
+        self._rejeitado_sem_consultas(uidb64, 'nao-e-um-token')
+        self._rejeitado_sem_consultas(uidb64, '')
+
+    def test_token_adulterado(self):
+        uidb64, token = gerar_token(self.usuario, REDEFINICAO)
+        valor, assinatura = token.rsplit(':', 1)
+        self._rejeitado_sem_consultas(uidb64, f"{valor}:{assinatura[::-1]}")
+        self._rejeitado_sem_consultas(uidb64, f"{valor[::-1]}:{assinatura}")
+
+    def test_token_de_outra_finalidade(self):
+        uidb64, token = gerar_token(self.usuario, CONFIRMACAO)
+        self._rejeitado_sem_consultas(uidb64, token, REDEFINICAO)
+
+    @override_settings(PASSWORD_RESET_TIMEOUT=60)
+    def test_token_expirado(self):
+        with mock.patch('django.core.signing.time.time', return_value=time.time() - 120):
+            uidb64, token = gerar_token(self.usuario, REDEFINICAO)
+        self._rejeitado_sem_consultas(uidb64, token)
+
+    def test_uid_do_link_diferente_do_token(self):
+        _, token = gerar_token(self.usuario, REDEFINICAO)
+        uidb64_outro, _ = gerar_token(self.outro, REDEFINICAO)
+        self._rejeitado_sem_consultas(uidb64_outro, token)
+
+    def test_reuso_rejeitado_mesmo_com_o_cache_vazio(self):
+        uidb64, token = gerar_token(self.usuario, REDEFINICAO)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(consumir_token(ler_token(uidb64, token, REDEFINICAO)))
+        self._rejeitado_sem_consultas(uidb64, token)
+
+        # Sem o cache, a chave primária de TokenConsumido impede o reuso
+        cache.clear()
+        lido = ler_token(uidb64, token, REDEFINICAO)
+        self.assertIsNotNone(lido)
+        self.assertFalse(consumir_token(lido))
+
+    def test_troca_de_senha_invalida_links_pendentes(self):
+        uidb64, token = gerar_token(self.usuario, REDEFINICAO)
+        self.usuario.set_password('Outra!12345')
+        self.usuario.save()
+        self.assertFalse(token_confere(self.usuario, ler_token(uidb64, token, REDEFINICAO)))
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO)
+class RedefinirSenhaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('maria@exemplo.com', 'Maria', password='Xy!12345abc')
+
+    def setUp(self):
+        cache.clear()
+
+    def _redefinir(self, url, senha):
+        return self.client.post(url, {'nova_senha': senha, 'confirmar_senha': senha})
+
+    def test_link_vale_uma_unica_vez(self):
+        url = reverse('accounts:redefinir_senha', args=gerar_token(self.usuario, REDEFINICAO))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertRedirects(self._redefinir(url, 'Nova!12345abc'), reverse('accounts:login'),
+                                 fetch_redirect_response=False)
+        self.usuario.refresh_from_db()
+        self.assertTrue(self.usuario.check_password('Nova!12345abc'))
+
+        for limpar_cache in (False, True):
+            if limpar_cache:
+                cache.clear()
+            self._redefinir(url, 'Outra!12345abc')
+            self.usuario.refresh_from_db()
+            self.assertTrue(self.usuario.check_password('Nova!12345abc'))
+
+    def test_link_pendente_deixa_de_valer_apos_troca_de_senha(self):
+        url = reverse('accounts:redefinir_senha', args=gerar_token(self.usuario, REDEFINICAO))
+        self.usuario.set_password('Trocada!12345')
+        self.usuario.save()
+
+        resposta = self.client.get(url)
+        self.assertRedirects(resposta, reverse('accounts:login'), fetch_redirect_response=False)
+        self._redefinir(url, 'Nova!12345abc')
+        self.usuario.refresh_from_db()
+        self.assertTrue(self.usuario.check_password('Trocada!12345'))
@@ -0,0 +1,133 @@
+"""
+Tokens de confirmação de e-mail e de redefinição de senha
+---------------------------------------------------------
+O link leva o id do usuário em base64 (`uidb64`) e um token assinado com a
+SECRET_KEY (`django.core.signing`) contendo o id, um identificador único
+(`jti`), o momento da emissão e um resumo do estado do usuário (e-mail e hash
+da senha).
+
+`ler_token` rejeita tokens malformados, adulterados, expirados, de outra
+finalidade ou já utilizados (cache) sem consultar o banco; só os tokens
+válidos levam à busca do usuário. `consumir_token` grava o `jti` em
+`TokenConsumido` (a chave primária garante o uso único mesmo com o cache
+vazio) e no cache, impedindo que o link seja reutilizado.
+"""
+
+import logging
+import secrets
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import TokenConsumido
+
+logger = logging.getLogger('usuarios')
+
+CONFIRMACAO = 'confirmacao'
+REDEFINICAO = 'redefinicao'
+
+_SAL = 'apps.accounts.tokens'
+
+
+class TokenLido(NamedTuple):
+    uid: int
+    jti: str
+    estado: str
+    finalidade: str
+
+
+def _validade(finalidade):
+    if finalidade == CONFIRMACAO:
+        return settings.TOKEN_CONFIRMACAO_VALIDADE
+    return settings.PASSWORD_RESET_TIMEOUT
+
+
+def _estado(usuario, finalidade):
+    # Muda quando a senha ou o e-mail mudam, invalidando os links anteriores
+    return salted_hmac(f'{_SAL}.{finalidade}', f'{usuario.password}{usuario.email}').hexdigest()[:20]
+
+
+def _chave_cache(jti):
+    return f'token_consumido:{jti}'
+
+
+def gerar_token(usuario, finalidade):
+    """
+    Retorna `(uidb64, token)` para montar o link de `finalidade`
+    (`CONFIRMACAO` ou `REDEFINICAO`).
+    """
+    uidb64 = urlsafe_base64_encode(force_bytes(usuario.pk))
+    dados = [usuario.pk, secrets.token_urlsafe(12), _estado(usuario, finalidade)]
+    return uidb64, signing.dumps(dados, salt=f'{_SAL}.{finalidade}')
+
+
+def ler_token(uidb64, token, finalidade):
+    """
+    Valida o token sem acessar o banco. Retorna um `TokenLido` ou None se o
+    token for inválido, estiver expirado ou já tiver sido usado.
+    """
+    try:
+        uid, jti, estado = signing.loads(token, salt=f'{_SAL}.{finalidade}', max_age=_validade(finalidade))
+    except signing.SignatureExpired:
+        logger.warning("Token de %s expirado.", finalidade)
+        return None
+    except (signing.BadSignature, TypeError, ValueError):
+        logger.warning("Token de %s inválido.", finalidade)
+        return None
+
+    if not constant_time_compare(uidb64, urlsafe_base64_encode(force_bytes(uid))):
+        logger.warning("Token de %s não corresponde ao usuário do link.", finalidade)
+        return None
+    if caches[settings.TOKEN_CACHE_ALIAS].get(_chave_cache(jti)):
+        logger.warning("Token de %s já utilizado.", finalidade)
+        return None
+    return TokenLido(uid, jti, estado, finalidade)
+
+
+def token_confere(usuario, lido):
+    """
+    Confere se o token foi emitido para o estado atual do usuário (a senha e
+    o e-mail não mudaram desde a emissão).
+    """
+    return constant_time_compare(lido.estado, _estado(usuario, lido.finalidade))
+
+
+def consumir_token(lido):
+    """
+    Marca o token como utilizado. Retorna False se ele já tinha sido usado.
+    Deve ser chamado na mesma transação da alteração feita pelo link.
+    """
+    # O token expira no máximo `validade` segundos após agora; depois disso o
+    # registro é dispensável (`limpar_tokens_consumidos`)
+    validade = _validade(lido.finalidade)
+    expira_em = timezone.now() + timedelta(seconds=validade)
+    try:
+        with transaction.atomic():
+            TokenConsumido.objects.create(jti=lido.jti, finalidade=lido.finalidade, expira_em=expira_em)
+    except IntegrityError:
+        logger.warning("Token de %s já utilizado.", lido.finalidade)
+        return False
+
+    transaction.on_commit(lambda: caches[settings.TOKEN_CACHE_ALIAS].set(_chave_cache(lido.jti), True, validade))
+    return True
+
+
+def limpar_tokens_consumidos(lote=1000):
+    """
+    Remove os registros de tokens já expirados (que `ler_token` rejeitaria de
+    qualquer forma). Retorna a quantidade removida.
+    """
+    expirados = TokenConsumido.objects.filter(expira_em__lt=timezone.now()).values_list('jti', flat=True)
+    removidos = 0
+    while jtis := list(expirados[:lote]):
+        removidos += TokenConsumido.objects.filter(jti__in=jtis).delete()[0]
+    return removidos
+
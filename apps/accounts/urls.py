@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, views_async
+
+# Login, registro e recuperação de senha assíncronos (para o deploy via ASGI)
+_views_auth = views_async if settings.CONTAS_VIEWS_ASYNC else views
 
 app_name = 'accounts'
 
 urlpatterns = [
-    path('login/', views.logar, name='login'),
-    path('registrar/', views.registrar, name='registrar'),
-    path('recuperar-senha/', views.recuperar_senha, name='recuperar_senha'),
+    path('login/', _views_auth.logar, name='login'),
+    path('registrar/', _views_auth.registrar, name='registrar'),
+    path('recuperar-senha/', _views_auth.recuperar_senha, name='recuperar_senha'),
     path('resetar-senha/<uidb64>/<token>/', views.redefinir_senha, name='redefinir_senha'),
     path('logout/', views.deslogar, name='logout'),  # Nova URL para logout
     path('confirmar-email/<uidb64>/<token>/', views.confirmar_email, name='confirmar_email'),  # Nova URL para confirmação de e-mail
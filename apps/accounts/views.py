@@ -1,15 +1,16 @@
-from gzip import READ
 import logging
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from .forms import RegistroUsuarioForm, LoginForm, EsqueciSenhaForm, NovaSenhaForm
 from apps.lojas.forms import RegistroLojaForm
-from .models import Usuario, UsuarioLoja
-from django.conf import settings
+from .models import Usuario
+from .emails import ASSUNTO_REDEFINICAO, enfileirar_email, renderizar_redefinicao, url_redefinicao
+from .ratelimit import limpar_tentativas, login_bloqueado
+from .services import registrar_usuario_e_loja
+from .tokens import CONFIRMACAO, REDEFINICAO, consumir_token, ler_token, token_confere
 from django.contrib import messages
 
 # Configuração do logger
@@ -28,13 +29,21 @@ def logar(request):
         if form.is_valid():
             email = form.cleaned_data["email"]
             senha = form.cleaned_data["senha"]
+
+            # Rejeita antes de calcular qualquer hash de senha
+            if login_bloqueado(request, email):
+                logger.warning("Login bloqueado por excesso de tentativas para %s.", email)
+                form.add_error("email", "Muitas tentativas de login. Aguarde alguns minutos e tente novamente.")
+                return render(request, template_name=TEMPLATE_NAME, context={"form": form}, status=429)
+
             usuario = authenticate(request, username=email, password=senha)
             if usuario is not None:
+                limpar_tentativas(email)
                 login(request, usuario)
-                logger.info(f"Usuário {email} logado com sucesso.")
+                logger.info("Usuário %s logado com sucesso.", email)
                 return redirect("dashboard:index")
             else:
-                logger.warning(f"Tentativa de login falha para {email}.")
+                logger.warning("Tentativa de login falha para %s.", email)
                 form.add_error("email", "Email ou senha incorretos.")
                 form.add_error("senha", "")
     else:
@@ -52,18 +61,18 @@ def registrar(request):
         form_loja = RegistroLojaForm(request.POST)
 
         if form_usuario.is_valid() and form_loja.is_valid():
-            # Cria o usuário e a loja
-            usuario = form_usuario.save()
-            loja = form_loja.save()
-
-            # Vincula o usuário à loja
-            vincular_usuario_a_loja(usuario, loja)
-
-            # Envia o e-mail de confirmação
-            enviar_email_confirmacao(usuario, request)
-
-            logger.info(f"Novo usuário registrado: {usuario.email}, Loja: {loja.nome_loja}")
-            return redirect('accounts:login')
+            try:
+                # Cria usuário, loja e vínculo e enfileira o e-mail de confirmação
+                usuario, loja = registrar_usuario_e_loja(
+                    form_usuario.save(commit=False), form_loja.save(commit=False), get_current_site(request).domain
+                )
+            except IntegrityError:
+                # Outra requisição gravou o mesmo e-mail ou CNPJ entre a validação e o INSERT
+                messages.error(request, 'ERRO USUARIO JA EXISTE', extra_tags='error')
+                logger.warning("Falha ao registrar usuário. E-mail ou CNPJ já cadastrado.")
+            else:
+                logger.info("Novo usuário registrado: %s, Loja: %s", usuario.email, loja.nome_loja)
+                return redirect('accounts:login')
         else:
             messages.error(request, 'ERRO USUARIO JA EXISTE', extra_tags='error')
             logger.warning("Falha ao registrar usuário. Dados inválidos.")
@@ -74,64 +83,34 @@ def registrar(request):
     return render(request, template_name=TEMPLATE_NAME, context={'form': form_usuario, 'loja_form': form_loja})
 
 
-
-
-def vincular_usuario_a_loja(usuario, loja):
-    """
-    Função para vincular um usuário a uma loja. Cria uma relação de 1:1 entre eles.
+def confirmar_email(request, uidb64, token):
     """
-    if not UsuarioLoja.objects.filter(usuario=usuario, loja=loja).exists():
-        UsuarioLoja.objects.create(usuario=usuario, loja=loja)
-        logger.info(f"Usuário {usuario.email} vinculado à loja {loja.nome_loja}.")
-    else:
-        logger.warning(f"Usuário {usuario.email} já está vinculado à loja {loja.nome_loja}.")
+    Função para confirmar o e-mail do usuário. Registra a confirmação sem
+    alterar `is_active`: contas desativadas continuam desativadas.
 
-
-def enviar_email_confirmacao(usuario, request):
-    """
-    Função para enviar um e-mail de confirmação após o registro de um novo usuário.
+    Tokens malformados, expirados ou já utilizados são rejeitados sem
+    consultar o banco; o link só pode ser usado uma vez.
     """
-    token = default_token_generator.make_token(usuario)
-    uid = usuario.pk
-    confirm_url = f"http://{get_current_site(request).domain}/confirmar-email/{uid}/{token}/"
-
-    # Renderiza o template HTML do e-mail de confirmação
-    html_message = render_to_string('accounts/confirmacao_email.html', {
-        'confirm_url': confirm_url,
-        'client_name': usuario.nome,  # Nome do usuário
-        'year': 2025
-    })
-
-    # Configura o e-mail e envia
-    email_message = EmailMessage(
-        'Confirmação de E-mail',
-        html_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [usuario.email]
-    )
-    email_message.content_subtype = "html"  # Definir conteúdo como HTML
-    email_message.send(fail_silently=False)
-
-    logger.info(f"E-mail de confirmação enviado para {usuario.email}.")
-
+    lido = ler_token(uidb64, token, CONFIRMACAO)
+    if lido is None:
+        return redirect('accounts:login')
 
-def confirmar_email(request, uidb64, token):
-    """
-    Função para confirmar o e-mail do usuário. Marca o usuário como ativo.
-    """
-    try:
-        usuario = Usuario.objects.get(pk=uidb64)
-    except Usuario.DoesNotExist:
+    usuario = Usuario.objects.filter(pk=lido.uid).first()
+    if usuario is None:
         logger.warning("Usuário não encontrado para confirmação de e-mail.")
         return redirect('accounts:login')
-    
-    if not default_token_generator.check_token(usuario, token):
-        logger.warning(f"Token inválido para o usuário {usuario.email}.")
+
+    if not token_confere(usuario, lido):
+        logger.warning("Token inválido para o usuário %s.", usuario.email)
         return redirect('accounts:login')
-    
-    usuario.is_active = True  # Marca o usuário como ativo
-    usuario.save()
-    logger.info(f"Email confirmado para o usuário {usuario.email}.")
+
+    with transaction.atomic():
+        if not consumir_token(lido):
+            return redirect('accounts:login')
+        if usuario.email_confirmado_em is None:
+            usuario.email_confirmado_em = timezone.now()
+            usuario.save(update_fields=['email_confirmado_em'])
+    logger.info("Email confirmado para o usuário %s.", usuario.email)
     return redirect('accounts:login')
 
 
@@ -144,10 +123,8 @@ def recuperar_senha(request):
         if form.is_valid():
             email = form.cleaned_data["email"]
             try:
-                usuario = Usuario.objects.get(email=email)
-                token = default_token_generator.make_token(usuario)
-                uid = usuario.pk
-                reset_url = f"http://{get_current_site(request).domain}/resetar-senha/{uid}/{token}/"
+                usuario = Usuario.objects.get(email__lower=email.lower())
+                reset_url = url_redefinicao(usuario, get_current_site(request).domain)
                 enviar_email_redefinicao(usuario, reset_url)
                 return redirect('accounts:login')
             except Usuario.DoesNotExist:
@@ -160,38 +137,33 @@ def recuperar_senha(request):
 
 def enviar_email_redefinicao(usuario, reset_url):
     """
-    Função para enviar um e-mail com o link para redefinição de senha.
+    Função para enfileirar o e-mail com o link para redefinição de senha.
     """
-    html_message = render_to_string('accounts/redefinicao_senha.html', {
-        'reset_url': reset_url,
-        'client_name': usuario.nome,  # Nome do usuário
-        'year': 2025
-    })
+    html_message, texto = renderizar_redefinicao(usuario, reset_url)
 
-    email_message = EmailMessage(
-        'Redefinição de Senha',
-        html_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [usuario.email]
-    )
-    email_message.content_subtype = "html"  # Definir conteúdo como HTML
-    email_message.send(fail_silently=False)
+    enfileirar_email(ASSUNTO_REDEFINICAO, html_message, [usuario.email], corpo_texto=texto)
 
-    logger.info(f"E-mail de redefinição de senha enviado para {usuario.email}.")
+    logger.info("E-mail de redefinição de senha enfileirado para %s.", usuario.email)
 
 
 def redefinir_senha(request, uidb64, token):
     """
     Função para redefinir a senha do usuário.
+
+    Tokens malformados, expirados ou já utilizados são rejeitados sem
+    consultar o banco; o link deixa de valer após a redefinição.
     """
-    try:
-        usuario = Usuario.objects.get(pk=uidb64)
-    except Usuario.DoesNotExist:
+    lido = ler_token(uidb64, token, REDEFINICAO)
+    if lido is None:
+        return redirect('accounts:login')
+
+    usuario = Usuario.objects.filter(pk=lido.uid).first()
+    if usuario is None:
         logger.warning("Usuário não encontrado para redefinir senha.")
         return redirect('accounts:login')
-    
-    if not default_token_generator.check_token(usuario, token):
-        logger.warning(f"Token inválido para o usuário {usuario.email}.")
+
+    if not token_confere(usuario, lido):
+        logger.warning("Token inválido para o usuário %s.", usuario.email)
         return redirect('accounts:login')
 
     if request.method == "POST":
@@ -199,8 +171,11 @@ def redefinir_senha(request, uidb64, token):
         if form.is_valid():
             nova_senha = form.cleaned_data["nova_senha"]
             usuario.set_password(nova_senha)
-            usuario.save()
-            logger.info(f"Senha redefinida com sucesso para o usuário {usuario.email}.")
+            with transaction.atomic():
+                if not consumir_token(lido):
+                    return redirect('accounts:login')
+                usuario.save()
+            logger.info("Senha redefinida com sucesso para o usuário %s.", usuario.email)
             return redirect('accounts:login')
     else:
         form = NovaSenhaForm()
@@ -221,7 +196,7 @@ def alterar_senha(request):
             usuario = request.user
             usuario.set_password(nova_senha)
             usuario.save()
-            logger.info(f"Senha alterada com sucesso para o usuário {usuario.email}.")
+            logger.info("Senha alterada com sucesso para o usuário %s.", usuario.email)
             return redirect('accounts:login')
     else:
         form = NovaSenhaForm()
@@ -234,7 +209,7 @@ def perfil(request):
         form = RegistroUsuarioForm(request.POST, instance=usuario)
         if form.is_valid():
             form.save()
-            logger.info(f"Perfil do usuário {usuario.email} atualizado.")
+            logger.info("Perfil do usuário %s atualizado.", usuario.email)
             return redirect('accounts:perfil')
     else:
         form = RegistroUsuarioForm(instance=usuario)
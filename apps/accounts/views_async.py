@@ -0,0 +1,124 @@
+"""
+Versões assíncronas das views de login, registro e recuperação de senha.
+
+Usadas quando `CONTAS_VIEWS_ASYNC = True` e a aplicação roda pelo ASGI
+(core/asgi.py). As consultas usam o ORM assíncrono e os hashes de senha são
+calculados no pool de `apps.accounts.hashers.em_thread_de_hash`; o que ainda
+é síncrono (transação do registro, fila de e-mail, limite de tentativas)
+passa por `sync_to_async`. O comportamento é o mesmo das views de `views.py`.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import aauthenticate, alogin
+from django.contrib.sites.shortcuts import get_current_site
+from django.db import IntegrityError
+from django.shortcuts import redirect, render
+
+from apps.lojas.forms import RegistroLojaForm
+
+from .emails import url_redefinicao
+from .forms import EsqueciSenhaForm, LoginForm, RegistroUsuarioForm
+from .hashers import em_thread_de_hash
+from .models import Usuario
+from .ratelimit import limpar_tentativas, login_bloqueado
+from .services import registrar_usuario_e_loja
+from .views import TEMPLATE_NAME, enviar_email_redefinicao
+
+logger = logging.getLogger('usuarios')
+
+
+def _validar_formularios(*formularios):
+    validos = [formulario.is_valid() for formulario in formularios]
+    return all(validos)
+
+
+async def logar(request):
+    """
+    Login do usuário (assíncrono).
+    """
+    if request.method == "POST":
+        form = LoginForm(request.POST)
+        if form.is_valid():
+            email = form.cleaned_data["email"]
+            senha = form.cleaned_data["senha"]
+
+            # Rejeita antes de calcular qualquer hash de senha
+            if await sync_to_async(login_bloqueado)(request, email):
+                logger.warning("Login bloqueado por excesso de tentativas para %s.", email)
+                form.add_error("email", "Muitas tentativas de login. Aguarde alguns minutos e tente novamente.")
+                return render(request, template_name=TEMPLATE_NAME, context={"form": form}, status=429)
+
+            usuario = await aauthenticate(request, username=email, password=senha)
+            if usuario is not None:
+                await sync_to_async(limpar_tentativas)(email)
+                await alogin(request, usuario)
+                logger.info("Usuário %s logado com sucesso.", email)
+                return redirect("dashboard:index")
+            else:
+                logger.warning("Tentativa de login falha para %s.", email)
+                form.add_error("email", "Email ou senha incorretos.")
+                form.add_error("senha", "")
+    else:
+        form = LoginForm()
+
+    return render(request, template_name=TEMPLATE_NAME, context={"form": form})
+
+
+async def registrar(request):
+    """
+    Registro de usuário e loja (assíncrono). O hash da senha é calculado no
+    pool de hashing; a gravação roda em uma transação síncrona.
+    """
+    if request.method == 'POST':
+        form_usuario = RegistroUsuarioForm(request.POST)
+        form_loja = RegistroLojaForm(request.POST)
+
+        # A validação consulta o banco (e-mail e CNPJ únicos). Os dois
+        # formulários são sempre validados aqui: se um ficasse para o render,
+        # a consulta rodaria no event loop.
+        if await sync_to_async(_validar_formularios)(form_usuario, form_loja):
+            usuario = await em_thread_de_hash(form_usuario.save, commit=False)
+            try:
+                usuario, loja = await sync_to_async(registrar_usuario_e_loja)(
+                    usuario, form_loja.save(commit=False), get_current_site(request).domain
+                )
+            except IntegrityError:
+                # Outra requisição gravou o mesmo e-mail ou CNPJ entre a validação e o INSERT
+                messages.error(request, 'ERRO USUARIO JA EXISTE', extra_tags='error')
+                logger.warning("Falha ao registrar usuário. E-mail ou CNPJ já cadastrado.")
+            else:
+                logger.info("Novo usuário registrado: %s, Loja: %s", usuario.email, loja.nome_loja)
+                return redirect('accounts:login')
+        else:
+            messages.error(request, 'ERRO USUARIO JA EXISTE', extra_tags='error')
+            logger.warning("Falha ao registrar usuário. Dados inválidos.")
+    else:
+        form_usuario = RegistroUsuarioForm()
+        form_loja = RegistroLojaForm()
+
+    return render(request, template_name=TEMPLATE_NAME, context={'form': form_usuario, 'loja_form': form_loja})
+
+
+async def recuperar_senha(request):
+    """
+    Envio do link de redefinição de senha (assíncrono).
+    """
+    if request.method == "POST":
+        form = EsqueciSenhaForm(request.POST)
+        if form.is_valid():
+            email = form.cleaned_data["email"]
+            try:
+                usuario = await Usuario.objects.aget(email__lower=email.lower())
+            except Usuario.DoesNotExist:
+                form.add_error("email", "Usuário não encontrado.")
+            else:
+                reset_url = url_redefinicao(usuario, get_current_site(request).domain)
+                await sync_to_async(enviar_email_redefinicao)(usuario, reset_url)
+                return redirect('accounts:login')
+    else:
+        form = EsqueciSenhaForm()
+
+    return render(request, template_name=TEMPLATE_NAME, context={'form': form})
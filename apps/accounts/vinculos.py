@@ -0,0 +1,53 @@
+"""
+Vínculos usuário/loja em cache
+------------------------------
+`lojas_do_usuario` devolve os ids das lojas de um usuário consultando o cache
+(`VINCULOS_CACHE_ALIAS`) antes do banco. O cache é invalidado pelos sinais de
+`UsuarioLoja` e, nas gravações em massa (`bulk_create`, que não dispara
+sinais), por `invalidar_lojas_dos_usuarios`. Com cache local, a invalidação
+só alcança o processo atual e os demais dependem do TTL curto
+(`VINCULOS_CACHE_TTL`).
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import UsuarioLoja
+
+
+def _chave(usuario_id):
+    return f"lojas_usuario:{usuario_id}"
+
+
+def _cache():
+    return caches[settings.VINCULOS_CACHE_ALIAS]
+
+
+def lojas_do_usuario(usuario):
+    """
+    Retorna um `frozenset` com os ids das lojas às quais o usuário pertence.
+    """
+    if not usuario.is_authenticated:
+        return frozenset()
+
+    chave = _chave(usuario.pk)
+    lojas = _cache().get(chave)
+    if lojas is None:
+        lojas = frozenset(UsuarioLoja.objects.filter(usuario_id=usuario.pk).values_list('loja_id', flat=True))
+        _cache().set(chave, lojas, settings.VINCULOS_CACHE_TTL)
+    return lojas
+
+
+def invalidar_lojas_dos_usuarios(usuario_ids):
+    """
+    Descarta do cache as lojas dos usuários informados.
+    """
+    _cache().delete_many([_chave(usuario_id) for usuario_id in usuario_ids])
+
+
+def usuario_pertence_a_loja(request, loja_id):
+    """
+    Verifica se o usuário da requisição pertence à loja, sem consultar o
+    banco quando `request.lojas` já está em cache.
+    """
+    return int(loja_id) in request.lojas
@@ -1,7 +1,17 @@
 from django.contrib import admin
+from .busca import filtrar_lojas
 from .models import Loja
+from core.paginacao import PaginadorEstimado
+
+
 # Register your models here.
 @admin.register(Loja)
-class UsuarioLojaAdmin(admin.ModelAdmin):
+class LojaAdmin(admin.ModelAdmin):
     list_display = ['nome_loja', 'cnpj']
-    search_fields = ['cnpj']  # Usando __ para buscar o campo 'nome' no modelo Usuario
+    search_fields = ['nome_loja', 'cnpj', 'endereco']
+    search_help_text = "CNPJ ou início das palavras do nome ou do endereço da loja."
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        return filtrar_lojas(queryset, search_term), False
@@ -0,0 +1,93 @@
+"""
+Busca de lojas
+--------------
+Termos numéricos (com ou sem pontuação) são tratados como CNPJ: 14 dígitos
+fazem busca exata e menos dígitos fazem busca por prefixo, ambas pelo índice
+único de `cnpj`.
+
+Os demais termos são divididos em palavras, e cada palavra precisa ser o
+início de alguma palavra do nome ou do endereço da loja ("cen pad" encontra
+"Padaria Central"), sem diferenciar maiúsculas de minúsculas:
+
+- PostgreSQL: expressão regular de início de palavra sobre UPPER(nome_loja)
+  e UPPER(endereco), atendida pelos índices GIN de trigramas (`pg_trgm`);
+- SQLite: tabela FTS5 `lojas_loja_fts`, mantida por triggers.
+
+Única diferença entre os bancos: o FTS5 também ignora acentos ("sao"
+encontra "São"), o PostgreSQL não.
+
+Os índices são criados pelas migrações `0002_indices_busca` e
+`0005_busca_endereco`.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Upper
+
+from .cnpj import TAMANHO_CNPJ, normalizar_cnpj
+from .models import Loja
+
+
+def _filtrar_cnpj(queryset, digitos):
+    if len(digitos) == TAMANHO_CNPJ:
+        return queryset.filter(cnpj=digitos)
+    # Faixa [prefixo, prefixo seguinte) em vez de LIKE, para usar o índice em qualquer banco
+    fim = digitos[:-1] + chr(ord(digitos[-1]) + 1)
+    return queryset.filter(cnpj__gte=digitos, cnpj__lt=fim)
+
+
+def _filtrar_palavras(queryset, termo, limite=None):
+    # Mesma divisão em palavras do tokenizador do FTS5 (letras e dígitos)
+    palavras = re.findall(r'\w+', termo)
+    if not palavras:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'sqlite':
+        # Cada palavra vira um prefixo FTS5, em qualquer coluna: "loja"* AND "cen"*
+        consulta = ' '.join('"{}"*'.format(palavra) for palavra in palavras)
+        sql = "SELECT rowid FROM lojas_loja_fts WHERE lojas_loja_fts MATCH %s"
+        parametros = [consulta]
+        if limite:
+            # Limita dentro do FTS para não materializar todas as
+            # correspondências de prefixos muito comuns
+            sql += " LIMIT %s"
+            parametros.append(limite)
+        return queryset.filter(pk__in=RawSQL(sql, parametros))
+
+    queryset = queryset.alias(nome_maiusculo=Upper('nome_loja'), endereco_maiusculo=Upper('endereco'))
+    for palavra in palavras:
+        # \m: início de palavra nas expressões regulares do PostgreSQL
+        padrao = r'\m' + re.escape(palavra.upper())
+        queryset = queryset.filter(Q(nome_maiusculo__regex=padrao) | Q(endereco_maiusculo__regex=padrao))
+    return queryset
+
+
+def filtrar_lojas(queryset, termo, limite=None):
+    """
+    Aplica a busca por CNPJ, nome ou endereço sobre um queryset de `Loja`.
+
+    `limite` é apenas uma dica para interromper a busca textual após as
+    primeiras correspondências; o queryset não é fatiado.
+    """
+    termo = termo.strip()
+    if not termo:
+        return queryset
+
+    digitos = normalizar_cnpj(termo)
+    if digitos and not termo.strip('0123456789./- '):
+        return _filtrar_cnpj(queryset, digitos)
+    return _filtrar_palavras(queryset, termo, limite)
+
+
+def buscar_lojas(termo, limite=20):
+    """
+    Retorna até `limite` lojas que correspondem ao termo, ordenadas pelo nome.
+
+    No SQLite, quando há mais correspondências que o limite, as retornadas são
+    as primeiras encontradas pelo índice FTS5 (não necessariamente as
+    primeiras em ordem alfabética).
+    """
+    return filtrar_lojas(Loja.objects.all(), termo, limite).order_by('nome_loja')[:limite]
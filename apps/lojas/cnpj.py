@@ -0,0 +1,100 @@
+"""
+Utilitários de CNPJ
+-------------------
+Normalização (apenas os 14 dígitos), formatação e validação dos dígitos
+verificadores. `validar_cnpjs_em_lote` processa sequências grandes (ex.:
+importações) sem o custo de uma exceção por item inválido.
+"""
+
+import operator
+import re
+
+from django.core.exceptions import ValidationError
+
+TAMANHO_CNPJ = 14
+
+_PESOS_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_2 = (6,) + _PESOS_1
+# Os dígitos são somados como códigos ASCII ('0' == 48); o deslocamento é descontado de uma vez
+_DESLOCAMENTO_1 = ord('0') * sum(_PESOS_1)
+_DESLOCAMENTO_2 = ord('0') * sum(_PESOS_2)
+
+_NAO_DIGITOS = re.compile(r'[^0-9]+')
+_REPETIDOS = frozenset(str(digito) * TAMANHO_CNPJ for digito in range(10))
+
+
+def normalizar_cnpj(valor):
+    """
+    Remove pontuação e espaços, mantendo apenas os dígitos.
+    """
+    valor = valor or ''
+    # Caminho rápido para valores já normalizados
+    if valor.isascii() and valor.isdigit():
+        return valor
+    return _NAO_DIGITOS.sub('', valor)
+
+
+def formatar_cnpj(digitos):
+    """
+    Formata 14 dígitos como XX.XXX.XXX/XXXX-XX.
+    """
+    return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+
+
+def _digito(soma):
+    resto = soma % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def cnpj_valido(digitos):
+    """
+    Verifica se uma string de 14 dígitos (já normalizada) é um CNPJ válido.
+    """
+    if len(digitos) != TAMANHO_CNPJ or digitos in _REPETIDOS or not (digitos.isascii() and digitos.isdigit()):
+        return False
+    codigos = digitos.encode('ascii')
+    primeiro = _digito(sum(map(operator.mul, _PESOS_1, codigos)) - _DESLOCAMENTO_1)
+    if primeiro != codigos[12] - 48:
+        return False
+    segundo = _digito(sum(map(operator.mul, _PESOS_2, codigos)) - _DESLOCAMENTO_2)
+    return segundo == codigos[13] - 48
+
+
+def validar_cnpj(valor):
+    """
+    Validador para campos de modelo e de formulário.
+    """
+    if not cnpj_valido(normalizar_cnpj(valor)):
+        raise ValidationError("CNPJ inválido.", code='cnpj_invalido')
+
+
+def validar_cnpjs_em_lote(valores):
+    """
+    Normaliza e valida uma sequência de CNPJs de uma vez.
+
+    Retorna uma lista, na mesma ordem, com o CNPJ normalizado (14 dígitos) ou
+    None para os inválidos. É a mesma regra de `cnpj_valido`, com o laço
+    escrito sem chamadas de função por item.
+    """
+    # Referências locais evitam buscas de atributo/globais a cada item
+    sub = _NAO_DIGITOS.sub
+    mul = operator.mul
+    pesos_1, pesos_2 = _PESOS_1, _PESOS_2
+    deslocamento_1, deslocamento_2 = _DESLOCAMENTO_1, _DESLOCAMENTO_2
+    repetidos = _REPETIDOS
+
+    resultado = []
+    adicionar = resultado.append
+    for valor in valores:
+        digitos = valor if valor and valor.isascii() and valor.isdigit() else sub('', valor or '')
+        if len(digitos) != TAMANHO_CNPJ or digitos in repetidos:
+            adicionar(None)
+            continue
+        codigos = digitos.encode('ascii')
+        resto = (sum(map(mul, pesos_1, codigos)) - deslocamento_1) % 11
+        if (0 if resto < 2 else 11 - resto) != codigos[12] - 48:
+            adicionar(None)
+            continue
+        resto = (sum(map(mul, pesos_2, codigos)) - deslocamento_2) % 11
+        adicionar(digitos if (0 if resto < 2 else 11 - resto) == codigos[13] - 48 else None)
+    return resultado
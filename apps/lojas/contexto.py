@@ -0,0 +1,143 @@
+"""
+Loja ativa da requisição
+------------------------
+`LojaAtivaMiddleware` resolve a loja (cabeçalho, subdomínio ou argumento
+`loja` da URL) e a guarda em uma `ContextVar`. Os modelos com
+`PorLojaManager` filtram suas consultas por ela automaticamente.
+
+A resolução CNPJ/slug → id usa um `CacheLRU` em memória, então requisições
+para lojas já vistas pelo processo não consultam o banco. Identificadores
+inexistentes também ficam em cache, por `LOJA_CACHE_TTL_NEGATIVO` segundos,
+para que requisições com lojas inválidas não cheguem ao banco a cada vez.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import models
+from django.http import Http404
+
+from core.cache import CacheLRU
+
+from .cnpj import TAMANHO_CNPJ, normalizar_cnpj
+from .models import Loja
+
+_loja_ativa = contextvars.ContextVar('loja_ativa', default=None)
+_lojas = CacheLRU(settings.LOJA_CACHE_TAMANHO, settings.LOJA_CACHE_TTL)
+_inexistentes = CacheLRU(settings.LOJA_CACHE_TAMANHO, settings.LOJA_CACHE_TTL_NEGATIVO)
+
+
+def loja_ativa_id():
+    """
+    Id da loja ativa no contexto atual, ou None.
+    """
+    return _loja_ativa.get()
+
+
+@contextmanager
+def ativar_loja(loja_id):
+    """
+    Ativa uma loja dentro do bloco (ex.: tarefas e comandos fora de requisições).
+    """
+    token = _loja_ativa.set(loja_id)
+    try:
+        yield
+    finally:
+        _loja_ativa.reset(token)
+
+
+def _chave(identificador):
+    cnpj = normalizar_cnpj(identificador)
+    if len(cnpj) == TAMANHO_CNPJ:
+        return ('cnpj', cnpj)
+    return ('slug', identificador.lower())
+
+
+def _guardar(chave, loja_id):
+    if loja_id is None:
+        _inexistentes.set(chave, True)
+    else:
+        _lojas.set(chave, loja_id)
+
+
+def resolver_loja_id(identificador):
+    """
+    Converte um CNPJ (com ou sem pontuação) ou slug no id da loja. Retorna
+    None se a loja não existir; identificadores inexistentes ficam em cache
+    por pouco tempo (`LOJA_CACHE_TTL_NEGATIVO`).
+    """
+    if not identificador:
+        return None
+    chave = _chave(identificador)
+    loja_id = _lojas.get(chave)
+    if loja_id is None and not _inexistentes.get(chave):
+        campo, valor = chave
+        loja_id = Loja.objects.filter(**{campo: valor}).values_list('pk', flat=True).first()
+        _guardar(chave, loja_id)
+    return loja_id
+
+
+async def aresolver_loja_id(identificador):
+    """
+    Versão assíncrona de `resolver_loja_id`: o cache é consultado sem trocar
+    de thread e, na falta, a consulta usa o ORM assíncrono.
+    """
+    if not identificador:
+        return None
+    chave = _chave(identificador)
+    loja_id = _lojas.get(chave)
+    if loja_id is None and not _inexistentes.get(chave):
+        campo, valor = chave
+        loja_id = await Loja.objects.filter(**{campo: valor}).values_list('pk', flat=True).afirst()
+        _guardar(chave, loja_id)
+    return loja_id
+
+
+def invalidar_loja(loja):
+    """
+    Remove do cache deste processo as chaves de uma loja, inclusive as
+    marcadas como inexistentes (loja recém-criada). Nos demais processos a
+    entrada expira pelo TTL (`LOJA_CACHE_TTL` ou `LOJA_CACHE_TTL_NEGATIVO`).
+    """
+    chaves = [('cnpj', loja.cnpj)]
+    if loja.slug:
+        chaves.append(('slug', loja.slug.lower()))
+    for chave in chaves:
+        _lojas.delete(chave)
+        _inexistentes.delete(chave)
+
+
+class PorLojaManager(models.Manager):
+    """
+    Manager que restringe as consultas à loja ativa. Sem loja ativa, não
+    retorna nada; use o manager padrão (`objects`) para acesso global.
+    """
+
+    def __init__(self, campo='loja'):
+        super().__init__()
+        self.campo = campo
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        loja_id = loja_ativa_id()
+        if loja_id is None:
+            return queryset.none()
+        return queryset.filter(**{f'{self.campo}_id': loja_id})
+
+
+def loja_obrigatoria(view_func):
+    """
+    Exige uma loja ativa (404 caso contrário) da qual o usuário seja membro
+    (403 caso contrário). Usa `request.lojas`, em cache, sem consultas extras.
+    """
+    @wraps(view_func)
+    def _view(request, *args, **kwargs):
+        if request.loja_id is None:
+            raise Http404("Loja não encontrada.")
+        if request.loja_id not in request.lojas:
+            raise PermissionDenied
+        return view_func(request, *args, **kwargs)
+    return _view
@@ -0,0 +1,81 @@
+"""
+Exportação de lojas e vínculos
+------------------------------
+Gera CSV ou JSONL sob demanda, lendo o banco com `.iterator(chunk_size=...)`
+(cursor no servidor no PostgreSQL). Apenas um bloco de linhas fica em memória
+por vez, então a exportação de milhões de registros usa memória constante.
+"""
+
+import csv
+import json
+
+from apps.accounts.models import UsuarioLoja
+
+from .models import Loja
+
+COLUNAS = {
+    'lojas': ['id', 'nome_loja', 'cnpj', 'endereco', 'telefone', 'criado_em'],
+    'vinculos': [
+        'usuario_id', 'usuario_nome', 'usuario_email',
+        'loja_id', 'nome_loja', 'cnpj', 'data_vinculo',
+    ],
+}
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _lojas(chunk_size):
+    lojas = Loja.objects.only(*COLUNAS['lojas']).order_by('pk').iterator(chunk_size=chunk_size)
+    for loja in lojas:
+        yield [loja.pk, loja.nome_loja, loja.cnpj, loja.endereco, loja.telefone, loja.criado_em.isoformat()]
+
+
+def _vinculos(chunk_size):
+    vinculos = (
+        UsuarioLoja.objects
+        .select_related('usuario', 'loja')
+        .only('data_vinculo', 'usuario__nome', 'usuario__email', 'loja__nome_loja', 'loja__cnpj')
+        .order_by('pk')
+        .iterator(chunk_size=chunk_size)
+    )
+    for vinculo in vinculos:
+        yield [
+            vinculo.usuario_id, vinculo.usuario.nome, vinculo.usuario.email,
+            vinculo.loja_id, vinculo.loja.nome_loja, vinculo.loja.cnpj,
+            vinculo.data_vinculo.isoformat(),
+        ]
+
+
+class _Eco:
+    """
+    "Arquivo" que apenas devolve o que recebe, para usar o `csv.writer`
+    sem acumular a saída em memória.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def exportar(tipo, formato, chunk_size=2000):
+    """
+    Gera a exportação de `tipo` ('lojas' ou 'vinculos') como uma sequência de
+    strings, uma por linha, no `formato` informado ('csv' ou 'jsonl').
+    """
+    if tipo not in COLUNAS:
+        raise ValueError(f"Tipo de exportação inválido: {tipo}")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+
+    colunas = COLUNAS[tipo]
+    linhas = _lojas(chunk_size) if tipo == 'lojas' else _vinculos(chunk_size)
+
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(colunas)
+        for linha in linhas:
+            yield escritor.writerow(linha)
+    else:
+        for linha in linhas:
+            yield json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n'
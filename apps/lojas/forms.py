@@ -1,7 +1,19 @@
 from django import forms
+from .cnpj import normalizar_cnpj, validar_cnpj
 from .models import Loja
 
 
+class CNPJField(forms.CharField):
+    """
+    Campo de CNPJ: aceita o valor com ou sem pontuação, normaliza para os 14
+    dígitos e valida os dígitos verificadores.
+    """
+    default_validators = [validar_cnpj]
+
+    def to_python(self, value):
+        return normalizar_cnpj(super().to_python(value))
+
+
 class RegistroLojaForm(forms.ModelForm):
     """
     Formulário para registro de novas lojas.
@@ -19,7 +31,7 @@ class RegistroLojaForm(forms.ModelForm):
         })
     )
 
-    cnpj = forms.CharField(
+    cnpj = CNPJField(
         label="CNPJ",
         widget=forms.TextInput(attrs={
             "class": "form-control",
@@ -0,0 +1,211 @@
+"""
+Importação em massa de lojas e usuários
+---------------------------------------
+Lê arquivos CSV ou JSONL linha a linha e grava em lotes com `bulk_create`,
+mantendo em memória apenas o lote corrente, independentemente do tamanho do
+arquivo.
+
+Colunas esperadas: `nome`, `email`, `senha` (opcional), `nome_loja`, `cnpj`,
+`endereco` e `telefone`. Cada linha é validada com as regras dos formulários
+de cadastro; lojas já existentes (mesmo CNPJ) e usuários já existentes (mesmo
+e-mail) são reaproveitados e apenas o vínculo é criado.
+"""
+
+import csv
+import json
+import logging
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+from apps.accounts.forms import RegistroUsuarioForm
+from apps.accounts.models import Usuario, UsuarioLoja
+from apps.accounts.vinculos import invalidar_lojas_dos_usuarios
+
+from .cnpj import validar_cnpjs_em_lote
+from .forms import RegistroLojaForm
+from .models import Loja, preencher_slugs
+
+logger = logging.getLogger('usuarios')
+
+
+class _ValidacaoEmLoteMixin:
+    """
+    Desliga as verificações de unicidade que consultariam o banco a cada linha;
+    o importador deduplica e-mails e CNPJs uma vez por lote.
+    """
+
+    def _get_validation_exclusions(self):
+        return super()._get_validation_exclusions() | {'email', 'cnpj'}
+
+    def validate_unique(self):
+        pass
+
+
+class UsuarioImportacaoForm(_ValidacaoEmLoteMixin, RegistroUsuarioForm):
+    pass
+
+
+class LojaImportacaoForm(_ValidacaoEmLoteMixin, RegistroLojaForm):
+    pass
+
+
+class LinhaInvalida(dict):
+    """
+    Linha que não pôde ser lida, com os erros no formato de `form.errors`.
+    `importar` a conta como inválida, sem interromper a importação.
+    """
+
+
+def _ler_json(linha):
+    try:
+        dados = json.loads(linha)
+    except json.JSONDecodeError as erro:
+        return LinhaInvalida(json=[f"JSON inválido: {erro.msg} (coluna {erro.colno})."])
+    if not isinstance(dados, dict):
+        return LinhaInvalida(json=["A linha deve ser um objeto JSON."])
+    return dados
+
+
+def ler_linhas(arquivo, formato):
+    """
+    Gera `(numero_da_linha, dados)` a partir de um arquivo CSV ou JSONL aberto.
+    Linhas JSONL malformadas geram um `LinhaInvalida`.
+    """
+    if formato == 'csv':
+        for numero, linha in enumerate(csv.DictReader(arquivo), start=2):
+            yield numero, linha
+    elif formato == 'jsonl':
+        for numero, linha in enumerate(arquivo, start=1):
+            if linha.strip():
+                yield numero, _ler_json(linha)
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+
+
+def validar_linha(dados):
+    """
+    Valida uma linha e retorna `(usuario, loja, senha, erros)`.
+
+    Sem senha, a linha é validada com uma senha aleatória e o usuário é criado
+    com senha inutilizável (deve usar a recuperação de senha no primeiro acesso).
+    """
+    senha = (dados.get('senha') or '').strip()
+    senha_validacao = senha or get_random_string(32)
+
+    form_usuario = UsuarioImportacaoForm({
+        'nome': dados.get('nome'),
+        'email': dados.get('email'),
+        'password1': senha_validacao,
+        'password2': senha_validacao,
+    })
+    form_loja = LojaImportacaoForm({
+        'nome_loja': dados.get('nome_loja'),
+        'cnpj': dados.get('cnpj'),
+        'endereco': dados.get('endereco'),
+        'telefone': dados.get('telefone'),
+    })
+
+    erros = {}
+    if not form_usuario.is_valid():
+        erros.update(form_usuario.errors)
+    if not form_loja.is_valid():
+        erros.update(form_loja.errors)
+    if erros:
+        return None, None, None, erros
+
+    usuario = form_usuario.instance
+    usuario.email = Usuario.objects.normalize_email(usuario.email)
+    return usuario, form_loja.instance, senha, None
+
+
+def _gravar_lote(validas):
+    """
+    Grava um lote de linhas válidas: lojas e usuários novos com `bulk_create`
+    e os vínculos com `ignore_conflicts`. Retorna quantos registros de cada
+    tipo foram criados.
+    """
+    lojas = {}
+    usuarios = {}
+    for usuario, loja, senha in validas:
+        lojas.setdefault(loja.cnpj, loja)
+        if usuario.email not in usuarios:
+            if senha:
+                usuario.password = make_password(senha)
+            else:
+                usuario.set_unusable_password()  # Sem cálculo de hash
+            usuarios[usuario.email] = usuario
+
+    with transaction.atomic():
+        existentes = dict(Loja.objects.filter(cnpj__in=lojas).values_list('cnpj', 'pk'))
+        novas_lojas = [loja for cnpj, loja in lojas.items() if cnpj not in existentes]
+        preencher_slugs(novas_lojas, Loja.objects.all())  # bulk_create não chama Loja.save()
+        Loja.objects.bulk_create(novas_lojas)
+        ids_lojas = {**existentes, **{loja.cnpj: loja.pk for loja in novas_lojas}}
+
+        existentes = dict(
+            Usuario.objects.filter(email__lower__in=list(usuarios)).values_list('email', 'pk')
+        )
+        novos_usuarios = [usuario for email, usuario in usuarios.items() if email not in existentes]
+        Usuario.objects.bulk_create(novos_usuarios)
+        ids_usuarios = {**existentes, **{usuario.email: usuario.pk for usuario in novos_usuarios}}
+
+        vinculos = {
+            (ids_usuarios[usuario.email], ids_lojas[loja.cnpj]) for usuario, loja, _ in validas
+        }
+        UsuarioLoja.objects.bulk_create(
+            [UsuarioLoja(usuario_id=usuario_id, loja_id=loja_id) for usuario_id, loja_id in vinculos],
+            ignore_conflicts=True,
+        )
+        # bulk_create não dispara sinais: invalida o cache de vínculos após o
+        # commit (inclusive o de uma transação externa que envolva a importação)
+        usuario_ids = {usuario_id for usuario_id, _ in vinculos}
+        transaction.on_commit(lambda: invalidar_lojas_dos_usuarios(usuario_ids))
+
+    return {'lojas': len(novas_lojas), 'usuarios': len(novos_usuarios), 'vinculos': len(vinculos)}
+
+
+def importar(linhas, tamanho_lote=1000, ao_erro=None):
+    """
+    Importa as linhas geradas por `ler_linhas` em lotes de `tamanho_lote`.
+
+    `ao_erro(numero, erros)` é chamado para cada linha inválida. Retorna um
+    dicionário com os totais, o tempo gasto e a taxa em linhas por segundo.
+    """
+    totais = {'linhas': 0, 'invalidas': 0, 'lojas': 0, 'usuarios': 0, 'vinculos': 0}
+    inicio = time.monotonic()
+    linhas = iter(linhas)
+
+    while lote := list(islice(linhas, tamanho_lote)):
+        validas = []
+        # CNPJs inválidos são descartados antes da validação (mais cara) dos formulários
+        cnpjs = validar_cnpjs_em_lote([dados.get('cnpj') for _, dados in lote])
+        for (numero, dados), cnpj in zip(lote, cnpjs):
+            if isinstance(dados, LinhaInvalida):
+                erros = dados
+            elif cnpj is None:
+                erros = {'cnpj': ["CNPJ inválido."]}
+            else:
+                usuario, loja, senha, erros = validar_linha({**dados, 'cnpj': cnpj})
+            if erros:
+                totais['invalidas'] += 1
+                if ao_erro:
+                    ao_erro(numero, erros)
+                continue
+            validas.append((usuario, loja, senha))
+
+        totais['linhas'] += len(lote)
+        if validas:
+            for chave, valor in _gravar_lote(validas).items():
+                totais[chave] += valor
+
+    totais['segundos'] = time.monotonic() - inicio
+    totais['por_segundo'] = totais['linhas'] / totais['segundos'] if totais['segundos'] else 0.0
+    logger.info(
+        "Importação concluída: %s linhas, %s lojas, %s usuários, %s vínculos (%.0f linhas/s).",
+        totais['linhas'], totais['lojas'], totais['usuarios'], totais['vinculos'], totais['por_segundo'],
+    )
+    return totais
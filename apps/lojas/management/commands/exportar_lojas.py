@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.lojas.exportacao import COLUNAS, FORMATOS, exportar
+
+
+class Command(BaseCommand):
+    help = "Exporta lojas ou vínculos usuário/loja em CSV ou JSONL, com memória constante."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', choices=list(COLUNAS), default='lojas')
+        parser.add_argument('--formato', choices=list(FORMATOS), default='csv')
+        parser.add_argument('--saida', help="Arquivo de saída (padrão: saída padrão).")
+        parser.add_argument('--chunk', type=int, default=2000,
+                            help="Quantidade de linhas lidas do banco por vez.")
+
+    def handle(self, *args, **options):
+        linhas = exportar(options['tipo'], options['formato'], chunk_size=options['chunk'])
+        if not options['saida']:
+            for linha in linhas:
+                self.stdout.write(linha, ending='')
+            return
+
+        with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+            arquivo.writelines(linhas)
@@ -0,0 +1,70 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .contexto import _loja_ativa, aresolver_loja_id, resolver_loja_id
+
+
+class LojaAtivaMiddleware:
+    """
+    Define `request.loja_id` e ativa a loja para `PorLojaManager`.
+
+    A loja vem, nesta ordem, do argumento `loja` da URL (ex.:
+    `/lojas/<loja>/`), do cabeçalho `LOJA_CABECALHO` ou do subdomínio de
+    `LOJA_DOMINIO_BASE`. Aceita CNPJ ou slug.
+
+    Funciona nos modos síncrono e assíncrono; no assíncrono, a loja é
+    resolvida com o ORM assíncrono, sem passar por uma thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.dominio = settings.LOJA_DOMINIO_BASE.lower()
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+            # O Django adapta process_view ao modo da pilha pelo tipo do método
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        request.loja_id = resolver_loja_id(self._identificador(request))
+        token = _loja_ativa.set(request.loja_id)
+        try:
+            return self.get_response(request)
+        finally:
+            _loja_ativa.reset(token)
+
+    async def __acall__(self, request):
+        request.loja_id = await aresolver_loja_id(self._identificador(request))
+        token = _loja_ativa.set(request.loja_id)
+        try:
+            return await self.get_response(request)
+        finally:
+            _loja_ativa.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if 'loja' in view_kwargs:
+            request.loja_id = resolver_loja_id(view_kwargs['loja'])
+            _loja_ativa.set(request.loja_id)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if 'loja' in view_kwargs:
+            request.loja_id = await aresolver_loja_id(view_kwargs['loja'])
+            _loja_ativa.set(request.loja_id)
+
+    def _identificador(self, request):
+        identificador = request.headers.get(settings.LOJA_CABECALHO)
+        if identificador or not self.dominio:
+            return identificador
+
+        host = request.get_host().split(':', 1)[0].lower()
+        sufixo = f".{self.dominio}"
+        if host.endswith(sufixo):
+            subdominio = host[:-len(sufixo)]
+            if '.' not in subdominio and subdominio != 'www':
+                return subdominio
+        return None
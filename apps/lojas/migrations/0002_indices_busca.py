@@ -0,0 +1,53 @@
+from django.db import migrations
+
+POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS lojas_loja_nome_trgm_idx ON lojas_loja USING gin (UPPER(nome_loja::text) gin_trgm_ops)",
+]
+POSTGRESQL_REVERSO = [
+    "DROP INDEX IF EXISTS lojas_loja_nome_trgm_idx",
+]
+
+SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lojas_loja_fts USING fts5("
+    "nome_loja, content='lojas_loja', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS lojas_loja_fts_ai AFTER INSERT ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja) VALUES (new.id, new.nome_loja); END",
+    "CREATE TRIGGER IF NOT EXISTS lojas_loja_fts_ad AFTER DELETE ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja) VALUES ('delete', old.id, old.nome_loja); END",
+    "CREATE TRIGGER IF NOT EXISTS lojas_loja_fts_au AFTER UPDATE OF nome_loja ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja) VALUES ('delete', old.id, old.nome_loja); "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja) VALUES (new.id, new.nome_loja); END",
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSO = [
+    "DROP TRIGGER IF EXISTS lojas_loja_fts_au",
+    "DROP TRIGGER IF EXISTS lojas_loja_fts_ad",
+    "DROP TRIGGER IF EXISTS lojas_loja_fts_ai",
+    "DROP TABLE IF EXISTS lojas_loja_fts",
+]
+
+
+def _executar(comandos_por_banco):
+    def executar(apps, schema_editor):
+        for comando in comandos_por_banco.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(comando)
+    return executar
+
+
+class Migration(migrations.Migration):
+    """
+    Índices de busca por nome de loja, específicos de cada banco
+    (ver `apps.lojas.busca`).
+    """
+
+    dependencies = [
+        ('lojas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _executar({'postgresql': POSTGRESQL, 'sqlite': SQLITE}),
+            _executar({'postgresql': POSTGRESQL_REVERSO, 'sqlite': SQLITE_REVERSO}),
+        ),
+    ]
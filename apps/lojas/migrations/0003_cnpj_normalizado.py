@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-17 22:09
+
+from collections import Counter
+
+import apps.lojas.cnpj
+from django.db import migrations, models
+
+from apps.lojas.cnpj import normalizar_cnpj
+
+
+def normalizar_cnpjs(apps, schema_editor):
+    """
+    Grava os CNPJs existentes apenas com dígitos.
+
+    Se dois registros representarem o mesmo CNPJ (com e sem pontuação), aborta
+    a migração: as lojas precisam ser unificadas manualmente.
+    """
+    Loja = apps.get_model('lojas', 'Loja')
+    alterar = [
+        loja for loja in Loja.objects.only('pk', 'cnpj').iterator(chunk_size=2000)
+        if loja.cnpj != normalizar_cnpj(loja.cnpj)
+    ]
+    if not alterar:
+        return
+
+    for loja in alterar:
+        loja.cnpj = normalizar_cnpj(loja.cnpj)
+    cnpjs = Counter(loja.cnpj for loja in alterar)
+    duplicados = set(Loja.objects.filter(cnpj__in=list(cnpjs)).values_list('cnpj', flat=True))
+    duplicados.update(cnpj for cnpj, total in cnpjs.items() if total > 1)
+    if duplicados:
+        raise RuntimeError(
+            f"CNPJs duplicados precisam ser resolvidos antes desta migração: {', '.join(sorted(duplicados))}"
+        )
+    Loja.objects.bulk_update(alterar, ['cnpj'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lojas', '0002_indices_busca'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_cnpjs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='loja',
+            name='cnpj',
+            field=models.CharField(max_length=20, unique=True, validators=[apps.lojas.cnpj.validar_cnpj], verbose_name='CNPJ'),
+        ),
+    ]
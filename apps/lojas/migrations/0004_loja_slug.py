@@ -0,0 +1,77 @@
+from django.db import migrations, models
+from django.utils.text import slugify
+
+TAMANHO_SLUG = 50
+TAMANHO_CNPJ = 14
+
+# No SQLite, AddField/AlterField com unique=True recriam a tabela lojas_loja e
+# descartam os triggers que mantêm a tabela FTS5 da busca (0002_indices_busca).
+# Eles são recriados ao final da migração (e no início, ao revertê-la).
+TRIGGERS_BUSCA_SQLITE = [
+    "CREATE TRIGGER IF NOT EXISTS lojas_loja_fts_ai AFTER INSERT ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja) VALUES (new.id, new.nome_loja); END",
+    "CREATE TRIGGER IF NOT EXISTS lojas_loja_fts_ad AFTER DELETE ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja) VALUES ('delete', old.id, old.nome_loja); END",
+    "CREATE TRIGGER IF NOT EXISTS lojas_loja_fts_au AFTER UPDATE OF nome_loja ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja) VALUES ('delete', old.id, old.nome_loja); "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja) VALUES (new.id, new.nome_loja); END",
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts) VALUES ('rebuild')",
+]
+
+
+def recriar_triggers_busca(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for comando in TRIGGERS_BUSCA_SQLITE:
+            schema_editor.execute(comando)
+
+
+def preencher_slugs(lojas, queryset):
+    """
+    Cópia congelada de `apps.lojas.models.preencher_slugs` (a migração não
+    deve depender do código atual do modelo).
+    """
+    pendentes = [loja for loja in lojas if not loja.slug]
+    if not pendentes:
+        return
+    for loja in pendentes:
+        loja.slug = slugify(loja.nome_loja)[:TAMANHO_SLUG - TAMANHO_CNPJ - 1] or loja.cnpj
+
+    usados = set(queryset.filter(slug__in=[loja.slug for loja in pendentes]).values_list('slug', flat=True))
+    for loja in pendentes:
+        if loja.slug in usados:
+            loja.slug = f"{loja.slug}-{loja.cnpj}"
+        usados.add(loja.slug)
+
+
+def gerar_slugs(apps, schema_editor):
+    """
+    Preenche o slug das lojas existentes, em lotes.
+    """
+    Loja = apps.get_model('lojas', 'Loja')
+    sem_slug = Loja.objects.filter(slug__isnull=True).only('pk', 'nome_loja', 'cnpj', 'slug')
+    while lote := list(sem_slug[:1000]):
+        preencher_slugs(lote, Loja.objects.all())
+        Loja.objects.bulk_update(lote, ['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lojas', '0003_cnpj_normalizado'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recriar_triggers_busca),
+        migrations.AddField(
+            model_name='loja',
+            name='slug',
+            field=models.SlugField(blank=True, null=True, unique=True, verbose_name='Slug'),
+        ),
+        migrations.RunPython(gerar_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='loja',
+            name='slug',
+            field=models.SlugField(blank=True, unique=True, verbose_name='Slug'),
+        ),
+        migrations.RunPython(recriar_triggers_busca, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# A busca textual passa a considerar também o endereço (ver `apps.lojas.busca`)
+POSTGRESQL = [
+    "CREATE INDEX IF NOT EXISTS lojas_loja_endereco_trgm_idx ON lojas_loja USING gin (UPPER(endereco) gin_trgm_ops)",
+]
+POSTGRESQL_REVERSO = [
+    "DROP INDEX IF EXISTS lojas_loja_endereco_trgm_idx",
+]
+
+REMOVER_FTS_SQLITE = [
+    "DROP TRIGGER IF EXISTS lojas_loja_fts_au",
+    "DROP TRIGGER IF EXISTS lojas_loja_fts_ad",
+    "DROP TRIGGER IF EXISTS lojas_loja_fts_ai",
+    "DROP TABLE IF EXISTS lojas_loja_fts",
+]
+SQLITE = REMOVER_FTS_SQLITE + [
+    "CREATE VIRTUAL TABLE lojas_loja_fts USING fts5("
+    "nome_loja, endereco, content='lojas_loja', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER lojas_loja_fts_ai AFTER INSERT ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja, endereco) VALUES (new.id, new.nome_loja, new.endereco); END",
+    "CREATE TRIGGER lojas_loja_fts_ad AFTER DELETE ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja, endereco) "
+    "VALUES ('delete', old.id, old.nome_loja, old.endereco); END",
+    "CREATE TRIGGER lojas_loja_fts_au AFTER UPDATE OF nome_loja, endereco ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja, endereco) "
+    "VALUES ('delete', old.id, old.nome_loja, old.endereco); "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja, endereco) VALUES (new.id, new.nome_loja, new.endereco); END",
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSO = REMOVER_FTS_SQLITE + [
+    "CREATE VIRTUAL TABLE lojas_loja_fts USING fts5("
+    "nome_loja, content='lojas_loja', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER lojas_loja_fts_ai AFTER INSERT ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja) VALUES (new.id, new.nome_loja); END",
+    "CREATE TRIGGER lojas_loja_fts_ad AFTER DELETE ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja) VALUES ('delete', old.id, old.nome_loja); END",
+    "CREATE TRIGGER lojas_loja_fts_au AFTER UPDATE OF nome_loja ON lojas_loja BEGIN "
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts, rowid, nome_loja) VALUES ('delete', old.id, old.nome_loja); "
+    "INSERT INTO lojas_loja_fts(rowid, nome_loja) VALUES (new.id, new.nome_loja); END",
+    "INSERT INTO lojas_loja_fts(lojas_loja_fts) VALUES ('rebuild')",
+]
+
+
+def _executar(comandos_por_banco):
+    def executar(apps, schema_editor):
+        for comando in comandos_por_banco.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(comando)
+    return executar
+
+
+class Migration(migrations.Migration):
+    """
+    Inclui o endereço na busca textual de lojas: índice de trigramas no
+    PostgreSQL e nova coluna na tabela FTS5 do SQLite.
+    """
+
+    dependencies = [
+        ('lojas', '0004_loja_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _executar({'postgresql': POSTGRESQL, 'sqlite': SQLITE}),
+            _executar({'postgresql': POSTGRESQL_REVERSO, 'sqlite': SQLITE_REVERSO}),
+        ),
+    ]
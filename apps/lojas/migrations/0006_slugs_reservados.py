@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# Cópia congelada de `apps.lojas.models.SLUGS_RESERVADOS`
+SLUGS_RESERVADOS = ['buscar', 'exportar', 'www']
+
+
+def renomear_slugs_reservados(apps, schema_editor):
+    """
+    Acrescenta o CNPJ ao slug das lojas criadas com um slug reservado, que
+    eram inacessíveis pela URL `/lojas/<loja>/`.
+    """
+    Loja = apps.get_model('lojas', 'Loja')
+    for loja in Loja.objects.filter(slug__in=SLUGS_RESERVADOS).only('pk', 'slug', 'cnpj'):
+        loja.slug = f"{loja.slug}-{loja.cnpj}"
+        loja.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lojas', '0005_busca_endereco'),
+    ]
+
+    operations = [
+        migrations.RunPython(renomear_slugs_reservados, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,49 @@
-from django.db import models
+from django.db import models, router
+from django.utils.text import slugify
+
+from .cnpj import TAMANHO_CNPJ, validar_cnpj
+
+TAMANHO_SLUG = 50
+
+# Slugs que colidiriam com as rotas fixas de apps/lojas/urls.py (declaradas
+# antes de `<str:loja>/`) ou com subdomínios ignorados pelo LojaAtivaMiddleware
+SLUGS_RESERVADOS = frozenset({'buscar', 'exportar', 'www'})
+
+
+def preencher_slugs(lojas, queryset):
+    """
+    Define, a partir do nome, o slug das lojas que ainda não têm um. Em caso
+    de colisão com o banco (`queryset`), dentro do próprio lote ou com um
+    slug reservado (`SLUGS_RESERVADOS`), acrescenta o CNPJ ao slug. Faz uma
+    única consulta por chamada.
+    """
+    pendentes = [loja for loja in lojas if not loja.slug]
+    if not pendentes:
+        return
+    for loja in pendentes:
+        loja.slug = slugify(loja.nome_loja)[:TAMANHO_SLUG - TAMANHO_CNPJ - 1] or loja.cnpj
+
+    usados = set(queryset.filter(slug__in=[loja.slug for loja in pendentes]).values_list('slug', flat=True))
+    usados |= SLUGS_RESERVADOS
+    for loja in pendentes:
+        if loja.slug in usados:
+            loja.slug = f"{loja.slug}-{loja.cnpj}"
+        usados.add(loja.slug)
+
 
 class Loja(models.Model):
     nome_loja = models.CharField("Nome da Loja", max_length=255)
-    cnpj = models.CharField("CNPJ", max_length=20, unique=True)
+    cnpj = models.CharField("CNPJ", max_length=20, unique=True, validators=[validar_cnpj])  # Apenas os 14 dígitos
+    slug = models.SlugField("Slug", max_length=TAMANHO_SLUG, unique=True, blank=True)  # Subdomínio / URL da loja
     endereco = models.TextField("Endereço")
     telefone = models.CharField("Telefone", max_length=20, blank=True, null=True)
     criado_em = models.DateTimeField("Criado em", auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # Confere as colisões no banco de gravação, não em uma réplica atrasada
+        banco = kwargs.get('using') or router.db_for_write(Loja, instance=self)
+        preencher_slugs([self], Loja.objects.using(banco).exclude(pk=self.pk))
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.nome_loja
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .contexto import invalidar_loja
+from .models import Loja
+
+
+@receiver([post_save, post_delete], sender=Loja)
+def invalidar_cache_loja(sender, instance, using, **kwargs):
+    """
+    Descarta a resolução CNPJ/slug → id da loja criada, alterada ou removida,
+    após o commit (antes dele, uma requisição concorrente ainda não vê a loja
+    nova e a guardaria como inexistente).
+    """
+    transaction.on_commit(lambda: invalidar_loja(instance), using=using)
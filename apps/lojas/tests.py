@@ -1,3 +1,249 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import random
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.backends import _usuarios
+from apps.accounts.models import Usuario, UsuarioLoja
+
+from .busca import buscar_lojas
+from .cnpj import cnpj_valido, formatar_cnpj, normalizar_cnpj, validar_cnpj, validar_cnpjs_em_lote
+from .contexto import _inexistentes, _lojas, aresolver_loja_id, resolver_loja_id
+from .forms import CNPJField
+from .importacao import importar, ler_linhas
+from .models import Loja
+
+
+def _cnpj_referencia(base):
+    """
+    Completa 12 dígitos com os verificadores, pela regra da Receita Federal.
+    """
+    digitos = [int(digito) for digito in base]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(peso * digito for peso, digito in zip(pesos, digitos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return ''.join(map(str, digitos))
+
+
+class CNPJTests(SimpleTestCase):
+    def test_normalizacao_remove_pontuacao_e_espacos(self):
+        self.assertEqual(normalizar_cnpj('11.222.333/0001-81'), '11222333000181')
+        self.assertEqual(normalizar_cnpj(' 11 222 333 0001 81\n'), '11222333000181')
+        self.assertEqual(normalizar_cnpj('11222333000181'), '11222333000181')
+        self.assertEqual(normalizar_cnpj(None), '')
+        self.assertEqual(formatar_cnpj('11222333000181'), '11.222.333/0001-81')
+
+    def test_digitos_verificadores(self):
+        self.assertTrue(cnpj_valido('11222333000181'))
+        self.assertFalse(cnpj_valido('11222333000182'))  # Segundo dígito errado
+        self.assertFalse(cnpj_valido('11222333000191'))  # Primeiro dígito errado
+        self.assertFalse(cnpj_valido('1122233300018'))
+        self.assertFalse(cnpj_valido('112223330001811'))
+        self.assertFalse(cnpj_valido('1122233300018a'))
+        self.assertFalse(cnpj_valido('١١٢٢٢٣٣٣٠٠٠١٨١'))  # Dígitos não ASCII
+
+        rng = random.Random(14)
+        for _ in range(2000):
+            cnpj = _cnpj_referencia(f'{rng.randrange(10 ** 12):012d}')
+            self.assertEqual(cnpj_valido(cnpj), cnpj not in {str(d) * 14 for d in range(10)}, cnpj)
+
+    def test_digitos_repetidos_sao_rejeitados(self):
+        for digito in '0123456789':
+            with self.subTest(digito=digito):
+                self.assertFalse(cnpj_valido(digito * 14))
+        with self.assertRaises(ValidationError):
+            validar_cnpj('00.000.000/0000-00')
+
+    def test_validacao_em_lote_igual_a_individual(self):
+        rng = random.Random(42)
+        valores = ['', None, '11.222.333/0001-81', '11222333000182', '0' * 14, 'abc', '1122233300018']
+        for _ in range(2000):
+            cnpj = _cnpj_referencia(f'{rng.randrange(10 ** 12):012d}')
+            # Metade com um dígito trocado, parte com pontuação
+            if rng.random() < 0.5:
+                posicao = rng.randrange(14)
+                cnpj = cnpj[:posicao] + str((int(cnpj[posicao]) + 1) % 10) + cnpj[posicao + 1:]
+            valores.append(formatar_cnpj(cnpj) if rng.random() < 0.3 else cnpj)
+
+        esperado = [
+            normalizar_cnpj(valor) if cnpj_valido(normalizar_cnpj(valor)) else None for valor in valores
+        ]
+        self.assertEqual(validar_cnpjs_em_lote(valores), esperado)
+
+    def test_campo_do_formulario_retorna_os_14_digitos(self):
+        campo = CNPJField()
+        self.assertEqual(campo.clean('11.222.333/0001-81'), '11222333000181')
+        with self.assertRaises(ValidationError):
+            campo.clean('11.222.333/0001-82')
+
+
+class BuscaLojasTests(TestCase):
+    def test_loja_criada_aparece_na_busca_por_nome(self):
+        # No SQLite depende dos triggers FTS5, que migrações que recriam a
+        # tabela lojas_loja precisam restaurar
+        loja = Loja.objects.create(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua A')
+        self.assertEqual(list(buscar_lojas('Pada')), [loja])
+
+    def test_busca_pelo_inicio_de_cada_palavra_do_nome_ou_endereco(self):
+        padaria = Loja.objects.create(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua das Flores, 10')
+        mercado = Loja.objects.create(nome_loja='Mercado Bom Preço', cnpj='11444777000161', endereco='Avenida Central')
+        self.assertEqual(list(buscar_lojas('cen pad')), [padaria])
+        self.assertEqual(list(buscar_lojas('central')), [mercado, padaria])
+        self.assertEqual(list(buscar_lojas('flor')), [padaria])
+        self.assertEqual(list(buscar_lojas('rua, padaria')), [padaria])
+        self.assertEqual(list(buscar_lojas('adaria')), [])
+        self.assertEqual(list(buscar_lojas('!!')), [])
+
+    def test_busca_por_cnpj(self):
+        loja = Loja.objects.create(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua A')
+        self.assertEqual(list(buscar_lojas('11.222.333/0001-81')), [loja])
+        self.assertEqual(list(buscar_lojas('112223')), [loja])
+
+    def test_triggers_de_busca_existem(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Triggers FTS5 existem apenas no SQLite.")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'lojas_loja_fts_%'")
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+
+class SlugTests(TestCase):
+    def test_slug_reservado_recebe_o_cnpj(self):
+        for nome, cnpj in (('Buscar', '11222333000181'), ('Exportar', '11444777000161')):
+            with self.subTest(nome=nome):
+                loja = Loja.objects.create(nome_loja=nome, cnpj=cnpj, endereco='Rua A')
+                self.assertEqual(loja.slug, f'{nome.lower()}-{loja.cnpj}')
+                self.assertEqual(self.client.get(f'/lojas/{loja.slug}/').resolver_match.url_name, 'store')
+
+
+class ResolverLojaTests(TestCase):
+    def setUp(self):
+        _lojas.clear()
+        _inexistentes.clear()
+
+    def test_identificador_inexistente_consulta_o_banco_uma_vez(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(resolver_loja_id('nao-existe'))
+            self.assertIsNone(resolver_loja_id('nao-existe'))
+
+        # Passado LOJA_CACHE_TTL_NEGATIVO, o banco volta a ser consultado
+        agora = time.monotonic()
+        with mock.patch('core.cache.time.monotonic', return_value=agora + 3600), self.assertNumQueries(1):
+            self.assertIsNone(resolver_loja_id('nao-existe'))
+
+    async def test_identificador_inexistente_no_modo_assincrono(self):
+        self.assertIsNone(await aresolver_loja_id('nao-existe'))
+        self.assertTrue(_inexistentes.get(('slug', 'nao-existe')))
+
+    def test_loja_criada_deixa_de_ser_inexistente(self):
+        self.assertIsNone(resolver_loja_id('padaria-central'))
+        with self.captureOnCommitCallbacks(execute=True):
+            loja = Loja.objects.create(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua A')
+        self.assertEqual(resolver_loja_id('padaria-central'), loja.pk)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportacaoTests(TestCase):
+    def test_linhas_jsonl_malformadas_sao_registradas_como_erro(self):
+        valida = {
+            'nome': 'Maria', 'email': 'maria@exemplo.com', 'nome_loja': 'Padaria Central',
+            'cnpj': '11.222.333/0001-81', 'endereco': 'Rua A, 10', 'telefone': '3133334444',
+        }
+        arquivo = io.StringIO('\n'.join(['{"nome": "Jo', '[1, 2]', json.dumps(valida), '']))
+        erros = {}
+
+        totais = importar(ler_linhas(arquivo, 'jsonl'), ao_erro=erros.__setitem__)
+
+        self.assertEqual((totais['linhas'], totais['invalidas'], totais['lojas']), (3, 2, 1))
+        self.assertEqual(sorted(erros), [1, 2])
+        self.assertIn('JSON inválido', erros[1]['json'][0])
+        self.assertTrue(Loja.objects.filter(cnpj='11222333000181').exists())
+
+    def test_linhas_sem_senha_nao_calculam_hash(self):
+        linhas = [(1, {
+            'nome': 'Maria', 'email': 'maria@exemplo.com', 'nome_loja': 'Padaria Central',
+            'cnpj': '11.222.333/0001-81', 'endereco': 'Rua A, 10', 'telefone': '3133334444',
+        })]
+        with mock.patch('apps.lojas.importacao.make_password') as make_password, \
+                self.captureOnCommitCallbacks() as callbacks:
+            importar(linhas)
+
+        self.assertFalse(make_password.called)
+        self.assertFalse(Usuario.objects.get().has_usable_password())
+        # O cache de vínculos só é invalidado após o commit
+        self.assertEqual(len(callbacks), 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ExportacaoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.equipe = Usuario.objects.create_user('equipe@exemplo.com', 'Equipe', is_staff=True)
+
+    def setUp(self):
+        _usuarios.clear()
+        self.client.force_login(self.equipe)
+
+    def _criar(self, inicio, total):
+        for numero in range(inicio, inicio + total):
+            loja = Loja.objects.create(nome_loja=f'Loja {numero}', cnpj=f'{numero:014d}', endereco='Rua A')
+            usuario = Usuario.objects.create(email=f'usuario{numero}@exemplo.com', nome=f'Usuário {numero}')
+            UsuarioLoja.objects.create(usuario=usuario, loja=loja)
+
+    def _baixar(self, **parametros):
+        resposta = self.client.get('/lojas/exportar/', parametros)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta, b''.join(resposta.streaming_content).decode()
+
+    def test_csv_de_lojas(self):
+        self._criar(1, 2)
+        resposta, conteudo = self._baixar(tipo='lojas', formato='csv')
+        self.assertEqual(resposta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(resposta['Content-Disposition'], 'attachment; filename="lojas.csv"')
+
+        linhas = list(csv.reader(io.StringIO(conteudo)))
+        self.assertEqual(linhas[0], ['id', 'nome_loja', 'cnpj', 'endereco', 'telefone', 'criado_em'])
+        self.assertEqual([linha[1:4] for linha in linhas[1:]], [
+            ['Loja 1', '00000000000001', 'Rua A'], ['Loja 2', '00000000000002', 'Rua A'],
+        ])
+
+    def test_jsonl_de_vinculos(self):
+        self._criar(1, 2)
+        _, conteudo = self._baixar(tipo='vinculos', formato='jsonl')
+        registros = [json.loads(linha) for linha in conteudo.splitlines()]
+        self.assertEqual(
+            [(registro['usuario_email'], registro['nome_loja'], registro['cnpj']) for registro in registros],
+            [('usuario1@exemplo.com', 'Loja 1', '00000000000001'),
+             ('usuario2@exemplo.com', 'Loja 2', '00000000000002')],
+        )
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/lojas/exportar/', {'tipo': 'senhas'}).status_code, 400)
+        self.assertEqual(self.client.get('/lojas/exportar/', {'formato': 'xlsx'}).status_code, 400)
+
+    def test_apenas_equipe(self):
+        self.client.force_login(Usuario.objects.create_user('maria@exemplo.com', 'Maria'))
+        resposta = self.client.get('/lojas/exportar/')
+        self.assertEqual(resposta.status_code, 302)
+        self.assertIn('/admin/login/', resposta['Location'])
+
+    def test_consultas_nao_dependem_do_numero_de_linhas(self):
+        def consultas(tipo):
+            with CaptureQueriesContext(connection) as capturadas:
+                self._baixar(tipo=tipo, formato='csv')
+            return len(capturadas)
+
+        self._criar(1, 2)
+        self._baixar(tipo='lojas', formato='csv')  # Aquece o cache do usuário (get_user)
+        esperado = {tipo: consultas(tipo) for tipo in ('lojas', 'vinculos')}
+        self._criar(3, 40)
+        for tipo, total in esperado.items():
+            with self.subTest(tipo=tipo), self.assertNumQueries(total):
+                self._baixar(tipo=tipo, formato='csv')
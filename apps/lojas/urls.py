@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'lojas'
+
+urlpatterns = [
+    path('buscar/', views.buscar, name='buscar'),
+    path('exportar/', views.exportar_dados, name='exportar'),
+    path('<str:loja>/', views.store, name='store'),  # CNPJ ou slug
+]
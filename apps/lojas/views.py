@@ -1,5 +1,52 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 
-# Create your views here.
-def store(request):
-    pass
+from apps.accounts.models import UsuarioLoja
+
+from .busca import buscar_lojas
+from .contexto import loja_obrigatoria
+from .exportacao import COLUNAS, FORMATOS, exportar
+from .models import Loja
+
+
+@login_required
+@loja_obrigatoria
+def store(request, loja):
+    """
+    Resumo da loja ativa, acessível apenas aos usuários vinculados a ela.
+    """
+    dados = Loja.objects.filter(pk=request.loja_id).values('id', 'nome_loja', 'cnpj', 'slug').get()
+    dados['usuarios'] = UsuarioLoja.da_loja.count()
+    return JsonResponse(dados)
+
+
+@staff_member_required
+def exportar_dados(request):
+    """
+    Exporta lojas ou vínculos (`?tipo=lojas|vinculos&formato=csv|jsonl`) como
+    download, transmitido em partes sem carregar a tabela inteira.
+    """
+    tipo = request.GET.get('tipo', 'lojas')
+    formato = request.GET.get('formato', 'csv')
+    if tipo not in COLUNAS or formato not in FORMATOS:
+        return HttpResponseBadRequest("Parâmetros de exportação inválidos.")
+
+    resposta = StreamingHttpResponse(exportar(tipo, formato), content_type=FORMATOS[formato])
+    resposta['Content-Disposition'] = f'attachment; filename="{tipo}.{formato}"'
+    return resposta
+
+
+@login_required
+def buscar(request):
+    """
+    Busca lojas por CNPJ (completo ou prefixo) ou pelo início das palavras do
+    nome ou do endereço (`?q=`).
+    """
+    try:
+        limite = min(int(request.GET.get('limite', 20)), 100)
+    except ValueError:
+        return HttpResponseBadRequest("Limite inválido.")
+
+    lojas = buscar_lojas(request.GET.get('q', ''), limite).values('id', 'nome_loja', 'cnpj')
+    return JsonResponse({'resultados': list(lojas)})
@@ -0,0 +1,93 @@
+"""
+Busca de lojas por prefixo de nome e de CNPJ.
+
+Popula um banco de teste descartável com N lojas sintéticas e mede a
+latência de `apps.lojas.busca.buscar_lojas` para prefixos de nome e de CNPJ,
+mostrando o plano de execução de cada tipo de busca.
+
+Uso:
+    python benchmarks/busca_lojas.py [--lojas 500000] [--buscas 1000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from apps.lojas.busca import buscar_lojas  # noqa: E402
+from apps.lojas.models import Loja, preencher_slugs  # noqa: E402
+
+LOTE = 10_000
+PALAVRAS = [
+    'Mercado', 'Farmácia', 'Padaria', 'Auto', 'Peças', 'Moda', 'Casa', 'Construção',
+    'Pet', 'Shop', 'Central', 'Bom', 'Preço', 'Sabor', 'Estrela', 'Norte', 'Sul', 'Express',
+]
+
+
+def nome_aleatorio(rng):
+    return ' '.join(rng.sample(PALAVRAS, 3)) + f' {rng.randrange(10_000)}'
+
+
+def popular(total, rng):
+    inicio = time.perf_counter()
+    for base in range(0, total, LOTE):
+        lojas = [
+            Loja(nome_loja=nome_aleatorio(rng), cnpj=f'{i:014d}', endereco='Rua Exemplo, 100')
+            for i in range(base, min(base + LOTE, total))
+        ]
+        # bulk_create não passa por Loja.save(): o slug (único) é preenchido aqui
+        preencher_slugs(lojas, Loja.objects.all())
+        Loja.objects.bulk_create(lojas)
+    print(f"{total:,} lojas inseridas em {time.perf_counter() - inicio:.1f}s")
+
+
+def medir(descricao, termos):
+    tempos = []
+    for termo in termos:
+        inicio = time.perf_counter()
+        list(buscar_lojas(termo))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    print(
+        f"{descricao:<16} mediana {statistics.median(tempos):7.2f} ms   "
+        f"p95 {tempos[int(len(tempos) * 0.95) - 1]:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lojas', type=int, default=500_000)
+    parser.add_argument('--buscas', type=int, default=1000)
+    opcoes = parser.parse_args()
+    rng = random.Random(42)
+
+    nome_banco = connection.creation.create_test_db(verbosity=0)
+    try:
+        popular(opcoes.lojas, rng)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        print(f"\nPlano nome ({connection.vendor}):\n{buscar_lojas('Merc').explain()}")
+        print(f"Plano CNPJ ({connection.vendor}):\n{buscar_lojas('0000012').explain()}\n")
+
+        medir("prefixo de nome", [rng.choice(PALAVRAS)[:rng.randint(3, 6)] for _ in range(opcoes.buscas)])
+        medir("prefixo de CNPJ", [f'{rng.randrange(opcoes.lojas):014d}'[:10] for _ in range(opcoes.buscas)])
+        medir("CNPJ completo", [f'{rng.randrange(opcoes.lojas):014d}' for _ in range(opcoes.buscas)])
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Vazão da validação de CNPJ.
+
+Gera N CNPJs sintéticos (metade válidos, metade com dígito verificador
+errado; metade formatados, metade só dígitos) e compara a validação em lote
+(`validar_cnpjs_em_lote`) com a validação item a item pelo validador do
+Django (`validar_cnpj`, que levanta `ValidationError`).
+
+Uso:
+    python benchmarks/cnpj.py [--quantidade 2000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.exceptions import ValidationError  # noqa: E402
+
+from apps.lojas.cnpj import formatar_cnpj, normalizar_cnpj, validar_cnpj, validar_cnpjs_em_lote  # noqa: E402
+
+
+def _digito(base, pesos):
+    resto = sum(int(d) * p for d, p in zip(base, pesos)) % 11
+    return str(0 if resto < 2 else 11 - resto)
+
+
+def gerar(quantidade, rng):
+    pesos_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+    valores = []
+    for i in range(quantidade):
+        base = f'{rng.randrange(10**8):08d}{rng.randrange(1, 10**4):04d}'
+        base += _digito(base, pesos_1)
+        cnpj = base + _digito(base, (6,) + pesos_1)
+        if i % 2:
+            cnpj = cnpj[:-1] + str((int(cnpj[-1]) + 1) % 10)
+        valores.append(formatar_cnpj(cnpj) if i % 4 < 2 else cnpj)
+    return valores
+
+
+def item_a_item(valores):
+    resultado = []
+    for valor in valores:
+        try:
+            validar_cnpj(valor)
+        except ValidationError:
+            resultado.append(None)
+        else:
+            resultado.append(normalizar_cnpj(valor))
+    return resultado
+
+
+def medir(descricao, funcao, valores):
+    inicio = time.perf_counter()
+    resultado = funcao(valores)
+    segundos = time.perf_counter() - inicio
+    print(f"{descricao:<24} {len(valores) / segundos:>14,.0f} validações/s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quantidade', type=int, default=2_000_000)
+    valores = gerar(parser.parse_args().quantidade, random.Random(42))
+
+    em_lote = medir("validar_cnpjs_em_lote", validar_cnpjs_em_lote, valores)
+    individual = medir("validar_cnpj (item a item)", item_a_item, valores)
+    assert em_lote == individual
+    print(f"Válidos: {sum(valor is not None for valor in em_lote):,} de {len(valores):,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Requisições por segundo com e sem reaproveitamento de conexões ao PostgreSQL.
+
+Para cada modo, sobe a aplicação WSGI em um servidor local com threads (em um
+subprocesso, com as variáveis de ambiente do modo) e dispara requisições
+concorrentes em /saude/detalhada/, que consulta o banco a cada chamada:
+- sem_persistencia: DB_CONN_MAX_AGE=0, uma conexão nova por requisição;
+- persistente: DB_CONN_MAX_AGE=60, uma conexão reaproveitada por thread;
+- pool: DB_POOL=True, pool nativo do psycopg 3.
+
+Requer um PostgreSQL local configurado pelas variáveis DB_* (DEBUG=False) e,
+para o modo pool, o extra "postgres".
+
+Uso:
+    python benchmarks/conexoes_db.py [--segundos 10] [--concorrencia 8]
+"""
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+MODOS = {
+    'sem_persistencia': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'},
+    'persistente': {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'False'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+class _Servidor(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _SemLog(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def executar_modo(segundos, concorrencia):
+    """
+    Roda no subprocesso: serve a aplicação e mede as requisições por segundo.
+    """
+    sys.path.insert(0, str(RAIZ))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    from django.core.wsgi import get_wsgi_application
+
+    servidor = make_server('127.0.0.1', 0, get_wsgi_application(), server_class=_Servidor, handler_class=_SemLog)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = urllib.request.Request(
+        f"http://127.0.0.1:{servidor.server_port}/saude/detalhada/",
+        headers={'X-Saude-Token': os.environ['SAUDE_TOKEN']},
+    )
+
+    urllib.request.urlopen(url).read()  # Aquecimento
+    contagem = [0] * concorrencia
+    falhas = [0] * concorrencia
+    fim = time.perf_counter() + segundos
+
+    def cliente(indice):
+        while time.perf_counter() < fim:
+            try:
+                urllib.request.urlopen(url).read()
+                contagem[indice] += 1
+            except OSError:
+                falhas[indice] += 1
+
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    servidor.shutdown()
+    print(f"{sum(contagem) / segundos:.1f} {sum(falhas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--modo', choices=MODOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.segundos, args.concorrencia)
+        return
+
+    for modo, variaveis in MODOS.items():
+        ambiente = {**os.environ, 'ALLOWED_HOSTS': '127.0.0.1', 'SAUDE_TOKEN': secrets.token_urlsafe(), **variaveis}
+        resultado = subprocess.run(
+            [sys.executable, __file__, '--modo', modo,
+             '--segundos', str(args.segundos), '--concorrencia', str(args.concorrencia)],
+            env=ambiente, capture_output=True, text=True,
+        )
+        if resultado.returncode:
+            print(f"{modo:<18} falhou: {resultado.stderr.strip().splitlines()[-1]}")
+            continue
+        por_segundo, falhas = resultado.stdout.split()
+        print(f"{modo:<18} {float(por_segundo):10.1f} req/s   {falhas} falha(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Custo de logging na thread da requisição: gravação direta x fila em lotes.
+
+Mede o tempo por chamada de `logger.info` (do ponto de vista de quem loga)
+com o `RotatingFileHandler` síncrono e com `HandlerFila` + `OuvinteEmLotes`
+(core.logs), em uma e em várias threads, e o custo de uma mensagem abaixo do
+nível configurado com f-string x formatação `%` preguiçosa.
+
+Uso:
+    python benchmarks/logging_requisicao.py [--registros 20000] [--threads 8]
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.logs import ArquivoEmLotes, FormatadorJSON, HandlerFila, OuvinteEmLotes  # noqa: E402
+
+
+def criar_logger(nome, handler):
+    logger = logging.getLogger(f'benchmark.{nome}')
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def medir(logger, registros, threads):
+    por_thread = registros // threads
+
+    def logar():
+        for numero in range(por_thread):
+            logger.info("Usuário %s logado com sucesso.", numero, extra={'loja': 1})
+
+    inicio = time.perf_counter()
+    trabalhadores = [threading.Thread(target=logar) for _ in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    return (time.perf_counter() - inicio) / (por_thread * threads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--registros', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        def arquivo(nome):
+            handler = ArquivoEmLotes(os.path.join(diretorio, nome), maxBytes=10 * 1024 * 1024, backupCount=2)
+            handler.setFormatter(FormatadorJSON())
+            return handler
+
+        direto = criar_logger('direto', arquivo('direto.log'))
+        ouvinte = OuvinteEmLotes(queue.Queue(), arquivo('fila.log'), respect_handler_level=True)
+        handler_fila = HandlerFila(ouvinte.queue)
+        handler_fila.listener = ouvinte  # Como o dictConfig faz: inicia no primeiro registro
+        fila = criar_logger('fila', handler_fila)
+
+        for threads in (1, args.threads):
+            tempo_direto = medir(direto, args.registros, threads)
+            tempo_fila = medir(fila, args.registros, threads)
+            print(
+                f"{threads} thread(s): arquivo {tempo_direto:6.2f} µs/chamada   "
+                f"fila {tempo_fila:6.2f} µs/chamada   ({tempo_direto / tempo_fila:.1f}x)"
+            )
+
+        inicio = time.perf_counter()
+        ouvinte.stop()
+        print(f"esvaziar a fila ao encerrar: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        email = 'usuario@exemplo.com'
+        inicio = time.perf_counter()
+        for _ in range(args.registros):
+            direto.debug(f"Usuário {email} logado com sucesso.")
+        tempo_f = (time.perf_counter() - inicio) / args.registros * 1e6
+        inicio = time.perf_counter()
+        for _ in range(args.registros):
+            direto.debug("Usuário %s logado com sucesso.", email)
+        tempo_pct = (time.perf_counter() - inicio) / args.registros * 1e6
+        print(f"debug descartado: f-string {tempo_f:.3f} µs   % preguiçoso {tempo_pct:.3f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Latência do `authenticate` nos caminhos de acerto e de erro.
+
+Roda em um banco de teste descartável e mede:
+- acerto: e-mail e senha corretos;
+- senha errada: e-mail cadastrado, senha incorreta;
+- e-mail inexistente: nenhum usuário encontrado (hash fictício).
+
+Os três caminhos devem ter latência parecida; a diferença entre eles indica
+quanto o tempo de resposta revela sobre os e-mails cadastrados.
+
+Uso:
+    python benchmarks/login.py [--repeticoes 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import authenticate  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from apps.accounts.models import Usuario  # noqa: E402
+
+
+def medir(descricao, credenciais, repeticoes):
+    tempos = []
+    with CaptureQueriesContext(connection) as consultas:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            authenticate(None, **credenciais)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    print(
+        f"{descricao:<20} mediana {statistics.median(tempos):8.2f} ms   "
+        f"p95 {sorted(tempos)[int(len(tempos) * 0.95) - 1]:8.2f} ms   "
+        f"{len(consultas) / repeticoes:.1f} consulta(s)/login"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    repeticoes = parser.parse_args().repeticoes
+
+    nome_banco = connection.creation.create_test_db(verbosity=0)
+    try:
+        Usuario.objects.create_user('bench@exemplo.com', 'Bench', password='senha-correta')
+        medir("acerto", {'username': 'Bench@Exemplo.com', 'password': 'senha-correta'}, repeticoes)
+        medir("senha errada", {'username': 'bench@exemplo.com', 'password': 'errada'}, repeticoes)
+        medir("e-mail inexistente", {'username': 'ninguem@exemplo.com', 'password': 'errada'}, repeticoes)
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Logins concorrentes por segundo: views síncronas no WSGI x assíncronas no ASGI.
+
+Para cada modo, sobe a aplicação em um subprocesso e dispara logins
+concorrentes em /login/ (cada um verifica um hash de senha):
+- wsgi: servidor WSGI local com threads, CONTAS_VIEWS_ASYNC=False;
+- asgi: uvicorn (core/asgi.py), CONTAS_VIEWS_ASYNC=True, hashes no pool de
+  `PASSWORD_HASH_THREADS` threads.
+
+As tentativas usam uma senha errada (o custo do hash é o mesmo do login
+correto) e o limite de tentativas é desligado no subprocesso. Usa o banco
+configurado (com DEBUG=True, o SQLite local), onde cria o usuário de teste.
+O modo asgi requer o extra "asgi" (uvicorn).
+
+Uso:
+    python benchmarks/login_concorrente.py [--segundos 10] [--concorrencia 16]
+"""
+
+import argparse
+import http.cookiejar
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+RAIZ = Path(__file__).resolve().parent.parent
+EMAIL = 'benchmark.login@exemplo.com'
+
+MODOS = {
+    'wsgi': {'CONTAS_VIEWS_ASYNC': 'False'},
+    'asgi': {'CONTAS_VIEWS_ASYNC': 'True'},
+}
+
+
+class _Servidor(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _SemLog(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _servir_wsgi():
+    from django.core.wsgi import get_wsgi_application
+
+    servidor = make_server('127.0.0.1', 0, get_wsgi_application(), server_class=_Servidor, handler_class=_SemLog)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor.server_port, servidor.shutdown
+
+
+def _servir_asgi():
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        porta = sock.getsockname()[1]
+    servidor = uvicorn.Server(uvicorn.Config(
+        'core.asgi:application', host='127.0.0.1', port=porta, lifespan='off', log_level='warning',
+    ))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+
+    def encerrar():
+        servidor.should_exit = True
+    return porta, encerrar
+
+
+def _preparar_usuario():
+    from django.core.management import call_command
+
+    from apps.accounts.models import Usuario
+
+    call_command('migrate', verbosity=0)
+    if not Usuario.objects.filter(email=EMAIL).exists():
+        Usuario.objects.create_user(EMAIL, 'Benchmark', password='Senha@Correta1')
+
+
+def executar_modo(modo, segundos, concorrencia):
+    """
+    Roda no subprocesso: serve a aplicação e mede os logins por segundo.
+    """
+    sys.path.insert(0, str(RAIZ))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    import django
+
+    django.setup()
+    _preparar_usuario()
+    porta, encerrar = _servir_asgi() if modo == 'asgi' else _servir_wsgi()
+    url = f"http://127.0.0.1:{porta}/login/"
+
+    def novo_cliente():
+        cookies = http.cookiejar.CookieJar()
+        cliente = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+        cliente.open(url).read()
+        csrf = next(cookie.value for cookie in cookies if cookie.name == 'csrftoken')
+        dados = urllib.parse.urlencode({'email': EMAIL, 'senha': 'errada', 'csrfmiddlewaretoken': csrf}).encode()
+        return cliente, dados
+
+    novo_cliente()  # Aquecimento
+    contagem = [0] * concorrencia
+    falhas = [0] * concorrencia
+    fim = time.perf_counter() + segundos
+
+    def logar(indice):
+        cliente, dados = novo_cliente()
+        while time.perf_counter() < fim:
+            try:
+                cliente.open(url, dados).read()
+                contagem[indice] += 1
+            except OSError:
+                falhas[indice] += 1
+
+    threads = [threading.Thread(target=logar, args=(i,)) for i in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    encerrar()
+    print(f"{sum(contagem) / segundos:.1f} {sum(falhas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--modo', choices=MODOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo, args.segundos, args.concorrencia)
+        return
+
+    for modo, variaveis in MODOS.items():
+        ambiente = {
+            **os.environ, 'ALLOWED_HOSTS': '127.0.0.1',
+            'LOGIN_RATELIMIT_POR_EMAIL': '1000000000', 'LOGIN_RATELIMIT_POR_IP': '1000000000', **variaveis,
+        }
+        resultado = subprocess.run(
+            [sys.executable, __file__, '--modo', modo,
+             '--segundos', str(args.segundos), '--concorrencia', str(args.concorrencia)],
+            env=ambiente, capture_output=True, text=True,
+        )
+        if resultado.returncode:
+            print(f"{modo:<6} falhou: {resultado.stderr.strip().splitlines()[-1]}")
+            continue
+        por_segundo, falhas = resultado.stdout.split()
+        print(f"{modo:<6} {float(por_segundo):10.1f} logins/s   {falhas} falha(s)")
+
+
+if __name__ == '__main__':
+    main()
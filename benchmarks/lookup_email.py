@@ -0,0 +1,70 @@
+"""
+Busca de usuário por e-mail sem diferenciar maiúsculas/minúsculas.
+
+Popula um banco de teste descartável com N usuários sintéticos, mostra o
+plano de execução da consulta usada pelo `EmailBackend` (deve usar o índice
+`usuario_email_lower_unique`, tanto no SQLite quanto no PostgreSQL) e mede a
+latência das buscas.
+
+Uso:
+    python benchmarks/lookup_email.py [--usuarios 1000000] [--buscas 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from apps.accounts.models import Usuario  # noqa: E402
+
+LOTE = 10_000
+
+
+def popular(total):
+    senha = make_password(None)  # Mesmo hash inutilizável para todos: o foco é a busca
+    inicio = time.perf_counter()
+    for base in range(0, total, LOTE):
+        Usuario.objects.bulk_create(
+            Usuario(nome=f"Usuário {i}", email=f"usuario{i}@exemplo.com", password=senha)
+            for i in range(base, min(base + LOTE, total))
+        )
+    print(f"{total:,} usuários inseridos em {time.perf_counter() - inicio:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=1_000_000)
+    parser.add_argument('--buscas', type=int, default=10_000)
+    opcoes = parser.parse_args()
+
+    nome_banco = connection.creation.create_test_db(verbosity=0)
+    try:
+        popular(opcoes.usuarios)
+
+        consulta = Usuario.objects.filter(email__lower='usuario42@exemplo.com').values('pk')
+        print(f"\nPlano ({connection.vendor}):\n{consulta.explain()}\n")
+
+        emails = [f"Usuario{random.randrange(opcoes.usuarios)}@Exemplo.com" for _ in range(opcoes.buscas)]
+        inicio = time.perf_counter()
+        for email in emails:
+            Usuario.objects.filter(email__lower=email.lower()).first()
+        segundos = time.perf_counter() - inicio
+        print(f"{opcoes.buscas:,} buscas: {segundos / opcoes.buscas * 1e6:.0f} µs por busca")
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
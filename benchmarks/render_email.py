@@ -0,0 +1,58 @@
+"""
+Micro-benchmark da renderização dos e-mails transacionais.
+
+Compara `render_to_string` (template completo a cada envio) com o
+`TemplateEmail` pré-compilado de `apps.accounts.emails`.
+
+Uso:
+    python benchmarks/render_email.py [--iteracoes 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.template.loader import render_to_string  # noqa: E402
+
+from apps.accounts.emails import TemplateEmail  # noqa: E402
+
+CONTEXTO = {
+    'client_name': 'Maria <Loja & Cia>',
+    'confirm_url': 'http://localhost:8000/confirmar-email/42/abc-123/',
+    'year': 2025,
+}
+
+
+def medir(descricao, funcao, iteracoes):
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        funcao()
+    segundos = time.perf_counter() - inicio
+    print(f"{descricao:<28} {iteracoes / segundos:>12,.0f} renders/s")
+    return segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iteracoes', type=int, default=20000)
+    iteracoes = parser.parse_args().iteracoes
+
+    compilado = TemplateEmail('accounts/confirmacao_email.html', sorted(CONTEXTO))
+    assert compilado.renderizar(CONTEXTO) == render_to_string('accounts/confirmacao_email.html', CONTEXTO)
+
+    antes = medir("render_to_string", lambda: render_to_string('accounts/confirmacao_email.html', CONTEXTO), iteracoes)
+    depois = medir("TemplateEmail.renderizar", lambda: compilado.renderizar(CONTEXTO), iteracoes)
+    print(f"Ganho: {antes / depois:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
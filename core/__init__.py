@@ -0,0 +1,8 @@
+# Carrega o app do Celery junto com o Django, para que `shared_task` o utilize.
+# O Celery é opcional (extra "celery"); sem ele, celery_app fica None.
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -0,0 +1,18 @@
+"""
+App do Celery do projeto.
+
+Configurado pelas variáveis `CELERY_*` de core/settings.py; as tasks são
+descobertas nos módulos `tasks.py` dos apps. Worker:
+
+    celery -A core worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+app = Celery('core')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,89 @@
+"""
+Armazenamento dos arquivos estáticos
+------------------------------------
+`ArmazenamentoEstatico` é o `CompressedManifestStaticFilesStorage` do
+WhiteNoise (nomes com hash + variantes .br e .gz geradas no `collectstatic`)
+com a compressão distribuída em processos, em vez de threads, e um relatório
+dos bytes economizados por arquivo em `STATIC_ROOT/compressao.json`
+(exibido por `python manage.py relatorio_estaticos`).
+
+Os arquivos com hash são servidos pelo `WhiteNoiseMiddleware` com
+`Cache-Control: max-age=315360000, public, immutable`.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+NOME_RELATORIO = 'compressao.json'
+
+
+def _comprimir(caminho, extensoes):
+    """
+    Executado nos processos do pool: gera as variantes comprimidas de um
+    arquivo e retorna os tamanhos `(original, {sufixo: tamanho})`.
+    """
+    comprimidos = Compressor(extensions=extensoes, quiet=True).compress(caminho)
+    tamanhos = {os.path.splitext(comprimido)[1]: os.path.getsize(comprimido) for comprimido in comprimidos}
+    return os.path.getsize(caminho), tamanhos
+
+
+class ArmazenamentoEstatico(CompressedManifestStaticFilesStorage):
+    """
+    Referências quebradas em CSS de terceiros (arquivos que não existem no
+    projeto) são mantidas como estão, em vez de interromper o `collectstatic`,
+    e listadas no relatório.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.referencias_quebradas = set()
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def converter_tolerante(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError:
+                self.referencias_quebradas.add(f"{name}: {matchobj['url']}")
+                return matchobj['matched']
+        return converter_tolerante
+
+    def compress_files(self, paths):
+        extensoes = getattr(settings, 'WHITENOISE_SKIP_COMPRESS_EXTENSIONS', None)
+        self.compressor = self.create_compressor(extensions=extensoes, quiet=True)
+        nomes = sorted(nome for nome in paths if self.compressor.should_compress(nome))
+
+        relatorio = {}
+        with ProcessPoolExecutor(max_workers=settings.ESTATICOS_PROCESSOS or None) as pool:
+            resultados = pool.map(
+                _comprimir, [self.path(nome) for nome in nomes], [extensoes] * len(nomes), chunksize=16,
+            )
+            for nome, (original, tamanhos) in zip(nomes, resultados):
+                relatorio[nome] = {'original': original, **{sufixo[1:]: tamanho for sufixo, tamanho in tamanhos.items()}}
+                for sufixo in tamanhos:
+                    yield nome, nome + sufixo
+
+        self._gravar_relatorio(relatorio)
+
+    def _gravar_relatorio(self, relatorio):
+        with open(self.path(NOME_RELATORIO), 'w', encoding='utf-8') as arquivo:
+            json.dump(
+                {'arquivos': relatorio, 'referencias_quebradas': sorted(self.referencias_quebradas)},
+                arquivo, indent=1, sort_keys=True,
+            )
+
+
+def ler_relatorio():
+    """
+    Relatório do último `collectstatic`: `{'arquivos': {arquivo: {'original',
+    'br', 'gz'}}, 'referencias_quebradas': [...]}` (as variantes ausentes não
+    compensaram a compressão).
+    """
+    with open(os.path.join(settings.STATIC_ROOT, NOME_RELATORIO), encoding='utf-8') as arquivo:
+        return json.load(arquivo)
@@ -0,0 +1,194 @@
+"""
+Logging estruturado e fora da thread da requisição
+--------------------------------------------------
+- `FormatadorJSON`: uma linha JSON por registro.
+- `HandlerFila` + `OuvinteEmLotes`: a requisição apenas coloca o registro em
+  uma fila (limitada; registros excedentes são descartados e contados); uma
+  thread em segundo plano o formata e grava no arquivo em lotes, com uma única
+  escrita (e verificação de rotação) por lote. A thread só é iniciada no
+  primeiro registro de cada processo, de modo que servidores que carregam a
+  aplicação e depois fazem fork (gunicorn --preload) tenham uma thread viva em
+  cada worker.
+
+Configurado em `LOGGING` (core/settings.py) quando `LOG_MODO = 'fila'`.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+# Atributos padrão de LogRecord; os demais (passados em `extra=`) vão para o JSON
+_ATRIBUTOS_PADRAO = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Formata o registro como um objeto JSON em uma linha, incluindo os campos
+    passados em `extra=`.
+    """
+
+    def format(self, record):
+        dados = {
+            'momento': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+        }
+        dados.update({chave: valor for chave, valor in vars(record).items() if chave not in _ATRIBUTOS_PADRAO})
+        if record.exc_info:
+            dados['excecao'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['excecao'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class ArquivoEmLotes(logging.handlers.RotatingFileHandler):
+    """
+    `RotatingFileHandler` que também aceita gravar vários registros de uma vez
+    (`emitir_lote`), usado por `OuvinteEmLotes`.
+    """
+
+    def emitir_lote(self, registros):
+        registros = [registro for registro in registros if self.filter(registro)]
+        if not registros:
+            return
+        try:
+            texto = ''.join(self.format(registro) + self.terminator for registro in registros)
+        except Exception:
+            for registro in registros:
+                self.handleError(registro)
+            return
+
+        with self.lock:
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                # Uma única verificação de rotação por lote
+                posicao = self.stream.tell()
+                # maxBytes e tell() contam bytes; o texto é medido já codificado
+                tamanho = len(texto.encode(self.stream.encoding))
+                if self.maxBytes > 0 and posicao and posicao + tamanho >= self.maxBytes:
+                    self.doRollover()
+                self.stream.write(texto)
+                self.stream.flush()
+            except Exception:
+                self.handleError(registros[-1])
+
+
+class HandlerFila(logging.handlers.QueueHandler):
+    """
+    Coloca o registro na fila sem formatá-lo por completo: apenas a mensagem é
+    interpolada (os argumentos podem mudar depois); o formato final (ex.: JSON)
+    é aplicado pela thread do `OuvinteEmLotes`.
+
+    Ao contrário do `QueueHandler`, não copia o registro: a interpolação não
+    altera a mensagem vista pelos demais handlers.
+
+    Inicia o ouvinte do processo atual antes de enfileirar. Com a fila cheia
+    (gravação mais lenta que a produção de registros), o registro é descartado
+    e contado em `descartados`, em vez de bloquear a requisição.
+    """
+
+    descartados = 0
+
+    def emit(self, record):
+        if self.listener is not None:
+            self.queue = self.listener.iniciar_no_processo()
+        super().emit(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class OuvinteEmLotes(logging.handlers.QueueListener):
+    """
+    `QueueListener` que retira da fila todos os registros disponíveis (até
+    `TAMANHO_LOTE`) e os entrega de uma vez aos handlers.
+
+    Não é iniciado pelo `dictConfig`: `HandlerFila` chama `iniciar_no_processo`
+    a cada registro, que inicia a thread na primeira vez em cada processo. Um
+    processo filho criado por fork não herda a thread do pai, então recebe uma
+    fila nova (a herdada pode conter registros do pai ou travas presas) e a sua
+    própria thread. Na saída do processo, grava o que ainda estiver na fila.
+    """
+
+    TAMANHO_LOTE = 500
+
+    def __init__(self, fila, *handlers, respect_handler_level=False):
+        super().__init__(fila, *handlers, respect_handler_level=respect_handler_level)
+        self._pid = None
+        self._trava = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._apos_fork)
+
+    def _apos_fork(self):
+        self._trava = threading.Lock()
+
+    def iniciar_no_processo(self):
+        """
+        Garante a thread de gravação no processo atual e retorna a fila em uso.
+        """
+        if self._pid != os.getpid():
+            with self._trava:
+                if self._pid != os.getpid():
+                    if self._pid is not None:
+                        self.queue = queue.Queue(self.queue.maxsize)
+                    self._thread = None
+                    self.start()
+                    atexit.register(self.stop)
+                    self._pid = os.getpid()
+        return self.queue
+
+    def enqueue_sentinel(self):
+        # Com a fila cheia, espera a thread abrir espaço em vez de perder o sinal
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        # Só encerra a thread iniciada neste processo (o atexit é herdado no fork)
+        if self._pid == os.getpid() and self._thread is not None:
+            super().stop()
+
+    def _monitor(self):
+        fila = self.queue
+        encerrar = False
+        while not encerrar:
+            lote = [fila.get()]
+            while len(lote) < self.TAMANHO_LOTE:
+                try:
+                    lote.append(fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self._sentinel in lote:
+                encerrar = True
+                lote = [registro for registro in lote if registro is not self._sentinel]
+            self.gravar_lote(lote)
+            for _ in range(len(lote) + encerrar):
+                fila.task_done()
+
+    def gravar_lote(self, registros):
+        for handler in self.handlers:
+            if self.respect_handler_level:
+                selecionados = [registro for registro in registros if registro.levelno >= handler.level]
+            else:
+                selecionados = registros
+            if not selecionados:
+                continue
+            if hasattr(handler, 'emitir_lote'):
+                handler.emitir_lote(selecionados)
+            else:
+                for registro in selecionados:
+                    handler.handle(registro)
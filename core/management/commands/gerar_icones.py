@@ -0,0 +1,194 @@
+import logging
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from core.poda_css import classe_usada, classes_do_css, palavras, podar_css
+
+PASTA_ICONES = Path('assets/css/icons/tabler-icons')
+CSS_ORIGEM = 'tabler-icons.css'
+FONTE_ORIGEM = 'fonts/tabler-icons.ttf'
+CSS_SUBSET = 'tabler-icons.subset.css'
+FONTE_SUBSET = 'fonts/tabler-icons.subset.woff2'
+
+BUNDLE_ORIGEM = 'assets/css/styles.min.css'
+BUNDLE_PODADO = 'assets/css/styles.podado.min.css'
+# Fontes do JavaScript do Bootstrap: as classes de estado que ele aplica
+# (show, collapsing, modal-open...) precisam sobreviver à poda mesmo que o
+# bundle minificado referenciado pelos templates não esteja no repositório
+SCRIPTS_BOOTSTRAP = 'assets/libs/bootstrap/js/src'
+
+_COMENTARIO_LICENCA = re.compile(r'\s*(/\*!.*?\*/)', re.S)
+_REGRA_BASE = re.compile(r'^\.ti\s*\{[^}]*\}', re.M)
+_REGRA_ICONE = re.compile(r'\.(ti-[a-z0-9-]+):before\s*\{\s*content:\s*"\\([0-9a-fA-F]+)";?\s*\}')
+# Classes ti-* usadas nos templates (sem casar "multi-line", "anti-..." etc.)
+_CLASSE_TEMPLATE = re.compile(r'(?<![\w-])ti-[a-z0-9]+(?:-[a-z0-9]+)*')
+_SCRIPT_TEMPLATE = re.compile(r"""{%\s*static\s+['"]([^'"]+\.js)['"]""")
+
+_FONT_FACE = '''@font-face {
+  font-family: "tabler-icons";
+  font-style: normal;
+  font-weight: 400;
+  font-display: block;
+  src: url("%s") format("woff2");
+}'''
+
+
+def _pastas_templates():
+    pastas = [Path(pasta) for config in settings.TEMPLATES for pasta in config.get('DIRS', [])]
+    pastas += [Path(app.path) / 'templates' for app in apps.get_app_configs() if app.path.startswith(str(settings.BASE_DIR))]
+    return [pasta for pasta in pastas if pasta.is_dir()]
+
+
+def _templates():
+    for pasta in _pastas_templates():
+        yield from pasta.rglob('*.html')
+
+
+def classes_usadas():
+    """
+    Mapeia cada classe `ti-*` encontrada nos templates do projeto para os
+    templates que a utilizam.
+    """
+    usadas = {}
+    for template in _templates():
+        for classe in _CLASSE_TEMPLATE.findall(template.read_text(encoding='utf-8')):
+            usadas.setdefault(classe, set()).add(str(template.relative_to(settings.BASE_DIR)))
+    return usadas
+
+
+def textos_do_projeto():
+    """
+    Templates do projeto, scripts referenciados por eles com `{% static %}` e
+    as fontes do JavaScript do Bootstrap. Retorna `(textos, scripts_ausentes)`.
+    """
+    textos = [template.read_text(encoding='utf-8') for template in _templates()]
+    scripts = sorted({script for texto in textos for script in _SCRIPT_TEMPLATE.findall(texto)})
+    ausentes = []
+    for script in scripts:
+        caminho = finders.find(script)
+        if caminho:
+            textos.append(Path(caminho).read_text(encoding='utf-8'))
+        else:
+            ausentes.append(script)
+    fontes = finders.find(SCRIPTS_BOOTSTRAP)
+    if fontes:
+        textos += [arquivo.read_text(encoding='utf-8') for arquivo in sorted(Path(fontes).rglob('*.js'))]
+    return textos, ausentes
+
+
+class Command(BaseCommand):
+    help = ("Gera o subconjunto do Tabler Icons usado nos templates (CSS apenas com as "
+            "classes ti-* referenciadas e fonte woff2 apenas com os glifos correspondentes; "
+            "requer o extra \"icones\", fonttools) e poda o bundle styles.min.css para "
+            "styles.podado.min.css, mantendo só os seletores cujas classes aparecem nos "
+            "templates ou nos scripts usados por eles. "
+            "Falha se um template usar um ícone inexistente.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pasta', default=str(Path(settings.STATICFILES_DIRS[0]) / PASTA_ICONES),
+                            help="Pasta do Tabler Icons (CSS completo e fontes).")
+        parser.add_argument('--verificar', action='store_true',
+                            help="Apenas confere se os arquivos gerados cobrem as classes usadas (para CI), "
+                                 "sem gerar arquivos.")
+        parser.add_argument('--apenas-bundle', action='store_true',
+                            help="Poda apenas o bundle styles.min.css (não precisa do fonttools).")
+
+    def handle(self, *args, **options):
+        pasta = Path(options['pasta'])
+        usadas = classes_usadas()
+
+        if options['verificar']:
+            self._verificar(usadas, self._icones(pasta / CSS_SUBSET), CSS_SUBSET)
+            self._verificar_bundle()
+            self.stdout.write(self.style.SUCCESS(
+                f"{CSS_SUBSET} cobre as {len(usadas)} classe(s) usada(s) e {BUNDLE_PODADO} está atualizado."
+            ))
+            return
+
+        if not options['apenas_bundle']:
+            self._gerar_icones(pasta, usadas)
+        self._podar_bundle()
+
+    def _gerar_icones(self, pasta, usadas):
+        css = (pasta / CSS_ORIGEM).read_text(encoding='utf-8')
+        icones = self._icones(pasta / CSS_ORIGEM)
+        self._verificar(usadas, icones, CSS_ORIGEM)
+
+        selecionados = sorted(usadas)
+        codigos = [int(icones[classe], 16) for classe in selecionados]
+        self._gerar_fonte(pasta / FONTE_ORIGEM, pasta / FONTE_SUBSET, codigos)
+
+        licenca = _COMENTARIO_LICENCA.match(css)
+        partes = [licenca.group(1)] if licenca else []
+        partes.append(_FONT_FACE % FONTE_SUBSET)
+        partes.append(_REGRA_BASE.search(css).group(0))
+        partes += [f'.{classe}:before {{\n  content: "\\{icones[classe]}";\n}}' for classe in selecionados]
+        (pasta / CSS_SUBSET).write_text('\n\n'.join(partes) + '\n', encoding='utf-8')
+
+        tamanho_origem = (pasta / CSS_ORIGEM).stat().st_size + (pasta / 'fonts/tabler-icons.woff2').stat().st_size
+        tamanho_subset = (pasta / CSS_SUBSET).stat().st_size + (pasta / FONTE_SUBSET).stat().st_size
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(selecionados)} de {len(icones)} ícones: {tamanho_origem / 1024:,.1f} KB -> "
+            f"{tamanho_subset / 1024:,.1f} KB (CSS + woff2)."
+        ))
+
+    def _bundle_podado(self):
+        origem = finders.find(BUNDLE_ORIGEM)
+        if not origem:
+            raise CommandError(f"Arquivo não encontrado: {BUNDLE_ORIGEM}")
+        textos, ausentes = textos_do_projeto()
+        for script in ausentes:
+            self.stderr.write(self.style.WARNING(
+                f"{script} não encontrado: classes aplicadas apenas por ele podem ser removidas do bundle."
+            ))
+        css = Path(origem).read_text(encoding='utf-8')
+        return Path(origem), css, podar_css(css, classe_usada(palavras('\n'.join(textos))))
+
+    def _podar_bundle(self):
+        origem, css, podado = self._bundle_podado()
+        destino = origem.with_name(Path(BUNDLE_PODADO).name)
+        destino.write_text(podado, encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f"{BUNDLE_PODADO}: {len(classes_do_css(podado))} de {len(classes_do_css(css))} classes, "
+            f"{len(css.encode()) / 1024:,.1f} KB -> {len(podado.encode()) / 1024:,.1f} KB."
+        ))
+
+    def _verificar_bundle(self):
+        origem, _css, podado = self._bundle_podado()
+        destino = origem.with_name(Path(BUNDLE_PODADO).name)
+        if not destino.exists() or destino.read_text(encoding='utf-8') != podado:
+            raise CommandError(f"{BUNDLE_PODADO} desatualizado: execute `python manage.py gerar_icones --apenas-bundle`.")
+
+    def _icones(self, caminho):
+        try:
+            return dict(_REGRA_ICONE.findall(caminho.read_text(encoding='utf-8')))
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo não encontrado: {caminho}")
+
+    def _verificar(self, usadas, icones, nome_css):
+        faltando = sorted(set(usadas) - set(icones))
+        if faltando:
+            detalhes = '\n'.join(f"  {classe}: {', '.join(sorted(usadas[classe]))}" for classe in faltando)
+            raise CommandError(f"Classes usadas nos templates e ausentes de {nome_css}:\n{detalhes}")
+
+    def _gerar_fonte(self, origem, destino, codigos):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError("fonttools não está instalado (instale o extra \"icones\").")
+
+        logging.getLogger('fontTools').setLevel(logging.ERROR)  # Avisos sobre tabelas da fonte original
+        opcoes = subset.Options()
+        opcoes.flavor = 'woff2'
+        opcoes.layout_features = []
+        opcoes.notdef_outline = True
+        fonte = subset.load_font(str(origem), opcoes)
+        subsetter = subset.Subsetter(opcoes)
+        subsetter.populate(unicodes=codigos)
+        subsetter.subset(fonte)
+        subset.save_font(fonte, str(destino), opcoes)
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ("Remove as sessões expiradas do banco em lotes, sem um único DELETE "
+            "que bloqueie a tabela django_session.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000,
+                            help="Quantidade máxima de sessões removidas por DELETE.")
+        parser.add_argument('--pausa', type=float, default=0.0,
+                            help="Segundos de espera entre lotes, para aliviar o banco.")
+
+    def handle(self, *args, **options):
+        if settings.SESSAO_MODO not in ('db', 'cached_db'):
+            self.stdout.write(f"SESSAO_MODO='{settings.SESSAO_MODO}' não grava sessões no banco; nada a fazer.")
+            return
+
+        agora = timezone.now()
+        expiradas = Session.objects.filter(expire_date__lt=agora).values_list('session_key', flat=True)
+        removidas = 0
+        while chaves := list(expiradas[:options['lote']]):
+            removidas += Session.objects.filter(session_key__in=chaves).delete()[0]
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(f"{removidas} sessão(ões) expirada(s) removida(s)."))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.estaticos import ler_relatorio
+
+
+def _kb(tamanho):
+    return f"{tamanho / 1024:,.1f} KB"
+
+
+class Command(BaseCommand):
+    help = "Exibe os bytes economizados pela compressão (Brotli/gzip) de cada arquivo no último collectstatic."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=20,
+                            help="Quantidade de arquivos listados (os de maior economia). 0 = todos.")
+
+    def handle(self, *args, **options):
+        try:
+            relatorio = ler_relatorio()
+        except FileNotFoundError:
+            raise CommandError("Relatório não encontrado; execute `python manage.py collectstatic` antes.")
+
+        for referencia in relatorio['referencias_quebradas']:
+            self.stdout.write(self.style.WARNING(f"Referência não encontrada: {referencia}"))
+
+        relatorio = relatorio['arquivos']
+        economia = {
+            nome: tamanhos['original'] - tamanhos.get('br', tamanhos['original'])
+            for nome, tamanhos in relatorio.items()
+        }
+        ordenados = sorted(relatorio, key=economia.get, reverse=True)
+        if options['limite']:
+            ordenados = ordenados[:options['limite']]
+
+        for nome in ordenados:
+            tamanhos = relatorio[nome]
+            self.stdout.write(
+                f"{nome}: {_kb(tamanhos['original'])} -> br {_kb(tamanhos.get('br', tamanhos['original']))}, "
+                f"gz {_kb(tamanhos.get('gz', tamanhos['original']))} (economia {_kb(economia[nome])})"
+            )
+
+        total = sum(tamanhos['original'] for tamanhos in relatorio.values())
+        total_br = total - sum(economia.values())
+        total_gz = sum(tamanhos.get('gz', tamanhos['original']) for tamanhos in relatorio.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(relatorio)} arquivo(s): {_kb(total)} -> br {_kb(total_br)}, gz {_kb(total_gz)}"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.saude import verificar_tudo
+
+
+class Command(BaseCommand):
+    help = "Verifica banco, caches e workers do Celery, exibindo a latência de cada um."
+
+    def handle(self, *args, **options):
+        ok, resultados = verificar_tudo()
+        for nome, resultado in resultados.items():
+            if resultado['ok']:
+                self.stdout.write(self.style.SUCCESS(f"{nome}: ok ({resultado['ms']} ms)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{nome}: falhou ({resultado['ms']} ms) - {resultado['erro']}"))
+        if not ok:
+            raise CommandError("Há verificações com falha.")
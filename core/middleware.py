@@ -0,0 +1,62 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import _gravou, _primario_fixado
+
+COOKIE_PRIMARIO = 'db_primario'
+
+
+class PrimarioAposGravacaoMiddleware:
+    """
+    Isola o estado do `RoteadorReplicas` por requisição e o estende às
+    requisições seguintes do mesmo navegador: após uma gravação, um cookie
+    mantém as leituras no `default` por `DB_REPLICAS_FIXAR_SEGUNDOS` (ex.: o
+    redirecionamento logo após o `registrar`).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        if not settings.DB_REPLICAS_ALIASES:
+            return self.get_response(request)
+
+        tokens = self._iniciar(request)
+        try:
+            return self._finalizar(self.get_response(request))
+        finally:
+            self._restaurar(tokens)
+
+    async def __acall__(self, request):
+        if not settings.DB_REPLICAS_ALIASES:
+            return await self.get_response(request)
+
+        tokens = self._iniciar(request)
+        try:
+            return self._finalizar(await self.get_response(request))
+        finally:
+            self._restaurar(tokens)
+
+    def _iniciar(self, request):
+        return _primario_fixado.set(COOKIE_PRIMARIO in request.COOKIES), _gravou.set(False)
+
+    def _finalizar(self, response):
+        if _gravou.get():
+            response.set_cookie(
+                COOKIE_PRIMARIO, '1', max_age=settings.DB_REPLICAS_FIXAR_SEGUNDOS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def _restaurar(self, tokens):
+        token_fixado, token_gravou = tokens
+        _gravou.reset(token_gravou)
+        _primario_fixado.reset(token_fixado)
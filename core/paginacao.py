@@ -0,0 +1,51 @@
+"""
+Paginação para tabelas grandes.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Abaixo deste total estimado, o COUNT(*) exato é barato o suficiente
+LIMITE_CONTAGEM_EXATA = 10_000
+
+
+def estimar_total(queryset):
+    """
+    Estima o total de linhas da tabela de um queryset sem filtros, sem
+    COUNT(*): `pg_class.reltuples` no PostgreSQL e `MAX(rowid)` no SQLite.
+
+    Retorna None quando não há estimativa disponível.
+    """
+    connection = connections[queryset.db]
+    tabela = queryset.model._meta.db_table
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [tabela])
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(tabela)}")
+        else:
+            return None
+        linha = cursor.fetchone()
+
+    # reltuples é -1 em tabelas que nunca passaram por VACUUM/ANALYZE
+    if not linha or linha[0] is None or linha[0] < 0:
+        return None
+    return int(linha[0])
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador que evita o COUNT(*) em tabelas grandes sem filtro, usando a
+    estimativa do banco. Com filtros (busca, list_filter) o total é exato.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimativa = estimar_total(self.object_list)
+            if estimativa is not None and estimativa > LIMITE_CONTAGEM_EXATA:
+                return estimativa
+        return super().count
@@ -0,0 +1,168 @@
+"""
+Poda de folhas de estilo
+------------------------
+Remove de um CSS as regras cujos seletores usam classes que não aparecem no
+projeto (usado por `python manage.py gerar_icones` para o bundle
+styles.min.css).
+
+Critério, o mesmo do PurgeCSS: uma classe é considerada usada se o seu nome
+aparece como palavra nos templates ou nos scripts carregados por eles (o que
+cobre as classes de estado aplicadas pelo JavaScript do Bootstrap, como
+`show` e `collapsing`). Palavras terminadas em hífen, como `alert-` em
+`alert-{{ tipo }}`, mantêm todas as classes com esse prefixo.
+
+Seletores sem classes (`body`, `:root`, `[hidden]`), `@font-face`,
+`@keyframes` e instruções como `@import` são mantidos; `@media` e
+`@supports` são podados recursivamente. Comentários são descartados, exceto
+os de licença (`/*! ... */`).
+"""
+
+import re
+
+_COMENTARIO = re.compile(r'/\*(?!!).*?\*/', re.S)
+_ATRIBUTO = re.compile(r'\[[^\]]*\]')
+_CLASSE = re.compile(r'\.((?:\\.|[\w-])+)')
+_PALAVRA = re.compile(r'[\w-]+')
+_AT_PODAVEIS = re.compile(r'@(media|supports|layer|container)\b')
+
+
+def palavras(texto):
+    """
+    Retorna o conjunto de palavras (candidatas a nome de classe) de um texto.
+    """
+    return set(_PALAVRA.findall(texto))
+
+
+def classe_usada(palavras_usadas):
+    """
+    Retorna o predicado `usada(classe)` para um conjunto de palavras.
+    """
+    prefixos = tuple(palavra for palavra in palavras_usadas if palavra.endswith('-') and len(palavra) > 1)
+
+    def usada(classe):
+        return classe in palavras_usadas or classe.startswith(prefixos)
+    return usada
+
+
+def classes(seletor):
+    """
+    Nomes das classes de um seletor (ignorando o conteúdo de `[atributo]`).
+    """
+    return [classe.replace('\\', '') for classe in _CLASSE.findall(_ATRIBUTO.sub('', seletor))]
+
+
+def _fim_string(css, inicio):
+    aspas = css[inicio]
+    i = inicio + 1
+    while i < len(css) and css[i] != aspas:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _fim_bloco(css, abertura):
+    profundidade = 0
+    i = abertura
+    while i < len(css):
+        caractere = css[i]
+        if caractere in '"\'':
+            i = _fim_string(css, i)
+            continue
+        if caractere == '{':
+            profundidade += 1
+        elif caractere == '}':
+            profundidade -= 1
+            if profundidade == 0:
+                return i
+        i += 1
+    raise ValueError("CSS com bloco não fechado.")
+
+
+def _itens(css):
+    """
+    Divide o CSS em itens de topo: `(prelúdio, corpo)` para blocos e
+    `(texto, None)` para instruções (`@import ...;`) e comentários de licença.
+    """
+    itens = []
+    i = inicio = 0
+    while i < len(css):
+        caractere = css[i]
+        if caractere in '"\'':
+            i = _fim_string(css, i)
+        elif css.startswith('/*!', i) and not css[inicio:i].strip():
+            fim = css.index('*/', i) + 2
+            itens.append((css[i:fim], None))
+            i = inicio = fim
+        elif caractere == ';':
+            itens.append((css[inicio:i + 1].strip(), None))
+            i = inicio = i + 1
+        elif caractere == '{':
+            fim = _fim_bloco(css, i)
+            itens.append((css[inicio:i].strip(), css[i + 1:fim]))
+            i = inicio = fim + 1
+        else:
+            i += 1
+    return itens
+
+
+def _seletores(preludio):
+    """
+    Divide uma lista de seletores nas vírgulas de topo (fora de `:is(...)`,
+    `[...]` etc.).
+    """
+    seletores = []
+    profundidade = inicio = 0
+    for i, caractere in enumerate(preludio):
+        if caractere in '([':
+            profundidade += 1
+        elif caractere in ')]':
+            profundidade -= 1
+        elif caractere == ',' and profundidade == 0:
+            seletores.append(preludio[inicio:i].strip())
+            inicio = i + 1
+    seletores.append(preludio[inicio:].strip())
+    return seletores
+
+
+def _podar(css, usada):
+    saida = []
+    for preludio, corpo in _itens(css):
+        if corpo is None:
+            saida.append(preludio)
+        elif preludio.startswith('@'):
+            if _AT_PODAVEIS.match(preludio):
+                interno = _podar(corpo, usada)
+                if interno:
+                    saida.append(f'{preludio}{{{interno}}}')
+            else:
+                saida.append(f'{preludio}{{{corpo}}}')
+        else:
+            mantidos = [
+                seletor for seletor in _seletores(preludio)
+                if all(usada(classe) for classe in classes(seletor))
+            ]
+            if mantidos:
+                saida.append(f"{','.join(mantidos)}{{{corpo}}}")
+    return ''.join(saida)
+
+
+def podar_css(css, usada):
+    """
+    Retorna o CSS apenas com os seletores cujas classes satisfazem `usada`.
+    """
+    return _podar(_COMENTARIO.sub('', css), usada)
+
+
+def classes_do_css(css):
+    """
+    Conjunto das classes referenciadas pelos seletores de um CSS.
+    """
+    encontradas = set()
+    for preludio, corpo in _itens(_COMENTARIO.sub('', css)):
+        if corpo is None:
+            continue
+        if preludio.startswith('@'):
+            if _AT_PODAVEIS.match(preludio):
+                encontradas |= classes_do_css(corpo)
+        else:
+            encontradas.update(classes(preludio))
+    return encontradas
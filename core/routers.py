@@ -0,0 +1,68 @@
+"""
+Roteamento de leituras para réplicas
+------------------------------------
+Leituras vão para uma das réplicas de `settings.DB_REPLICAS_ALIASES`;
+gravações e tudo o que acontece dentro de uma transação vão para o `default`.
+
+Depois de uma gravação, as leituras da mesma requisição (e das seguintes, por
+`DB_REPLICAS_FIXAR_SEGUNDOS`, via `core.middleware.PrimarioAposGravacaoMiddleware`)
+ficam fixadas no `default`, para que o usuário leia o que acabou de gravar
+mesmo com atraso de replicação.
+"""
+
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_primario_fixado = contextvars.ContextVar('primario_fixado', default=False)
+_gravou = contextvars.ContextVar('gravou_no_primario', default=False)
+
+
+def gravou_no_primario():
+    """
+    Indica se houve gravação no contexto atual (ex.: na requisição corrente).
+    """
+    return _gravou.get()
+
+
+@contextmanager
+def usar_primario():
+    """
+    Lê do `default` dentro do bloco (ex.: logo após gravar em outro processo).
+    """
+    token = _primario_fixado.set(True)
+    try:
+        yield
+    finally:
+        _primario_fixado.reset(token)
+
+
+class RoteadorReplicas:
+    """
+    Router para `DATABASE_ROUTERS`. Sem réplicas configuradas, tudo vai para
+    o `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DB_REPLICAS_ALIASES
+        if not replicas or _primario_fixado.get() or _gravou.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            # Relações de um objeto vêm do mesmo banco que ele
+            return instancia._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _gravou.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas recebem o schema pela replicação do banco principal
+        return db not in settings.DB_REPLICAS_ALIASES
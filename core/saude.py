@@ -0,0 +1,70 @@
+"""
+Verificações de saúde da infraestrutura
+---------------------------------------
+Cada verificação mede a latência de uma operação mínima (consulta ao banco,
+ida e volta no cache, ping nos workers do Celery) e retorna
+`{'ok': bool, 'ms': float, 'erro': str | None}`.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.crypto import get_random_string
+
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    try:
+        funcao()
+    except Exception as erro:
+        return {'ok': False, 'ms': round((time.perf_counter() - inicio) * 1000, 2), 'erro': str(erro)}
+    return {'ok': True, 'ms': round((time.perf_counter() - inicio) * 1000, 2), 'erro': None}
+
+
+def verificar_banco(alias='default'):
+    def _consultar():
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    return _medir(_consultar)
+
+
+def verificar_cache(alias='default'):
+    def _ida_e_volta():
+        cache = caches[alias]
+        chave = f"saude:{get_random_string(8)}"
+        cache.set(chave, 1, 10)
+        if cache.get(chave) != 1:
+            raise RuntimeError("valor gravado não foi lido de volta")
+        cache.delete(chave)
+    return _medir(_ida_e_volta)
+
+
+def verificar_celery(timeout=1.0):
+    """
+    Verifica se há workers respondendo. Retorna None quando o Celery não está
+    instalado ou roda em modo eager (não há workers a consultar).
+    """
+    from core import celery_app
+
+    if celery_app is None or settings.CELERY_TASK_ALWAYS_EAGER:
+        return None
+
+    def _ping():
+        if not celery_app.control.ping(timeout=timeout):
+            raise RuntimeError("nenhum worker respondeu")
+    return _medir(_ping)
+
+
+def verificar_tudo():
+    """
+    Executa todas as verificações. Retorna `(ok, resultados)`.
+    """
+    resultados = {f'banco:{alias}': verificar_banco(alias) for alias in settings.DATABASES}
+    resultados.update({f'cache:{alias}': verificar_cache(alias) for alias in settings.CACHES})
+    celery = verificar_celery()
+    if celery is not None:
+        resultados['celery'] = celery
+    return all(resultado['ok'] for resultado in resultados.values()), resultados
@@ -7,13 +7,15 @@ e configurações de logging. Consulte a documentação oficial do Django para
 mais detalhes: https://docs.djangoproject.com/en/5.1/
 """
 
+import importlib.util
 import os
-from decouple import config
+from decouple import Csv, config
 from pathlib import Path
 import logging  # noqa: F401
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 
 from django import apps  # noqa: F401
+from django.core.exceptions import ImproperlyConfigured
 
 # =============================================================================
 # Caminhos do Projeto
@@ -36,16 +38,53 @@ LOGIN_URL = '/login/'
 # =============================================================================
 # Backends de Autenticação
 # =============================================================================
-# Permite a utilização de autenticação personalizada via e-mail além do backend padrão.
+# Autenticação via e-mail. O EmailBackend estende o ModelBackend (permissões,
+# grupos), então não é necessário listar o backend padrão do Django.
 AUTHENTICATION_BACKENDS = [
     "apps.accounts.backends.EmailBackend",  # Autenticação via e-mail
-    "django.contrib.auth.backends.ModelBackend",  # Backend padrão do Django
 ]
 
+# Cache de usuários usado por EmailBackend.get_user (evita a consulta ao banco
+# em toda requisição autenticada). USUARIO_CACHE_ALIAS aponta para um alias de
+# CACHES compartilhado entre processos, que guarda o carimbo de versão de cada
+# usuário (as invalidações valem para todos os processos); vazio = apenas o
+# LRU em memória, e os demais processos podem servir o usuário antigo por até
+# USUARIO_CACHE_TTL segundos.
+USUARIO_CACHE_TAMANHO = config('USUARIO_CACHE_TAMANHO', default=1024, cast=int)
+USUARIO_CACHE_TTL = config('USUARIO_CACHE_TTL', default=30, cast=int)  # Segundos
+USUARIO_CACHE_ALIAS = config('USUARIO_CACHE_ALIAS', default='')
+
+# Loja ativa (apps.lojas.middleware): cabeçalho, subdomínio de LOJA_DOMINIO_BASE
+# (ex.: "minhaloja.zapsystem.com.br"; vazio desativa) ou argumento `loja` da URL.
+# CNPJ/slug → id ficam em um cache LRU por processo; identificadores
+# inexistentes ficam em cache por LOJA_CACHE_TTL_NEGATIVO segundos.
+LOJA_CABECALHO = config('LOJA_CABECALHO', default='X-Loja')
+LOJA_DOMINIO_BASE = config('LOJA_DOMINIO_BASE', default='')
+LOJA_CACHE_TAMANHO = config('LOJA_CACHE_TAMANHO', default=10000, cast=int)
+LOJA_CACHE_TTL = config('LOJA_CACHE_TTL', default=300, cast=int)  # Segundos
+LOJA_CACHE_TTL_NEGATIVO = config('LOJA_CACHE_TTL_NEGATIVO', default=10, cast=int)  # Segundos
+
+# Limite de tentativas de login (apps.accounts.ratelimit), verificado antes do
+# hash da senha. Máximo de tentativas por e-mail e por IP dentro da janela.
+LOGIN_RATELIMIT_POR_EMAIL = config('LOGIN_RATELIMIT_POR_EMAIL', default=5, cast=int)
+LOGIN_RATELIMIT_POR_IP = config('LOGIN_RATELIMIT_POR_IP', default=20, cast=int)
+LOGIN_RATELIMIT_JANELA = config('LOGIN_RATELIMIT_JANELA', default=300, cast=int)  # Segundos
+LOGIN_RATELIMIT_BACKEND = config('LOGIN_RATELIMIT_BACKEND', default='apps.accounts.ratelimit.CacheRateLimitBackend')
+LOGIN_RATELIMIT_CACHE = config('LOGIN_RATELIMIT_CACHE', default='default')
+# Proxies reversos confiáveis (IPs ou redes, ex.: "10.0.0.0/8,127.0.0.1"). Quando
+# a requisição vem de um deles, o IP do cliente é lido de RATELIMIT_CABECALHO_IP
+# (o endereço mais à direita que não seja de um proxy confiável); caso
+# contrário, vale o REMOTE_ADDR.
+RATELIMIT_PROXIES = config('RATELIMIT_PROXIES', default='', cast=Csv())
+RATELIMIT_CABECALHO_IP = config('RATELIMIT_CABECALHO_IP', default='X-Forwarded-For')
+
 # =============================================================================
 # Aplicativos Instalados
 # =============================================================================
 INSTALLED_APPS = [
+    # Serve os estáticos pelo WhiteNoise também no runserver (antes do staticfiles)
+    'whitenoise.runserver_nostatic',
+
     # Apps padrão do Django
     'django.contrib.admin',
     'django.contrib.auth',
@@ -54,7 +93,8 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
 
-    # Apps personalizados
+    # Apps personalizados ('core' apenas registra os comandos de gerenciamento do projeto)
+    'core',
     'apps.accounts',
     'apps.lojas',
    
@@ -66,10 +106,14 @@ INSTALLED_APPS = [
 # =============================================================================
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Arquivos estáticos (logo após o SecurityMiddleware)
+    'core.middleware.PrimarioAposGravacaoMiddleware',  # Leituras no banco principal após gravar
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.accounts.middleware.LojasDoUsuarioMiddleware',  # request.lojas (ids das lojas do usuário)
+    'apps.lojas.middleware.LojaAtivaMiddleware',  # request.loja_id (loja ativa)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -118,9 +162,45 @@ else:
             'PASSWORD': config('DB_PASSWORD', default='mypassword'),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
+            # Conexões persistentes: reaproveitadas entre requisições por até
+            # DB_CONN_MAX_AGE segundos (0 = uma conexão por requisição), com
+            # verificação antes do reuso para descartar conexões derrubadas.
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+            'OPTIONS': {},
         }
     }
 
+    # Pool nativo do psycopg 3 (requer o extra "postgres"). Substitui as
+    # conexões persistentes: o Django exige CONN_MAX_AGE = 0 com o pool.
+    if config('DB_POOL', default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX', default=10, cast=int),  # Por processo
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),  # Espera por uma conexão livre
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        }
+
+# Réplicas de leitura (core.routers.RoteadorReplicas): hosts separados por
+# vírgula, com as mesmas credenciais do banco principal. Após uma gravação, o
+# navegador lê do principal por DB_REPLICAS_FIXAR_SEGUNDOS.
+DB_REPLICAS = config('DB_REPLICAS', default='', cast=Csv())
+DB_REPLICAS_FIXAR_SEGUNDOS = config('DB_REPLICAS_FIXAR_SEGUNDOS', default=10, cast=int)
+DB_REPLICAS_ALIASES = []
+if not DEBUG:
+    for numero, host in enumerate(DB_REPLICAS, start=1):
+        alias = f'replica_{numero}'
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+        DB_REPLICAS_ALIASES.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.RoteadorReplicas']
+
 # =============================================================================
 # Validação de Senhas
 # =============================================================================
@@ -139,6 +219,38 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# =============================================================================
+# Hash de Senhas
+# =============================================================================
+# Perfil de hash das novas senhas: 'pbkdf2', 'argon2' (requer argon2-cffi) ou
+# 'scrypt'. Os demais continuam na lista apenas para verificar hashes antigos,
+# que são recalculados no perfil atual no próximo login. Use
+# `python manage.py calibrar_hash` para escolher os parâmetros desta máquina.
+PASSWORD_HASH_PERFIL = config('PASSWORD_HASH_PERFIL', default='pbkdf2')
+_HASHERS_POR_PERFIL = {
+    'pbkdf2': 'apps.accounts.hashers.PBKDF2Hasher',
+    'argon2': 'apps.accounts.hashers.Argon2Hasher',
+    'scrypt': 'apps.accounts.hashers.ScryptHasher',
+}
+PASSWORD_HASHERS = [_HASHERS_POR_PERFIL[PASSWORD_HASH_PERFIL]] + [
+    hasher for perfil, hasher in _HASHERS_POR_PERFIL.items() if perfil != PASSWORD_HASH_PERFIL
+]
+
+PASSWORD_PBKDF2_ITERACOES = config('PASSWORD_PBKDF2_ITERACOES', default=870000, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2**14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=1, cast=int)
+
+# Threads que calculam hashes de senha nas views assíncronas (apps.accounts.views_async)
+PASSWORD_HASH_THREADS = config('PASSWORD_HASH_THREADS', default=4, cast=int)
+
+# Usa as views assíncronas de login/registro/recuperação de senha. Só faz
+# sentido quando a aplicação roda pelo ASGI (core.asgi:application).
+CONTAS_VIEWS_ASYNC = config('CONTAS_VIEWS_ASYNC', default=False, cast=bool)
+
 # =============================================================================
 # Internacionalização e Fuso Horário
 # =============================================================================
@@ -161,8 +273,28 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# Utiliza Whitenoise para compressão e cache busting dos arquivos estáticos
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Arquivos estáticos com hash no nome e variantes Brotli/gzip geradas no
+# collectstatic (core.estaticos), servidos pelo WhiteNoise. Os arquivos com
+# hash recebem Cache-Control immutable; os demais, WHITENOISE_MAX_AGE.
+# O manifesto só existe após o collectstatic: em desenvolvimento (e nos
+# testes, core.settings_testes) usa-se o armazenamento simples.
+ESTATICOS_MANIFESTO = config('ESTATICOS_MANIFESTO', default=not DEBUG, cast=bool)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'core.estaticos.ArmazenamentoEstatico' if ESTATICOS_MANIFESTO
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+WHITENOISE_MAX_AGE = config('WHITENOISE_MAX_AGE', default=3600, cast=int)  # Segundos
+# Mantém no STATIC_ROOT apenas as versões com hash (e suas variantes comprimidas)
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+# Processos usados na compressão do collectstatic; 0 = um por CPU
+ESTATICOS_PROCESSOS = config('ESTATICOS_PROCESSOS', default=0, cast=int)
 
 # Localizadores de arquivos estáticos (encontra arquivos em diretórios especificados)
 STATICFILES_FINDERS = [
@@ -190,12 +322,29 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)  # Segundos por operação SMTP
 
-# =============================================================================
-# Configurações do Celery (Tarefas Assíncronas)
-# =============================================================================
-CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+# Fila de envio (apps.accounts.emails). As views apenas enfileiram; o envio é
+# feito pelo comando `processar_fila_email` ('db') ou por uma task do Celery ('celery').
+EMAIL_FILA_TRANSPORTE = config('EMAIL_FILA_TRANSPORTE', default='db')
+EMAIL_FILA_LOTE = config('EMAIL_FILA_LOTE', default=100, cast=int)  # Mensagens por conexão SMTP
+EMAIL_FILA_MAX_TENTATIVAS = config('EMAIL_FILA_MAX_TENTATIVAS', default=5, cast=int)
+EMAIL_FILA_BACKOFF_BASE = config('EMAIL_FILA_BACKOFF_BASE', default=30, cast=int)  # Segundos
+# Prazo (segundos) da reserva de um lote pelo worker; passado esse prazo sem
+# envio (worker interrompido), as mensagens voltam a ser processadas
+EMAIL_FILA_RESERVA = config('EMAIL_FILA_RESERVA', default=600, cast=int)
+
+# Envio em massa (apps.accounts.emails.enviar_em_lotes). 0 = sem limite de taxa.
+EMAIL_TAXA_MAXIMA = config('EMAIL_TAXA_MAXIMA', default=0, cast=float)  # Mensagens por segundo
+
+# Domínio usado nos links dos e-mails gerados fora de uma requisição
+SITE_DOMAIN = config('SITE_DOMAIN', default='localhost:8000')
+
+# Validade (segundos) dos links de confirmação de e-mail e de redefinição de
+# senha (apps.accounts.tokens). O cache guarda os tokens já utilizados.
+TOKEN_CONFIRMACAO_VALIDADE = config('TOKEN_CONFIRMACAO_VALIDADE', default=7 * 24 * 3600, cast=int)
+PASSWORD_RESET_TIMEOUT = config('PASSWORD_RESET_TIMEOUT', default=24 * 3600, cast=int)
+TOKEN_CACHE_ALIAS = config('TOKEN_CACHE_ALIAS', default='default')
 
 # =============================================================================
 # Configurações do Redis
@@ -203,6 +352,103 @@ CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localho
 REDIS_HOST = config('REDIS_HOST', default='localhost')
 REDIS_PORT = config('REDIS_PORT', default=6379, cast=int)
 REDIS_DB = config('REDIS_DB', default=0, cast=int)
+REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
+REDIS_MAX_CONEXOES = config('REDIS_MAX_CONEXOES', default=50, cast=int)  # Por processo
+REDIS_TIMEOUT = config('REDIS_TIMEOUT', default=0.5, cast=float)  # Segundos (conexão e leitura)
+
+# =============================================================================
+# Configurações do Celery (Tarefas Assíncronas)
+# =============================================================================
+# App em core/celery.py (requer o extra "celery"). Com CELERY_EAGER=True as
+# tasks rodam no próprio processo, de forma síncrona (testes e desenvolvimento).
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL)
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+
+# =============================================================================
+# Sessões e Mensagens
+# =============================================================================
+# Onde ficam as sessões:
+#   'db'         - tabela django_session (padrão do Django)
+#   'cached_db'  - leitura pelo Redis, gravação também no banco (sobrevive a um flush do Redis)
+#   'cache'      - apenas no Redis, sem gravações no banco
+#   'cookies'    - cookie assinado no navegador, sem armazenamento no servidor
+# Para 'db' e 'cached_db', agende `python manage.py limpar_sessoes`.
+SESSAO_MODO = config('SESSAO_MODO', default='db')
+_SESSAO_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = _SESSAO_ENGINES[SESSAO_MODO]
+SESSION_CACHE_ALIAS = 'sessoes'
+# A sessão só é gravada quando modificada (não a cada requisição)
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Mensagens (messages.error etc.) ficam em cookie, sem gravar na sessão
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# =============================================================================
+# Cache
+# =============================================================================
+# CACHE_MODO='local' (padrão) usa a memória de cada processo: o limite de
+# tentativas de login e os demais caches valem por processo. 'redis' usa o
+# Redis compartilhado entre processos, com pool de conexões limitado (requer o
+# extra "redis"); é opcional porque, com ele, uma queda do Redis derruba o
+# login, os links de e-mail e `request.lojas`. As sessões em
+# 'cached_db'/'cache' sempre usam o Redis. `python manage.py verificar_saude`
+# mede a latência.
+CACHE_MODO = config('CACHE_MODO', default='local')
+_USA_REDIS = CACHE_MODO == 'redis' or SESSAO_MODO in ('cached_db', 'cache')
+if _USA_REDIS and importlib.util.find_spec('redis') is None:
+    raise ImproperlyConfigured(
+        "CACHE_MODO='redis' e SESSAO_MODO 'cached_db'/'cache' requerem o pacote redis (extra \"redis\")."
+    )
+_CACHE_REDIS = {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCATION': REDIS_URL,
+    'OPTIONS': {
+        'pool_class': 'redis.BlockingConnectionPool',
+        'max_connections': REDIS_MAX_CONEXOES,
+        'timeout': REDIS_TIMEOUT,  # Espera por uma conexão livre do pool
+        'socket_connect_timeout': REDIS_TIMEOUT,
+        'socket_timeout': REDIS_TIMEOUT,
+        'health_check_interval': 30,
+    },
+}
+_CACHE_LOCAL = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'OPTIONS': {'MAX_ENTRIES': 10000},
+}
+CACHES = {
+    'default': _CACHE_REDIS if CACHE_MODO == 'redis' else _CACHE_LOCAL,
+    'sessoes': {
+        **(_CACHE_REDIS if _USA_REDIS else _CACHE_LOCAL),
+        'KEY_PREFIX': 'sessao',
+    },
+}
+
+# Cache das lojas de cada usuário (apps.accounts.vinculos / request.lojas).
+# Os sinais invalidam o cache apenas no processo atual quando ele é local
+# (LocMemCache): nos demais workers, um vínculo removido continua aceito por
+# `loja_obrigatoria` por até VINCULOS_CACHE_TTL segundos. Por isso o padrão é
+# de 5s com cache local e de 300s com cache compartilhado (Redis).
+VINCULOS_CACHE_ALIAS = config('VINCULOS_CACHE_ALIAS', default='default')
+_VINCULOS_CACHE_LOCAL = CACHES[VINCULOS_CACHE_ALIAS]['BACKEND'] == _CACHE_LOCAL['BACKEND']
+VINCULOS_CACHE_TTL = config(
+    'VINCULOS_CACHE_TTL', default=5 if _VINCULOS_CACHE_LOCAL else 300, cast=int
+)  # Segundos
+
+# /saude/ é a sonda de vida (sem dependências). /saude/detalhada/ verifica
+# banco, caches e workers e só responde à equipe (is_staff) ou a quem enviar
+# este token no cabeçalho X-Saude-Token; vazio = apenas a equipe.
+SAUDE_TOKEN = config('SAUDE_TOKEN', default='')
 
 # =============================================================================
 # Configurações de Logging
@@ -211,6 +457,13 @@ REDIS_DB = config('REDIS_DB', default=0, cast=int)
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
 os.makedirs(LOG_DIR, exist_ok=True)  # Garante que o diretório exista
 
+# LOG_MODO: 'arquivo' grava no arquivo na própria thread da requisição;
+# 'fila' apenas enfileira e uma thread em segundo plano grava em lotes
+# (core.logs). LOG_FORMATO: 'texto' ou 'json' (uma linha JSON por registro).
+LOG_MODO = config('LOG_MODO', default='arquivo')
+LOG_FORMATO = config('LOG_FORMATO', default='texto')
+_LOG_HANDLER = 'fila' if LOG_MODO == 'fila' else 'file'
+
 # Configuração básica de logging com rotação de arquivos
 LOGGING = {
     'version': 1,
@@ -218,11 +471,11 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',  # Roda logs com base no tamanho do arquivo
+            'class': 'core.logs.ArquivoEmLotes',  # RotatingFileHandler que também grava em lotes
             'filename': os.path.join(LOG_DIR, 'debug.log'),
             'maxBytes': 10 * 1024 * 1024,  # Limite de 10 MB por arquivo
             'backupCount': 5,  # Mantém 5 backups dos arquivos de log
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMATO == 'json' else 'verbose',
         },
     },
     'formatters': {
@@ -230,29 +483,46 @@ LOGGING = {
             'format': '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
             'datefmt': "%Y-%m-%d %H:%M:%S",
         },
+        'json': {
+            '()': 'core.logs.FormatadorJSON',
+        },
     },
     'loggers': {
         # Logger para o Django
         'django': {
-            'handlers': ['file'],
+            'handlers': [_LOG_HANDLER],
             'level': 'INFO',
             'propagate': True,
         },
         # Logger para o backend do banco de dados do Django
         'django.db.backends': {
-            'handlers': ['file'],
+            'handlers': [_LOG_HANDLER],
             'level': 'WARNING',
             'propagate': False,
         },
         # Logger específico para o app 'usuarios'
         'usuarios': {
-            'handlers': ['file'],
+            'handlers': [_LOG_HANDLER],
             'level': 'INFO',
             'propagate': False,
         },
     },
 }
 
+# Registros aguardando gravação no modo 'fila'; acima disso são descartados
+LOG_FILA_MAX = config('LOG_FILA_MAX', default=10000, cast=int)
+
+if LOG_MODO == 'fila':
+    # Criado só neste modo: a thread do OuvinteEmLotes é iniciada no primeiro
+    # registro de cada processo (seguro com fork após o carregamento)
+    LOGGING['handlers']['fila'] = {
+        'class': 'core.logs.HandlerFila',
+        'handlers': ['file'],
+        'listener': 'core.logs.OuvinteEmLotes',
+        'respect_handler_level': True,
+        'queue': {'()': 'queue.Queue', 'maxsize': LOG_FILA_MAX},
+    }
+
 # =============================================================================
 # Configurações Alternativas de Logging (comentadas)
 # =============================================================================
@@ -0,0 +1,27 @@
+"""
+Configurações dos testes
+------------------------
+Estende `core.settings` com o que só existe nos testes. Usado por
+`manage.py test` (ver manage.py) e pelo pytest-django (pyproject.toml); em
+outros executores, defina DJANGO_SETTINGS_MODULE=core.settings_testes.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, STORAGES
+
+# Segundo banco SQLite usado como réplica nos testes do roteador e da
+# verificação de saúde (core/tests.py), sem replicação a partir do `default`
+DATABASES = {
+    **DATABASES,
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+# Não há collectstatic nos testes: sem manifesto de estáticos
+ESTATICOS_MANIFESTO = False
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
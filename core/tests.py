@@ -0,0 +1,244 @@
+import contextvars
+import logging
+import os
+import queue
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from apps.accounts.backends import _usuarios
+from apps.accounts.models import Usuario
+from apps.lojas.models import Loja
+
+from .logs import ArquivoEmLotes, HandlerFila, OuvinteEmLotes
+from .middleware import COOKIE_PRIMARIO, PrimarioAposGravacaoMiddleware
+from .poda_css import classe_usada, palavras, podar_css
+from .routers import _gravou, _primario_fixado, gravou_no_primario, usar_primario
+
+
+def _em_contexto_novo(funcao):
+    # Cada chamada simula uma requisição: parte de um estado limpo do roteador
+    # e não vaza o que gravar para as demais
+    def executar():
+        _gravou.set(False)
+        _primario_fixado.set(False)
+        return funcao()
+    return contextvars.copy_context().run(executar)
+
+
+def _criar_loja():
+    return Loja.objects.create(nome_loja='Padaria Central', cnpj='11222333000181', endereco='Rua A')
+
+
+def _loja_visivel():
+    return Loja.objects.filter(cnpj='11222333000181').exists()
+
+
+@override_settings(DB_REPLICAS_ALIASES=['replica'])
+class RoteadorReplicasTests(TransactionTestCase):
+    """
+    'replica' é um segundo SQLite sem replicação: o que é gravado no
+    `default` nunca aparece nele, como em uma réplica muito atrasada.
+    """
+
+    databases = {'default', 'replica'}
+
+    def test_leituras_vao_para_a_replica_e_gravacoes_para_o_default(self):
+        self.assertEqual(_em_contexto_novo(lambda: Loja.objects.all().db), 'replica')
+        loja = _em_contexto_novo(_criar_loja)
+        self.assertEqual(loja._state.db, 'default')
+        self.assertFalse(_em_contexto_novo(_loja_visivel))
+
+    def test_le_o_que_gravou_no_mesmo_contexto(self):
+        def gravar_e_ler():
+            _criar_loja()
+            return gravou_no_primario(), _loja_visivel()
+        self.assertEqual(_em_contexto_novo(gravar_e_ler), (True, True))
+
+    def test_usar_primario_e_transacoes_leem_do_default(self):
+        _em_contexto_novo(_criar_loja)
+
+        def ler_fixado():
+            with usar_primario():
+                return _loja_visivel()
+        self.assertTrue(_em_contexto_novo(ler_fixado))
+
+        def ler_em_transacao():
+            with transaction.atomic():
+                return _loja_visivel()
+        self.assertTrue(_em_contexto_novo(ler_em_transacao))
+
+
+@override_settings(DB_REPLICAS_ALIASES=['replica'], DB_REPLICAS_FIXAR_SEGUNDOS=10)
+class PrimarioAposGravacaoMiddlewareTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.fabrica = RequestFactory()
+
+    def _requisicao(self, view, cookies=None):
+        request = self.fabrica.get('/')
+        request.COOKIES.update(cookies or {})
+        return _em_contexto_novo(lambda: PrimarioAposGravacaoMiddleware(view)(request))
+
+    def test_gravacao_fixa_as_leituras_seguintes_no_default(self):
+        resposta = self._requisicao(lambda request: (_criar_loja(), HttpResponse())[1])
+        self.assertIn(COOKIE_PRIMARIO, resposta.cookies)
+        self.assertEqual(resposta.cookies[COOKIE_PRIMARIO]['max-age'], 10)
+
+        def ler(request):
+            return HttpResponse(str(_loja_visivel()))
+
+        # Com o cookie, a requisição seguinte lê o que acabou de ser gravado
+        self.assertEqual(self._requisicao(ler, {COOKIE_PRIMARIO: '1'}).content, b'True')
+        # Sem ele, a leitura vai para a réplica (que não recebeu a gravação)
+        self.assertEqual(self._requisicao(ler).content, b'False')
+
+    def test_leitura_nao_define_o_cookie_e_o_estado_nao_vaza(self):
+        resposta = self._requisicao(lambda request: HttpResponse(str(_loja_visivel())))
+        self.assertNotIn(COOKIE_PRIMARIO, resposta.cookies)
+
+        def gravar_pelo_middleware():
+            request = self.fabrica.get('/')
+            PrimarioAposGravacaoMiddleware(lambda request: (_criar_loja(), HttpResponse())[1])(request)
+            return gravou_no_primario()
+        self.assertFalse(_em_contexto_novo(gravar_pelo_middleware))
+
+
+@override_settings(SAUDE_TOKEN='segredo')
+class SaudeTests(TestCase):
+    databases = {'default', 'replica'}  # A verificação detalhada consulta todos os bancos
+
+    def setUp(self):
+        _usuarios.clear()  # O pk do usuário criado pode repetir o de um teste anterior
+
+    def test_sonda_de_vida_nao_consulta_dependencias(self):
+        with self.assertNumQueries(0):
+            resposta = self.client.get('/saude/')
+        self.assertEqual(resposta.json(), {'ok': True})
+
+    def test_detalhada_exige_token_ou_equipe(self):
+        self.assertEqual(self.client.get('/saude/detalhada/').status_code, 403)
+        self.assertEqual(self.client.get('/saude/detalhada/', headers={'X-Saude-Token': 'errado'}).status_code, 403)
+        self.assertEqual(self.client.get('/saude/detalhada/', headers={'X-Saude-Token': 'segredo'}).status_code, 200)
+
+        self.client.force_login(Usuario.objects.create_user('equipe@exemplo.com', 'Equipe', is_staff=True))
+        self.assertEqual(self.client.get('/saude/detalhada/').status_code, 200)
+
+    @override_settings(SAUDE_TOKEN='')
+    def test_sem_token_configurado_nenhum_token_e_aceito(self):
+        self.assertEqual(self.client.get('/saude/detalhada/', headers={'X-Saude-Token': ''}).status_code, 403)
+
+    def test_falha_retorna_503_sem_expor_o_erro(self):
+        resultados = {'banco:default': {'ok': False, 'ms': 1.0, 'erro': 'senha inválida para o usuário app'}}
+        with mock.patch('core.views.verificar_tudo', return_value=(False, resultados)), \
+                self.assertLogs('core.views', 'WARNING') as logs:
+            resposta = self.client.get('/saude/detalhada/', headers={'X-Saude-Token': 'segredo'})
+        self.assertEqual(resposta.status_code, 503)
+        self.assertIn('senha inválida', logs.output[0])
+        self.assertEqual(resposta.json()['verificacoes'], {'banco:default': {'status': 'falhou', 'ms': 1.0}})
+
+
+class PodaCSSTests(SimpleTestCase):
+    CSS = (
+        '@charset "UTF-8";@import url("https://fonts.exemplo.com/css?f=a;b");'
+        '/*! licença */:root{--cor:#fff}body{margin:0}/* comentário */'
+        '.btn,.badge{padding:1px}.btn:not(.disabled)>.ti{color:red}'
+        '.alert-info{color:blue}.toast[data-x=".badge"]{top:0}'
+        '@media (min-width:576px){.modal{width:1px}.badge{width:2px}}'
+        '@keyframes giro{from{opacity:0}to{opacity:1}}'
+    )
+
+    def podar(self, texto):
+        return podar_css(self.CSS, classe_usada(palavras(texto)))
+
+    def test_mantem_apenas_seletores_com_classes_usadas(self):
+        podado = self.podar('<a class="btn alert-{{ tipo }}">')
+        self.assertIn('.btn{padding:1px}', podado)
+        self.assertIn('.alert-info{color:blue}', podado)  # Prefixo "alert-" vindo de uma variável
+        self.assertNotIn('.badge', podado)
+        self.assertNotIn('.toast', podado)  # Classes dentro de [atributo] não contam como usadas
+        self.assertNotIn('.disabled', podado)  # Todas as classes do seletor precisam estar em uso
+        self.assertNotIn('@media', podado)  # Bloco que ficou vazio
+
+    def test_preserva_instrucoes_licencas_e_regras_sem_classes(self):
+        podado = self.podar('<div class="modal">')
+        self.assertTrue(podado.startswith('@charset "UTF-8";@import url("https://fonts.exemplo.com/css?f=a;b");'))
+        self.assertIn('/*! licença */', podado)
+        self.assertNotIn('comentário', podado)
+        self.assertIn(':root{--cor:#fff}body{margin:0}', podado)
+        self.assertIn('@media (min-width:576px){.modal{width:1px}}', podado)
+        self.assertIn('@keyframes giro{from{opacity:0}to{opacity:1}}', podado)
+
+
+class LogsEmFilaTests(SimpleTestCase):
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.caminho = Path(pasta.name) / 'app.log'
+
+    def criar(self, maxsize=0, **kwargs):
+        arquivo = ArquivoEmLotes(self.caminho, encoding='utf-8', **kwargs)
+        self.addCleanup(arquivo.close)
+        ouvinte = OuvinteEmLotes(queue.Queue(maxsize), arquivo)
+        self.addCleanup(ouvinte.stop)
+        handler = HandlerFila(ouvinte.queue)
+        handler.listener = ouvinte
+        return ouvinte, handler
+
+    def registro(self, mensagem):
+        return logging.makeLogRecord({'msg': mensagem, 'levelno': logging.INFO, 'levelname': 'INFO'})
+
+    def test_ouvinte_so_inicia_no_primeiro_registro(self):
+        ouvinte, handler = self.criar()
+        self.assertIsNone(ouvinte._thread)
+
+        handler.handle(self.registro('primeiro'))
+        self.assertTrue(ouvinte._thread.is_alive())
+        ouvinte.stop()
+        self.assertEqual(self.caminho.read_text(encoding='utf-8'), 'primeiro\n')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "Requer fork")
+    def test_processo_filho_inicia_a_propria_thread(self):
+        ouvinte, handler = self.criar()
+        handler.handle(self.registro('pai'))
+        ouvinte.queue.join()
+
+        pid = os.fork()
+        if pid == 0:  # Filho: a thread do pai não existe aqui
+            codigo = 1
+            try:
+                handler.handle(self.registro('filho'))
+                ouvinte.stop()
+                codigo = 0
+            finally:
+                os._exit(codigo)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+        handler.handle(self.registro('pai de novo'))
+        ouvinte.stop()
+        self.assertEqual(self.caminho.read_text(encoding='utf-8').splitlines(), ['pai', 'filho', 'pai de novo'])
+
+    def test_fila_cheia_descarta_e_conta(self):
+        ouvinte, handler = self.criar(maxsize=2)
+        with mock.patch.object(ouvinte, 'start'):  # Sem thread, nada é retirado da fila
+            for numero in range(5):
+                handler.handle(self.registro(f'registro {numero}'))
+        self.assertEqual(ouvinte.queue.qsize(), 2)
+        self.assertEqual(handler.descartados, 3)
+
+    def test_rotacao_por_lote_conta_bytes(self):
+        arquivo = ArquivoEmLotes(self.caminho, encoding='utf-8', maxBytes=40, backupCount=1)
+        self.addCleanup(arquivo.close)
+        arquivo.emitir_lote([self.registro('a' * 20)])
+        # 11 caracteres, 21 bytes: 21 + 21 passa do limite de 40 bytes
+        arquivo.emitir_lote([self.registro('ã' * 10)])
+
+        self.assertEqual(Path(f'{self.caminho}.1').read_text(encoding='utf-8'), 'a' * 20 + '\n')
+        self.assertEqual(self.caminho.read_text(encoding='utf-8'), 'ã' * 10 + '\n')
@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from . import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('saude/', views.saude, name='saude'),
+    path('saude/detalhada/', views.saude_detalhada, name='saude_detalhada'),
+    path('lojas/', include('apps.lojas.urls')),
     path('', include('apps.accounts.urls'))
 ]
@@ -0,0 +1,50 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from .saude import verificar_tudo
+
+CABECALHO_TOKEN = 'X-Saude-Token'
+
+logger = logging.getLogger(__name__)
+
+
+@never_cache
+def saude(request):
+    """
+    Sonda de vida (liveness): responde sem consultar banco, cache ou workers.
+    """
+    return JsonResponse({'ok': True})
+
+
+def _autorizado(request):
+    token = request.headers.get(CABECALHO_TOKEN, '')
+    if settings.SAUDE_TOKEN and constant_time_compare(token, settings.SAUDE_TOKEN):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@never_cache
+def saude_detalhada(request):
+    """
+    Estado e latência do banco, caches e workers. 503 se algo falhar.
+
+    Restrita a usuários da equipe ou a quem enviar `SAUDE_TOKEN` no
+    cabeçalho `X-Saude-Token`. Os erros não são expostos na resposta, apenas
+    registrados no log.
+    """
+    if not _autorizado(request):
+        raise PermissionDenied
+    ok, resultados = verificar_tudo()
+    for nome, resultado in resultados.items():
+        if not resultado['ok']:
+            logger.warning("Verificação de saúde %s falhou: %s", nome, resultado['erro'])
+    verificacoes = {
+        nome: {'status': 'ok' if resultado['ok'] else 'falhou', 'ms': resultado['ms']}
+        for nome, resultado in resultados.items()
+    }
+    return JsonResponse({'ok': ok, 'verificacoes': verificacoes}, status=200 if ok else 503)
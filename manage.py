@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    # `manage.py test` usa as configurações de teste (réplica de testes etc.)
+    padrao = 'core.settings_testes' if sys.argv[1:2] == ['test'] else 'core.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', padrao)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: